@@ -0,0 +1,356 @@
+"""Offline autotuner for chunking, retrieval and generation settings.
+
+Runs a question set with reference answers through the real QA graph for
+every combination of chunk size/overlap, retrieval k, answer model and
+verification on/off (and optionally QA graph mode), and measures per
+configuration:
+
+- latency: p50/p95 wall time of `run_qa_flow`;
+- prompt tokens per question, from the provider usage counters;
+- answer match: token F1 of the answer against the reference answer;
+- grounding: share of answer sentences citing a retrieved chunk.
+
+PDFs are parsed once and the pages cached under --cache-dir. Each chunking
+configuration re-chunks the cached pages into its own collection of a
+temporary local vector store (nothing is uploaded to Pinecone), and chunks
+with identical text are embedded once per run. The router is disabled
+during the sweep so the model and verification settings apply to every
+question.
+
+Prints the Pareto frontier over (p50 latency, prompt tokens, answer match)
+and writes the chosen configuration -- the fastest frontier point whose
+answer match is within --tolerance of the best -- to profiles/<name>.env.
+Serve with it via SETTINGS_PROFILE=<name>, after re-indexing with the
+chosen chunk size.
+
+The question set is JSONL with `question` and `reference` per line; without
+--questions the probe set of benchmark_chunking.py is used (its references
+are evidence snippets, so answer match is low across the board).
+
+Usage:
+    python autotune.py --pdf data/uploads/report.pdf --questions qa.jsonl \\
+        --chunk-sizes 128,256,512 --chunk-overlaps 0,32 --k 2,4,6 \\
+        --models gpt-4o-mini,gpt-4.1-nano --verify on,off --modes staged,fused \\
+        --name tuned
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Add src to python path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+_CITATION_RE = re.compile(r"\[(C\d+)\]")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,]\d+)*")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _csv(cast):
+    return lambda value: [cast(item) for item in value.split(",") if item]
+
+
+def _on_off(value: str) -> bool:
+    if value not in ("on", "off"):
+        raise argparse.ArgumentTypeError("expected 'on' or 'off'")
+    return value == "on"
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(_CITATION_RE.sub(" ", text).lower())
+
+
+def answer_f1(answer: str, reference: str) -> float:
+    """Token-overlap F1 between an answer and the reference (citations ignored)."""
+    predicted, expected = Counter(_tokens(answer)), Counter(_tokens(reference))
+    overlap = sum((predicted & expected).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(predicted.values())
+    recall = overlap / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def grounding(answer: str, citations: dict) -> float:
+    """Share of answer sentences carrying a citation of a retrieved chunk."""
+    sentences = [s for s in _SENTENCE_RE.split(answer.strip()) if len(_tokens(s)) >= 3]
+    if not sentences:
+        return 0.0
+    cited = sum(
+        1 for s in sentences if any(cid in citations for cid in _CITATION_RE.findall(s))
+    )
+    return cited / len(sentences)
+
+
+def _load_questions(path: Path | None) -> list[dict]:
+    if path is None:
+        from benchmark_chunking import PROBES
+
+        return [{"question": q, "reference": ref} for q, ref in PROBES]
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _load_pages(pdf: Path, cache_dir: Path):
+    """Parse a PDF once; later runs read the cached pages."""
+    from langchain_core.documents import Document
+
+    from app.core.retrieval.vector_store import load_pdf_pages
+
+    cached = cache_dir / f"{hashlib.sha1(pdf.read_bytes()).hexdigest()}.json"
+    if cached.exists():
+        rows = json.loads(cached.read_text(encoding="utf-8"))
+        return [Document(page_content=r["text"], metadata=r["metadata"]) for r in rows]
+    pages = load_pdf_pages(pdf)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cached.write_text(
+        json.dumps([{"text": p.page_content, "metadata": p.metadata} for p in pages]),
+        encoding="utf-8",
+    )
+    return pages
+
+
+class _EmbeddingMemo:
+    """Embed each distinct chunk text once across chunking configurations."""
+
+    def __init__(self, embeddings) -> None:
+        self._embeddings = embeddings
+        self._vectors: dict[str, list[float]] = {}
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        missing = [text for text in dict.fromkeys(texts) if text not in self._vectors]
+        if missing:
+            self._vectors.update(zip(missing, self._embeddings.embed_documents(missing)))
+        return [self._vectors[text] for text in texts]
+
+
+def _index_collection(pages, chunk_size: int, chunk_overlap: int, memo) -> tuple[str, int]:
+    from app.core.retrieval.chunking import get_chunker
+    from app.core.retrieval.vector_store import _get_vector_store
+
+    collection = f"tune-{chunk_size}-{chunk_overlap}"
+    chunks = get_chunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap).split_documents(
+        pages
+    )
+    texts = [chunk.page_content for chunk in chunks]
+    _get_vector_store().add_vectors(
+        [chunk.metadata["chunk_id"] for chunk in chunks],
+        np.asarray(memo.embed(texts), dtype=np.float32),
+        texts,
+        [chunk.metadata for chunk in chunks],
+        namespace=collection,
+        persist=False,
+    )
+    return collection, len(chunks)
+
+
+def _prompt_tokens() -> float:
+    from app.core.metrics import metrics
+
+    return sum(
+        value
+        for key, value in metrics.snapshot()["counters"].items()
+        if key.startswith("llm_prompt_tokens_total")
+    )
+
+
+def _evaluate(questions: list[dict], collection: str, repeats: int) -> dict:
+    from app.core.agents.graph import run_qa_flow
+
+    latencies, tokens, f1s, grounded = [], [], [], []
+    for item in questions:
+        for _ in range(repeats):
+            before = _prompt_tokens()
+            started = time.perf_counter()
+            result = run_qa_flow(item["question"], collection=collection)
+            latencies.append(time.perf_counter() - started)
+            tokens.append(_prompt_tokens() - before)
+        f1s.append(answer_f1(result.get("answer") or "", item["reference"]))
+        grounded.append(grounding(result.get("answer") or "", result.get("citations") or {}))
+    return {
+        "p50_s": float(np.percentile(latencies, 50)),
+        "p95_s": float(np.percentile(latencies, 95)),
+        "prompt_tokens": float(np.mean(tokens)),
+        "answer_f1": float(np.mean(f1s)),
+        "grounding": float(np.mean(grounded)),
+    }
+
+
+def pareto_front(rows: list[dict]) -> list[dict]:
+    """Rows not dominated on (p50 latency, prompt tokens, answer match)."""
+
+    def dominates(a: dict, b: dict) -> bool:
+        no_worse = (
+            a["p50_s"] <= b["p50_s"]
+            and a["prompt_tokens"] <= b["prompt_tokens"]
+            and a["answer_f1"] >= b["answer_f1"]
+        )
+        better = (
+            a["p50_s"] < b["p50_s"]
+            or a["prompt_tokens"] < b["prompt_tokens"]
+            or a["answer_f1"] > b["answer_f1"]
+        )
+        return no_worse and better
+
+    return [row for row in rows if not any(dominates(other, row) for other in rows)]
+
+
+def _choose(front: list[dict], tolerance: float) -> dict:
+    best = max(row["answer_f1"] for row in front)
+    acceptable = [row for row in front if row["answer_f1"] >= best - tolerance]
+    return min(acceptable, key=lambda row: (row["p50_s"], row["prompt_tokens"]))
+
+
+def _write_profile(path: Path, chosen: dict, chunker: str, questions: int) -> None:
+    lines = [
+        f"# Written by autotune.py on {datetime.now(timezone.utc):%Y-%m-%d %H:%M UTC} "
+        f"from {questions} questions.",
+        f"# p50 {chosen['p50_s']:.2f}s, p95 {chosen['p95_s']:.2f}s, "
+        f"{chosen['prompt_tokens']:.0f} prompt tokens/question, "
+        f"answer F1 {chosen['answer_f1']:.3f}, grounding {chosen['grounding']:.2f}",
+        "# Re-index documents with these chunk settings before serving with this profile.",
+        f"CHUNKER={chunker}",
+        f"CHUNK_SIZE_TOKENS={chosen['chunk_size']}",
+        f"CHUNK_OVERLAP_TOKENS={chosen['chunk_overlap']}",
+        f"RETRIEVAL_K={chosen['k']}",
+        f"OPENAI_MODEL_NAME={chosen['model']}",
+        f"VERIFICATION_ENABLED={str(chosen['verify']).lower()}",
+        f"QA_GRAPH_MODE={chosen['mode']}",
+        "ROUTER_ENABLED=false",
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _print_row(row: dict, marker: str) -> None:
+    print(f"{marker:<2}{row['chunk_size']:>6}{row['chunk_overlap']:>8}{row['k']:>4}  "
+          f"{row['model']:<16}{'on' if row['verify'] else 'off':<7}{row['mode']:<8}"
+          f"{row['p50_s']:>7.2f}{row['p95_s']:>7.2f}{row['prompt_tokens']:>9.0f}"
+          f"{row['answer_f1']:>7.3f}{row['grounding']:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", type=Path, action="append", dest="pdfs",
+                        help="PDF to tune on (repeatable)")
+    parser.add_argument("--questions", type=Path,
+                        help="JSONL with `question` and `reference` per line")
+    parser.add_argument("--chunk-sizes", type=_csv(int), default=[128, 256, 512])
+    parser.add_argument("--chunk-overlaps", type=_csv(int), default=[0, 32])
+    parser.add_argument("--k", type=_csv(int), default=[2, 4, 6])
+    parser.add_argument("--models", type=_csv(str), default=None,
+                        help="answer models (default: the configured strong and fast models)")
+    parser.add_argument("--verify", type=_csv(_on_off), default=[True, False])
+    parser.add_argument("--modes", type=_csv(str), default=None,
+                        help="QA graph modes, e.g. staged,fused (default: the configured one)")
+    parser.add_argument("--repeats", type=int, default=1,
+                        help="runs per question, for steadier latency")
+    parser.add_argument("--min-grounding", type=float, default=0.5,
+                        help="configurations below this grounding are not eligible")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="answer F1 the chosen point may give up for speed")
+    parser.add_argument("--name", default="tuned", help="profile name")
+    parser.add_argument("--cache-dir", type=Path, default=Path("data/autotune/parses"))
+    args = parser.parse_args()
+
+    # The throwaway index is removed however the sweep ends.
+    with tempfile.TemporaryDirectory(prefix="autotune-") as workdir:
+        _tune(args, Path(workdir))
+
+
+def _tune(args: argparse.Namespace, workdir: Path) -> None:
+    """Run the sweep against a local index under `workdir`."""
+    pdfs = args.pdfs or [Path("data/uploads/Sample-Accounting-Income-Statement-PDF-File.pdf")]
+    # A throwaway local index, and nothing that would hide per-config cost.
+    os.environ.update(
+        VECTOR_BACKEND="memory",
+        LOCAL_STORE_DIR=str(workdir / "index"),
+        CHUNK_STORE_ENABLED="false",
+        SHARED_CACHE_ENABLED="false",
+        QA_INDEX_ENABLED="false",
+        HIERARCHY_ENABLED="false",
+        ROUTER_ENABLED="false",
+    )
+
+    from app.core.config import get_settings
+    from app.core.retrieval.vector_store import _get_vector_store
+
+    settings = get_settings()
+    models = args.models or list(
+        dict.fromkeys([settings.openai_model_name, settings.openai_fast_model_name])
+    )
+    questions = _load_questions(args.questions)
+    pages = [page for pdf in pdfs for page in _load_pages(pdf, args.cache_dir)]
+    memo = _EmbeddingMemo(_get_vector_store().embeddings)
+
+    chunkings = list(itertools.product(args.chunk_sizes, args.chunk_overlaps))
+    modes = args.modes or [settings.qa_graph_mode]
+    generations = [
+        (k, model, verify, mode)
+        for k, model, verify, mode in itertools.product(args.k, models, args.verify, modes)
+        # The fused graph always checks claims locally; "verify off" adds nothing.
+        if not (mode == "fused" and not verify and True in args.verify)
+    ]
+    print(f"{len(chunkings) * len(generations)} configurations x {len(questions)} questions "
+          f"on {len(pages)} pages")
+
+    rows = []
+    for chunk_size, chunk_overlap in chunkings:
+        if chunk_overlap >= chunk_size:
+            continue
+        collection, chunk_count = _index_collection(pages, chunk_size, chunk_overlap, memo)
+        print(f"chunk_size={chunk_size} overlap={chunk_overlap}: {chunk_count} chunks")
+        for k, model, verify, mode in generations:
+            settings.retrieval_k = k
+            settings.openai_model_name = model
+            settings.verification_enabled = verify
+            settings.qa_graph_mode = mode
+            row = {
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "k": k,
+                "model": model,
+                "verify": verify,
+                "mode": mode,
+                **_evaluate(questions, collection, args.repeats),
+            }
+            rows.append(row)
+            _print_row(row, "")
+
+    eligible = [row for row in rows if row["grounding"] >= args.min_grounding]
+    if not eligible:
+        sys.exit(f"No configuration reached grounding {args.min_grounding}; "
+                 "lower --min-grounding or widen the sweep.")
+    front = pareto_front(eligible)
+    chosen = _choose(front, args.tolerance)
+
+    print("\nPareto frontier (> = chosen):")
+    print(f"{'':<2}{'size':>6}{'overlap':>8}{'k':>4}  {'model':<16}{'verify':<7}{'mode':<8}"
+          f"{'p50 s':>7}{'p95 s':>7}{'prompt':>9}{'F1':>7}{'ground':>7}")
+    for row in sorted(front, key=lambda r: r["p50_s"]):
+        _print_row(row, ">" if row is chosen else "")
+
+    profile_path = Path("profiles") / f"{args.name}.env"
+    _write_profile(profile_path, chosen, settings.chunker, len(questions))
+    report_path = Path("data/autotune") / f"{args.name}.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(
+        json.dumps({"results": rows, "frontier": front, "chosen": chosen}, indent=2),
+        encoding="utf-8",
+    )
+    print(f"\nWrote {profile_path} (use SETTINGS_PROFILE={args.name}) and {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Compare the structured token chunker against the original character splitter.
+
+Reports, per chunker: chunk count, tokens sent to the embedding model,
+estimated embedding cost, table rows broken across chunks, chunking time and
+retrieval hit rate@k on a small probe set for the sample income statement.
+
+Hit rate uses an offline TF-IDF retriever by default so the benchmark runs
+without network access; pass `--embeddings` to score with the configured
+OpenAI embedding model instead.
+
+Usage:
+    python benchmark_chunking.py [--pdf PATH] [--k 4] [--embeddings]
+"""
+
+import argparse
+import math
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add src to python path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from app.core.retrieval.chunking import _TABLE_ROW_RE, _TokenCounter, get_chunker
+
+# text-embedding-3-large list price, USD per 1M input tokens.
+EMBEDDING_PRICE_PER_MTOK = 0.13
+
+# (question, substring that must appear in a retrieved chunk)
+PROBES = [
+    ("What was the net income for 2002?", "NET INCOME 78,516"),
+    ("How much revenue did the company report?", "REVENUE $ 1,104,786"),
+    ("What was the gross profit?", "GROSS PROFIT 364,672"),
+    ("How much inventory was on hand at year end?", "Inventory 159,144 156,657"),
+    ("What were the accounts receivable?", "Accounts receivable 42,970 50,595"),
+    ("How much was spent on advertising?", "Advertising $ 18,801"),
+    ("What was the income tax expense?", "INCOME TAX  EXPENSE 14,387"),
+    ("What is the long-term debt?", "LONG-TERM DEBT (Note 4) 86,100"),
+    ("What were the cash flows from operating activities?", "Cash flows from operating activities 115,402"),
+    ("What does a balance sheet show?", "assets = liabilities + owners' equity"),
+    ("How is inventory valued?", "lower of cost or market"),
+    ("What is the statement of retained earnings?", "accumulated earnings that have been"),
+]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text)
+
+
+def _tfidf_rank(chunks: list[str], query: str, k: int) -> list[int]:
+    docs = [Counter(_WORD_RE.findall(c.lower())) for c in chunks]
+    df = Counter(term for d in docs for term in d)
+    n = len(docs)
+    q_terms = _WORD_RE.findall(query.lower())
+
+    def score(d: Counter) -> float:
+        return sum(
+            (1 + math.log(d[t])) * math.log(1 + n / df[t]) for t in q_terms if t in d
+        )
+
+    return sorted(range(n), key=lambda i: score(docs[i]), reverse=True)[:k]
+
+
+def _embedding_rank(chunks: list[str], k: int):
+    from langchain_core.vectorstores import InMemoryVectorStore
+    from app.core.retrieval.vector_store import _get_vector_store
+
+    store = InMemoryVectorStore(embedding=_get_vector_store().embeddings)
+    ids = store.add_texts(chunks)
+    position = {doc_id: i for i, doc_id in enumerate(ids)}
+
+    def rank(query: str) -> list[int]:
+        return [position[d.id] for d in store.similarity_search(query, k=k)]
+
+    return rank
+
+
+def _broken_rows(pages, chunks: list[str]) -> int:
+    """Count source table rows that do not appear whole in any chunk."""
+    joined = [_normalize(c) for c in chunks]
+    rows = [
+        _normalize(line.strip())
+        for page in pages
+        for line in page.page_content.splitlines()
+        if _TABLE_ROW_RE.search(line.strip())
+    ]
+    return sum(1 for row in rows if not any(row in c for c in joined))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pdf",
+        default="data/uploads/Sample-Accounting-Income-Statement-PDF-File.pdf",
+    )
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--embeddings", action="store_true")
+    args = parser.parse_args()
+
+    pages = PyPDFLoader(args.pdf, mode="page").load()
+    counter = _TokenCounter()
+
+    print(f"{'chunker':<12}{'chunks':>8}{'tokens':>9}{'cost $':>11}"
+          f"{'broken rows':>13}{'ms':>8}{'hit@' + str(args.k):>8}")
+    for name in ("recursive", "structured"):
+        start = time.perf_counter()
+        chunks = get_chunker(name).split_documents(pages)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        texts = [c.page_content for c in chunks]
+        tokens = sum(counter.count_many(texts))
+        cost = tokens / 1_000_000 * EMBEDDING_PRICE_PER_MTOK
+
+        rank = (
+            _embedding_rank(texts, args.k)
+            if args.embeddings
+            else lambda q: _tfidf_rank(texts, q, args.k)
+        )
+        hits = sum(
+            1
+            for question, expected in PROBES
+            if any(_normalize(expected) in _normalize(texts[i]) for i in rank(question))
+        )
+
+        print(f"{name:<12}{len(chunks):>8}{tokens:>9}{cost:>11.6f}"
+              f"{_broken_rows(pages, texts):>13}{elapsed_ms:>8.1f}"
+              f"{hits / len(PROBES):>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
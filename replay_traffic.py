@@ -0,0 +1,231 @@
+"""Replay captured API traffic against a target and compare with the capture.
+
+Reads the JSONL files written by the traffic capture middleware
+(`capture_enabled`, see `app.core.traffic_capture`) and re-issues every
+request against --target:
+
+- at the original pace (--speed 1), preserving each request's offset from
+  the first one, so bursts and lulls are reproduced;
+- N times faster (--speed N), scaling all inter-arrival times by 1/N;
+- as fast as possible (--max-speed), bounded by --concurrency.
+
+Requests are sent on schedule regardless of how many are still in flight
+(open-loop), so a slower build shows up as higher latency and errors rather
+than as a slower replay. Uploads are re-sent from their captured blobs
+(`capture_store_uploads`); uploads captured without a blob, and truncated
+bodies, are skipped.
+
+The report compares the replay with the captured baseline per path: p50,
+p90, p95 and p99 latency, error rate (5xx and transport errors) and
+load-shed rate (429/503), plus how late the scheduler dispatched requests.
+The baseline covers only the requests that were replayed. The two latencies
+are measured differently: captured latency is server-side (inside the
+app), replay latency is the client round trip, which adds the network,
+connection setup and anything in front of the app. The columns are labeled
+accordingly; to compare builds, replay against the capturing build first to
+learn that offset.
+
+Usage:
+    python replay_traffic.py data/capture --target http://staging:8000 --speed 2
+    python replay_traffic.py data/capture/capture-*.jsonl --max-speed --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+_PERCENTILES = (50, 90, 95, 99)
+_SHED_STATUSES = (429, 503)
+
+
+def _capture_files(paths: list[Path]) -> list[Path]:
+    files: list[Path] = []
+    for path in paths:
+        files.extend(sorted(path.glob("capture-*.jsonl")) if path.is_dir() else [path])
+    return files
+
+
+def _load(files: list[Path], only_paths: set[str] | None) -> list[dict]:
+    records = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if only_paths and record["path"] not in only_paths:
+                    continue
+                records.append(record)
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def _request_body(record: dict, capture_dir: Path) -> bytes | None:
+    """Bytes to send, or None when the body was not captured."""
+    if record.get("body_truncated"):
+        return None
+    if "body" in record:
+        return json.dumps(record["body"]).encode("utf-8")
+    if "body_blob" in record:
+        blob = capture_dir / record["body_blob"]
+        return blob.read_bytes() if blob.exists() else None
+    return None if record.get("body_bytes") else b""
+
+
+def _summary(latencies: list[float], statuses: list[int | None]) -> dict:
+    total = len(statuses)
+    errors = sum(1 for s in statuses if s is None or s >= 500 and s not in _SHED_STATUSES)
+    shed = sum(1 for s in statuses if s in _SHED_STATUSES)
+    summary = {
+        "requests": total,
+        "error_rate": errors / total if total else 0.0,
+        "shed_rate": shed / total if total else 0.0,
+    }
+    for p in _PERCENTILES:
+        summary[f"p{p}_s"] = float(np.percentile(latencies, p)) if latencies else None
+    return summary
+
+
+async def _replay(records: list[dict], args: argparse.Namespace, capture_dir: Path) -> list[dict]:
+    results: list[dict] = []
+    limit = asyncio.Semaphore(args.concurrency if args.max_speed else 1_000_000)
+    limits = httpx.Limits(max_connections=args.concurrency if args.max_speed else None)
+
+    async with httpx.AsyncClient(
+        base_url=args.target, timeout=args.timeout, limits=limits
+    ) as client:
+
+        async def send(index: int, record: dict, body: bytes, due: float) -> None:
+            async with limit:
+                lateness = max(0.0, time.perf_counter() - due)
+                headers = {"content-type": record["content_type"]} if record["content_type"] else {}
+                url = record["path"] + (f"?{record['query']}" if record["query"] else "")
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        record["method"], url, content=body, headers=headers
+                    )
+                    status = response.status_code
+                except httpx.HTTPError as exc:
+                    status = None
+                    print(f"{record['path']}: {type(exc).__name__}: {exc}", file=sys.stderr)
+                results.append(
+                    {
+                        "index": index,
+                        "path": record["path"],
+                        "status": status,
+                        "latency_seconds": time.perf_counter() - started,
+                        "lateness_seconds": lateness,
+                    }
+                )
+
+        tasks = []
+        origin = records[0]["ts"]
+        start = time.perf_counter()
+        for index, record in enumerate(records):
+            body = _request_body(record, capture_dir)
+            if body is None:
+                results.append({"index": index, "path": record["path"], "skipped": True})
+                continue
+            due = start
+            if not args.max_speed:
+                due = start + (record["ts"] - origin) / args.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(index, record, body, due)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def _print_comparison(path: str, baseline: dict, replay: dict) -> None:
+    print(f"\n{path}  ({replay['requests']} replayed)")
+    print(f"{'':<12}{'server':>12}{'client RTT':>12}{'change':>10}")
+    for key in [f"p{p}_s" for p in _PERCENTILES]:
+        before, after = baseline[key], replay[key]
+        if before is None or after is None:
+            continue
+        change = f"{(after - before) / before:+.0%}" if before else ""
+        print(f"{key:<12}{before:>12.3f}{after:>12.3f}{change:>10}")
+    for key in ("error_rate", "shed_rate"):
+        print(f"{key:<12}{baseline[key]:>12.1%}{replay[key]:>12.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("captures", type=Path, nargs="+",
+                        help="capture directory or JSONL files")
+    parser.add_argument("--target", default="http://localhost:8000")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--speed", type=float, default=1.0,
+                      help="replay N times faster than captured (default 1)")
+    pace.add_argument("--max-speed", action="store_true",
+                      help="ignore capture timing; send as fast as --concurrency allows")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="in-flight requests with --max-speed")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="only replay this path (repeatable)")
+    parser.add_argument("--limit", type=int, help="replay at most this many requests")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--report", type=Path, help="write the comparison as JSON")
+    args = parser.parse_args()
+
+    if httpx is None:
+        sys.exit("replay_traffic.py needs httpx (pip install 'class-12[replay]').")
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    files = _capture_files(args.captures)
+    records = _load(files, set(args.paths) if args.paths else None)[: args.limit]
+    if not records:
+        sys.exit("No captured requests found.")
+    capture_dir = files[0].parent
+    span = records[-1]["ts"] - records[0]["ts"]
+    pace = "max speed" if args.max_speed else f"{args.speed:g}x ({span / args.speed:.1f}s)"
+    print(f"Replaying {len(records)} requests captured over {span:.1f}s at {pace} "
+          f"against {args.target}")
+
+    started = time.perf_counter()
+    results = asyncio.run(_replay(records, args, capture_dir))
+    elapsed = time.perf_counter() - started
+
+    sent = [r for r in results if not r.get("skipped")]
+    replayed_records = [records[r["index"]] for r in sent]
+    report = {
+        "elapsed_seconds": elapsed,
+        "skipped": len(results) - len(sent),
+        # Captured latency is measured in the app, replay latency by the client.
+        "latency_measured": {"captured": "server", "replay": "client_round_trip"},
+        "paths": {},
+    }
+    for path in sorted({r["path"] for r in records}):
+        captured = [r for r in replayed_records if r["path"] == path]
+        replayed = [r for r in sent if r["path"] == path]
+        baseline = _summary([r["latency_seconds"] for r in captured], [r["status"] for r in captured])
+        replay = _summary([r["latency_seconds"] for r in replayed], [r["status"] for r in replayed])
+        report["paths"][path] = {"captured": baseline, "replay": replay}
+        if replayed:
+            _print_comparison(path, baseline, replay)
+
+    lateness = [r["lateness_seconds"] for r in sent]
+    if lateness:
+        report["dispatch_lateness_p99_s"] = float(np.percentile(lateness, 99))
+    print(f"\n{len(sent)} sent, {report['skipped']} skipped, {elapsed:.1f}s elapsed, "
+          f"{len(sent) / elapsed:.1f} req/s; dispatch lateness p99 "
+          f"{report.get('dispatch_lateness_p99_s', 0.0) * 1000:.1f} ms")
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
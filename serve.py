@@ -0,0 +1,176 @@
+"""Prefork multi-process server for the QA API.
+
+The master process imports the app and warms everything that is safe to
+share before forking: module imports, settings, the tokenizer, the compiled
+QA graph and (for `vector_backend="memory"`) the local vector matrix, which
+is memory-mapped so all workers read one copy from the page cache. It then
+freezes the GC heap so workers do not dirty the inherited pages, binds the
+listening socket once and forks N uvicorn workers that accept on it.
+Network clients (including the local store's embedding client) and SQLite
+connections are created lazily in each worker.
+
+With more than one worker the shared cache is switched on when no config
+source sets `SHARED_CACHE_ENABLED`, so answers, query embeddings and the
+index version are shared across workers; an explicit `false` is kept, with
+a warning.
+
+Per-worker state to keep in mind:
+- in-memory checkpoints live in one worker; use `checkpoint_backend=sqlite`
+  to resume retries across workers (sessions move between workers through
+  the shared cache, but concurrent turns of one session are only
+  serialized within a worker);
+- admission limits (`qa_max_concurrency`, `qa_max_queue`) apply per worker;
+- `/metrics` reports the worker that served the request.
+
+POSIX only (uses fork). Dead workers are restarted.
+
+Usage:
+    python serve.py [--host 0.0.0.0] [--port 8000] [--workers 4]
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Add src to python path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+# Seconds to wait before restarting a worker that died, to avoid a hot loop.
+_RESPAWN_DELAY_SECONDS = 1.0
+
+
+def _warm() -> None:
+    """Build shared, fork-safe state once in the master."""
+    from app.api import app  # noqa: F401 - imports every module up front
+    from app.core.agents.graph import get_qa_graph
+    from app.core.config import get_settings
+    from app.core.retrieval.chunking import get_chunker
+    from app.core.retrieval.vector_store import _get_vector_store
+
+    settings = get_settings()
+    get_chunker()
+    get_qa_graph(settings.qa_graph_mode, checkpointed=False)
+    # A SQLite checkpointer holds a connection, which must not cross a fork.
+    if settings.checkpoint_backend != "sqlite":
+        get_qa_graph(settings.qa_graph_mode)
+    # Only the local store is warmed: it is a read-only memory map, and its
+    # embedding client is created on first use, i.e. in the worker. Pinecone
+    # and OpenAI clients own connection pools and are created per worker.
+    if settings.vector_backend == "memory":
+        _get_vector_store()
+
+
+def _enable_shared_cache() -> None:
+    """Default the shared cache on for multiple workers.
+
+    Only applied when neither the environment, `.env` nor the settings
+    profile sets it; an explicit `false` is respected.
+    """
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    if "shared_cache_enabled" not in settings.model_fields_set:
+        settings.shared_cache_enabled = True
+    elif not settings.shared_cache_enabled:
+        print("Warning: SHARED_CACHE_ENABLED is false; answers, query embeddings "
+              "and the index version are not shared between workers")
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, args: argparse.Namespace) -> None:
+    import uvicorn
+
+    from app.api import app
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        access_log=args.access_log,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("serve.py needs fork(); use `uvicorn app.api:app --workers N` instead.")
+    if args.workers > 1:
+        _enable_shared_cache()
+
+    started = time.perf_counter()
+    _warm()
+    sock = _bind(args.host, args.port, args.backlog)
+    print(f"Master {os.getpid()} warmed in {time.perf_counter() - started:.2f}s; "
+          f"listening on {args.host}:{args.port} with {args.workers} workers")
+    # Move everything allocated so far out of GC tracking, so collections in
+    # the workers do not touch (and copy) the inherited pages.
+    gc.freeze()
+
+    workers: set[int] = set()
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(sock, args)
+            finally:
+                os._exit(0)
+        workers.add(pid)
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}; restarting")
+            time.sleep(_RESPAWN_DELAY_SECONDS)
+            spawn()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Export the vector index to a Parquet snapshot, or restore one.
+
+Restoring a snapshot brings up a new environment without re-parsing PDFs or
+re-embedding chunks. The source/target backend is the configured
+`vector_backend` (Pinecone or the local store).
+
+Requires the optional `pyarrow` package (pip install 'class-12[snapshot]').
+
+Usage:
+    python snapshot_index.py export data/snapshots/corpus.parquet [--quantize int8]
+    python snapshot_index.py import data/snapshots/corpus.parquet [--workers 16]
+    python snapshot_index.py info data/snapshots/corpus.parquet
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add src to python path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from app.core.retrieval.snapshot import (
+    FLOAT32,
+    INT8,
+    export_snapshot,
+    import_snapshot,
+    read_snapshot_info,
+)
+
+
+def _report(action: str, stats) -> None:
+    rate = stats.rows / stats.seconds if stats.seconds else 0.0
+    print(f"{action} {stats.rows} vectors in {stats.seconds:.2f}s "
+          f"({rate:.0f}/s, {stats.bytes / 1_048_576:.1f} MiB)")
+    for namespace, rows in sorted(stats.namespaces.items()):
+        print(f"  {namespace or '(default)':<24}{rows:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write a snapshot of the index")
+    export.add_argument("path", type=Path)
+    export.add_argument("--quantize", choices=[FLOAT32, INT8], default=FLOAT32)
+    export.add_argument("--namespace", action="append", dest="namespaces",
+                        help="namespace to export (repeatable; default: all)")
+    export.add_argument("--batch-size", type=int, default=100)
+
+    restore = commands.add_parser("import", help="bulk-load a snapshot into the index")
+    restore.add_argument("path", type=Path)
+    restore.add_argument("--batch-size", type=int, default=100)
+    restore.add_argument("--workers", type=int, default=8)
+    restore.add_argument("--force", action="store_true",
+                         help="ignore embedding model/dimension mismatches")
+
+    info = commands.add_parser("info", help="print a snapshot's header")
+    info.add_argument("path", type=Path)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        stats = export_snapshot(
+            args.path,
+            quantize=args.quantize,
+            namespaces=args.namespaces,
+            batch_size=args.batch_size,
+        )
+        _report("Exported", stats)
+    elif args.command == "import":
+        stats = import_snapshot(
+            args.path,
+            batch_size=args.batch_size,
+            max_workers=args.workers,
+            force=args.force,
+        )
+        _report("Imported", stats)
+    else:
+        print(json.dumps(read_snapshot_info(args.path), indent=2))
+
+
+if __name__ == "__main__":
+    main()
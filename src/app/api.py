@@ -1,13 +1,46 @@
+import asyncio
+import hmac
+import threading
+import time
+from datetime import date
 from pathlib import Path
+from typing import Callable, TypeVar
 
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile, status
-from fastapi.responses import JSONResponse
+from fastapi import (
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from .core.agents.budget import DeadlineExceeded
+from .core.concurrency import OperationCancelled
+from .core.config import get_settings
+from .core import profiling
+from .core import traffic_capture
+from .core.metrics import metrics
+from .core.retrieval.collections import build_metadata_filter, validate_collection
 from .models import QuestionRequest, QAResponse
+from .services.admission import AdmissionRejected, get_admission_controller
 from .services.qa_service import answer_question
 from .services.indexing_service import index_pdf_file
 
 
+T = TypeVar("T")
+
+# How often an in-flight /qa request checks whether its client disconnected.
+_DISCONNECT_POLL_SECONDS = 0.25
+# Non-standard "client closed request" status (as used by nginx).
+_CLIENT_CLOSED_REQUEST = 499
+
+
 app = FastAPI(
     title="Class 12 Multi-Agent RAG Demo",
     description=(
@@ -18,6 +51,9 @@ app = FastAPI(
     version="0.1.0",
 )
 
+if get_settings().capture_enabled:
+    app.add_middleware(traffic_capture.TrafficCaptureMiddleware)
+
 
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(
@@ -44,8 +80,123 @@ async def unhandled_exception_handler(
     )
 
 
-@app.post("/qa", response_model=QAResponse, status_code=status.HTTP_200_OK)
-async def qa_endpoint(payload: QuestionRequest) -> QAResponse:
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(
+    request: Request, exc: DeadlineExceeded
+) -> JSONResponse:
+    """A stage failed after the latency budget ran out; retrying will not help."""
+
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Latency budget exceeded."},
+    )
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(
+    request: Request, exc: AdmissionRejected
+) -> JSONResponse:
+    """Shed load with 429/503 and a `Retry-After` hint."""
+
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": f"Server busy ({exc.reason}). Retry later."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def _run_until_disconnect(
+    request: Request, func: Callable[[threading.Event], T]
+) -> T:
+    """Run a blocking callable in the threadpool, cancelling on disconnect.
+
+    `func` receives a cancel event. When the client goes away the event is
+    set, so the QA graph aborts its in-flight provider call (or stops
+    before the next one), and `OperationCancelled` is raised here.
+    """
+    cancel_event = threading.Event()
+    work = asyncio.ensure_future(run_in_threadpool(func, cancel_event))
+    while True:
+        done, _ = await asyncio.wait({work}, timeout=_DISCONNECT_POLL_SECONDS)
+        if done:
+            return work.result()
+        if await request.is_disconnected():
+            cancel_event.set()
+            metrics.increment("qa_admission_cancelled_total", stage="running")
+            # Keep the slot until the worker thread has actually stopped.
+            try:
+                await work
+            except OperationCancelled:
+                pass
+            except Exception as exc:
+                # Nobody will see this response, but the failure is real.
+                metrics.increment("qa_cancelled_failures_total", error=type(exc).__name__)
+                print(f"QA request failed after client disconnect: {exc!r}")
+            raise OperationCancelled("Client disconnected.")
+
+
+def _validated_collection(collection: str | None) -> str | None:
+    try:
+        return validate_collection(collection)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def _is_admin(request: Request) -> bool:
+    # Fail closed: without a configured token nobody is an admin.
+    token = get_settings().profiling_admin_token
+    if not token:
+        return False
+    supplied = request.headers.get("x-admin-token", "")
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _require_profiling_admin(request: Request) -> None:
+    if not get_settings().profiling_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not get_settings().profiling_admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling admin endpoints require profiling_admin_token.",
+        )
+    if not _is_admin(request):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token."
+        )
+
+
+def _profile_fields(question: str, result: dict) -> dict:
+    return {
+        "question": question,
+        "route": result.get("route"),
+        "degradations": result.get("degradations") or [],
+        "stage_timings": result.get("stage_timings") or {},
+    }
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> dict:
+    """Export in-process metrics (admission queue depth, rejections, ...)."""
+
+    return metrics.snapshot()
+
+
+@app.post(
+    "/qa",
+    response_model=QAResponse,
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_429_TOO_MANY_REQUESTS: {"description": "Admission queue full."},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Timed out in the queue."},
+        status.HTTP_504_GATEWAY_TIMEOUT: {"description": "Failed after the latency budget."},
+        _CLIENT_CLOSED_REQUEST: {
+            "description": "Client disconnected before the answer was ready (no body)."
+        },
+    },
+)
+async def qa_endpoint(
+    payload: QuestionRequest, request: Request, response: Response
+) -> QAResponse:
     """Submit a question about the vector databases paper.
 
     US-001 requirements:
@@ -53,6 +204,16 @@ async def qa_endpoint(payload: QuestionRequest) -> QAResponse:
     - Validate the request format and return 400 for invalid requests
     - Return 200 with `answer`, `draft_answer`, and `context` fields
     - Delegate to the multi-agent RAG service layer for processing
+    - Shed load with 429/503 + `Retry-After` when the admission queue is full
+    - Stop the graph when the client disconnects
+    - Resume a failed request at its failed stage when retried with the
+      same `request_id`
+    - Search only the requested `collection`, with `filters` pushed down
+      to the vector query
+    - Answer with the staged or fused graph (`mode`)
+    - Profile the request when asked to (`X-Profile: 1` with a valid
+      `X-Admin-Token`), armed or sampled; the profile ID is returned in
+      `X-Profile-Id`
     """
 
     question = payload.question.strip()
@@ -63,26 +224,137 @@ async def qa_endpoint(payload: QuestionRequest) -> QAResponse:
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="`question` must be a non-empty string.",
         )
+    collection = _validated_collection(payload.collection)
+    filters = payload.filters
+    metadata_filter = (
+        build_metadata_filter(
+            sources=filters.sources,
+            page_from=filters.page_from,
+            page_to=filters.page_to,
+            date_from=filters.date_from,
+            date_to=filters.date_to,
+        )
+        if filters is not None
+        else None
+    )
+
+    # The latency budget starts on arrival, so time spent queued counts.
+    budget_seconds = (
+        payload.latency_budget_ms / 1000
+        if payload.latency_budget_ms is not None
+        else get_settings().qa_latency_budget_seconds
+    )
+    deadline = time.time() + budget_seconds if budget_seconds else None
+
+    def call(cancel_event: threading.Event) -> dict:
+        return answer_question(
+            question,
+            payload.session_id,
+            cancel_event,
+            deadline,
+            payload.request_id,
+            collection,
+            metadata_filter,
+            payload.mode,
+            budget_seconds,
+        )
+
+    trigger = profiling.should_profile(
+        request.headers.get("x-profile") in ("1", "true") and _is_admin(request)
+    )
 
-    # Delegate to the service layer which runs the multi-agent QA graph
-    result = answer_question(question)
+    # Delegate to the service layer which runs the multi-agent QA graph.
+    # The graph is blocking, so run it off the event loop; otherwise
+    # concurrent requests would be serialized and never coalesce.
+    try:
+        async with get_admission_controller().slot():
+            if trigger is None:
+                result = await _run_until_disconnect(request, call)
+            else:
+                result, profile_id = await _run_until_disconnect(
+                    request,
+                    lambda cancel_event: profiling.run_profiled(
+                        lambda: call(cancel_event),
+                        trigger,
+                        describe=lambda result: _profile_fields(question, result),
+                    ),
+                )
+                response.headers["X-Profile-Id"] = profile_id
+    except OperationCancelled:
+        return Response(status_code=_CLIENT_CLOSED_REQUEST)
 
+    traffic_capture.annotate(
+        stage_timings=result.get("stage_timings") or {},
+        route=result.get("route"),
+        degradations=result.get("degradations") or [],
+    )
     return QAResponse(
         answer=result.get("answer", ""),
         context=result.get("context", ""),
         citations=result.get("citations"),
+        session_id=payload.session_id,
+        degradations=result.get("degradations") or [],
+        verified=result.get("verified") is not False,
+        route=result.get("route"),
+        claims=result.get("claims"),
     )
 
 
+@app.post("/admin/profiles/arm")
+async def arm_profiles(
+    request: Request, count: int = Query(1, ge=1, le=1000)
+) -> dict:
+    """Profile the next `count` `/qa` requests served by this worker."""
+
+    _require_profiling_admin(request)
+    return {"armed": profiling.arm(count)}
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request) -> list:
+    """List stored profiles, newest first."""
+
+    _require_profiling_admin(request)
+    return profiling.list_profiles()
+
+
+@app.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request) -> dict:
+    """Return a profile summary: timings, top functions, top allocation sites."""
+
+    _require_profiling_admin(request)
+    summary = profiling.load_profile(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown profile.")
+    return summary
+
+
+@app.get("/admin/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def get_profile_stacks(profile_id: str, request: Request) -> str:
+    """Return a profile's collapsed stacks (input for flamegraph.pl/speedscope)."""
+
+    _require_profiling_admin(request)
+    stacks = profiling.load_collapsed(profile_id)
+    if stacks is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown profile.")
+    return stacks
+
+
 @app.post("/index-pdf", status_code=status.HTTP_200_OK)
-async def index_pdf(file: UploadFile = File(...)) -> dict:
+async def index_pdf(
+    file: UploadFile = File(...),
+    collection: str | None = Form(None),
+    document_date: date | None = Form(None),
+) -> dict:
     """Upload a PDF and index it into the vector database.
 
     This endpoint:
-    - Accepts a PDF file upload
+    - Accepts a PDF file upload, optionally with a `collection` and a
+      `document_date` (overriding the date in the PDF metadata)
     - Saves it to the local `data/uploads/` directory
     - Uses PyPDFLoader to load the document into LangChain `Document` objects
-    - Indexes those documents into the configured Pinecone vector store
+    - Indexes those documents into the collection's namespace of the
+      configured vector store
     """
 
     if file.content_type not in ("application/pdf",):
@@ -91,18 +363,23 @@ async def index_pdf(file: UploadFile = File(...)) -> dict:
             detail="Only PDF files are supported.",
         )
 
-    upload_dir = Path("data/uploads")
+    collection = _validated_collection(collection)
+    upload_dir = Path("data/uploads") / (collection or "")
     upload_dir.mkdir(parents=True, exist_ok=True)
 
     file_path = upload_dir / file.filename
     contents = await file.read()
     file_path.write_bytes(contents)
 
-    # Index the saved PDF
-    chunks_indexed = index_pdf_file(file_path)
+    # Index the saved PDF. Ingest makes blocking embedding and LLM calls, so
+    # it runs on a worker thread rather than stalling the event loop.
+    chunks_indexed = await run_in_threadpool(
+        index_pdf_file, file_path, collection, document_date
+    )
 
     return {
         "filename": file.filename,
+        "collection": collection,
         "chunks_indexed": chunks_indexed,
         "message": "PDF indexed successfully.",
     }
@@ -1,21 +1,43 @@
 """Agent implementations for the multi-agent RAG flow.
 
-This module defines thin node functions that execute logic directly using OpenAI client
-to avoid LangChain's SecretStr handling issues in uvicorn environment.
+This module defines thin node functions that call the configured LLM provider
+(see `core.llm.providers`) directly rather than through LangChain chat models,
+which avoids LangChain's SecretStr handling issues in uvicorn environment.
 """
 
 from typing import List, Tuple
 import os
+import time
 
 import openai
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, BaseMessage
+from langgraph.runtime import Runtime
 
-from ..config import Settings
+from ..config import get_settings
+from ..llm.providers import get_chat_provider
+from ..metrics import metrics
+from ..retrieval.session_chunks import (
+    merge_session_chunks,
+    record_turn,
+    reusable_chunks,
+    serialize_session_turn,
+)
+from ..retrieval.vector_store import embed_query
+from . import budget
+from .claims import (
+    GROUNDED_ANSWER_FORMAT,
+    check_claims,
+    parse_grounded_answer,
+    render_answer,
+)
+from .router import classify_question
 from .prompts import (
+    FUSED_ANSWER_SYSTEM_PROMPT,
     RETRIEVAL_SYSTEM_PROMPT,
     SUMMARIZATION_SYSTEM_PROMPT,
     VERIFICATION_SYSTEM_PROMPT,
 )
+from .runtime import QARuntimeContext, cancel_token, query_vector, raise_if_cancelled
 from .state import QAState
 from .tools import retrieval_tool
 
@@ -27,86 +49,251 @@ def _extract_last_ai_content(messages: List[BaseMessage]) -> str:
     return ""
 
 
-def retrieval_node(state: QAState) -> QAState:
+def retrieval_node(state: QAState, runtime: Runtime[QARuntimeContext]) -> QAState:
     """Retrieval Node: gathers context from vector store directly.
 
     This node:
     - Calling the retrieval tool directly with the user's question.
     - Stores the consolidated context string in `state["context"]`.
+    - For session requests, extends the session's chunk set with the new
+      hits (fewer of them on follow-ups) and keeps [C#] IDs stable. A
+      follow-up close enough to an earlier question re-uses that turn's
+      chunks without a vector query, and only the current turn's chunks
+      are sent in full (see `retrieval.session_chunks`).
     """
     question = state["question"]
-    
+    session_context = state.get("session_context")
+    settings = get_settings()
+
+    k = settings.retrieval_k
+    if session_context and session_context.get("chunks"):
+        # Follow-ups build on chunks the session already holds.
+        k = settings.session_followup_k
+
+    degradations: List[str] = []
+    remaining = budget.remaining_seconds(state)
+    if remaining is not None and remaining < (
+        settings.retrieval_estimate_seconds + 2 * budget.estimated_llm_seconds()
+    ):
+        # Not enough time for retrieval plus two full-context LLM calls.
+        k = max(1, k // 2)
+        degradations.append(budget.REDUCED_K)
+
+    raise_if_cancelled(runtime)
+
     # Directly invoke the tool
     try:
-        tool_output = retrieval_tool.invoke(question)
-        
-        # Handle different output formats based on langchain version
-        if isinstance(tool_output, tuple) and len(tool_output) == 2:
-            context, artifact = tool_output
-            citations = artifact.get("citations", {}) if isinstance(artifact, dict) else {}
+        vector = query_vector(runtime)
+        reused = None
+        if session_context is not None:
+            if vector is None:
+                vector = embed_query(question)
+            reused = reusable_chunks(
+                session_context, vector, settings.session_reuse_min_similarity
+            )
+            metrics.increment(
+                "qa_session_retrievals_total",
+                outcome="reused" if reused is not None else "queried",
+            )
+        if reused is not None:
+            if degradations:
+                reused = reused[:k]
+            return _session_result(session_context, reused, degradations)
+
+        # Invoke with a ToolCall: plain-argument invocation of a
+        # `content_and_artifact` tool returns only the content, dropping the
+        # citation map and raw docs.
+        tool_output = retrieval_tool.invoke(
+            {
+                "type": "tool_call",
+                "id": "retrieval",
+                "name": retrieval_tool.name,
+                "args": {
+                    "query": question,
+                    "k": k,
+                    "collection": state.get("collection"),
+                    "metadata_filter": state.get("metadata_filter"),
+                    "query_vector": vector,
+                },
+            }
+        )
+
+        artifact = getattr(tool_output, "artifact", None)
+        if isinstance(artifact, dict):
+            context = str(tool_output.content)
+            citations = artifact.get("citations", {})
+            docs = artifact.get("docs", [])
         else:
             # Fallback if it returns just content
-            context = str(tool_output)
+            context = str(getattr(tool_output, "content", tool_output))
             citations = {}
+            docs = []
+
+        if session_context is not None:
+            session_context = record_turn(session_context, vector, docs)
+            return _session_result(session_context, docs, degradations)
 
         return {
             "context": context,
             "citations": citations,
+            "session_context": session_context,
+            "degradations": degradations,
+        }
+    except Exception as exc:
+        metrics.increment("qa_retrievals_total", outcome="error", error=type(exc).__name__)
+        # In case of tool error, return empty context (or the session's
+        # most recently used chunks)
+        context, citations = "", {}
+        if session_context and session_context.get("chunks"):
+            recent = [entry["doc"] for entry in session_context["chunks"][-k:]]
+            context, citations = serialize_session_turn(session_context, recent)
+        return {
+            "context": context,
+            "citations": citations,
+            "session_context": session_context,
+            "degradations": degradations,
+        }
+
+
+def _session_result(session_context, docs, degradations: List[str]) -> QAState:
+    """Merge a turn's chunks into the session and serialize them."""
+    session_context = merge_session_chunks(
+        session_context, docs, get_settings().session_max_chunks
+    )
+    context, citations = serialize_session_turn(session_context, docs)
+    return {
+        "context": context,
+        "citations": citations,
+        "session_context": session_context,
+        "degradations": degradations,
+    }
+
+
+def _timed_out(degradations: List[str], stage: str = "summarization") -> QAState:
+    """Final state of an answering node that ran out of time before answering."""
+    metrics.increment("qa_llm_timeouts_total", stage=stage)
+    return {
+        "answer": budget.TIMED_OUT_ANSWER,
+        "verified": False,
+        "degradations": degradations + [budget.TIMED_OUT],
+    }
+
+
+def routing_node(state: QAState) -> QAState:
+    """Router Node: picks the model and whether to verify.
+
+    Uses only cheap signals from the question and retrieval results (see
+    `router.classify_question`); no LLM call is made.
+    """
+    settings = get_settings()
+    if not settings.router_enabled:
+        return {
+            "route": None,
+            "model": settings.openai_model_name,
+            "verify": settings.verification_enabled,
         }
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        # In case of tool error, return empty context
-        return {"context": "", "citations": {}}
+
+    decision = classify_question(state["question"], state.get("citations"), settings)
+    metrics.increment("qa_route_total", route=decision.route)
+    for reason in decision.reasons:
+        metrics.increment("qa_route_reason_total", reason=reason)
+
+    return {
+        "route": decision.route,
+        "model": decision.model,
+        "verify": decision.verify and settings.verification_enabled,
+    }
 
 
-def summarization_node(state: QAState) -> QAState:
-    """Summarization Node: generates draft answer from context using OpenAI directly.
+def summarization_node(state: QAState, runtime: Runtime[QARuntimeContext]) -> QAState:
+    """Summarization Node: generates draft answer from context via the LLM provider.
 
     This node:
     - Constructs a prompt with system instructions and user content.
-    - Invokes OpenAI API directly.
+    - Invokes the configured LLM provider directly.
     - Stores the draft answer in `state["draft_answer"]`.
+    - Under a tight latency budget, trims the context and/or drafts with
+      the fast model.
     """
     question = state["question"]
     context = state.get("context")
+    citations = state.get("citations")
+
+    settings = get_settings()
+
+    model = state.get("model") or settings.openai_model_name
+    degradations: List[str] = []
+    remaining = budget.remaining_seconds(state)
+    if remaining is not None:
+        llm_seconds = budget.estimated_llm_seconds()
+        if remaining < 2 * llm_seconds and context:
+            context, citations = budget.trim_context(
+                context, citations, settings.budget_trimmed_chunks
+            )
+            degradations.append(budget.TRIMMED_CONTEXT)
+        if remaining < llm_seconds:
+            model = settings.openai_fast_model_name
+            degradations.append(budget.FAST_MODEL)
 
     user_content = f"Question: {question}\n\nContext:\n{context}"
-    
-    # Instantiate Settings directly
-    settings = Settings()
-    # Force strip key if needed
-    api_key = settings.openai_api_key.strip() if settings.openai_api_key else ""
-    client = openai.Client(api_key=api_key)
-    
-    response = client.chat.completions.create(
-        model=settings.openai_model_name,
-        messages=[
-            {"role": "system", "content": SUMMARIZATION_SYSTEM_PROMPT},
-            {"role": "user", "content": user_content}
-        ],
-        temperature=0.0
-    )
-    
-    draft_answer = response.choices[0].message.content
 
-    return {
+    if not budget.can_call(state):
+        return _timed_out(degradations)
+    raise_if_cancelled(runtime)
+    started = time.perf_counter()
+    try:
+        response = get_chat_provider().complete(
+            model=model,
+            messages=[
+                {"role": "system", "content": SUMMARIZATION_SYSTEM_PROMPT},
+                {"role": "user", "content": user_content}
+            ],
+            temperature=0.0,
+            timeout=budget.call_timeout(state),
+            cancel_token=cancel_token(runtime),
+        )
+    except openai.APITimeoutError:
+        return _timed_out(degradations)
+    finally:
+        budget.record_llm_latency(time.perf_counter() - started)
+
+    draft_answer = response.content
+
+    result: QAState = {
         "draft_answer": str(draft_answer),
+        "context": context,
+        "citations": citations,
+        "degradations": degradations,
     }
+    if state.get("verify") is False:
+        # The router decided this draft is final.
+        result.update(answer=str(draft_answer), verified=False)
+    return result
 
 
-def verification_node(state: QAState) -> QAState:
-    """Verification Node: verifies and corrects the draft answer using OpenAI directly.
+def verification_node(state: QAState, runtime: Runtime[QARuntimeContext]) -> QAState:
+    """Verification Node: verifies and corrects the draft answer via the LLM provider.
 
     This node:
     - Constructs a prompt with verification instructions.
-    - Invokes OpenAI API directly.
+    - Invokes the configured LLM provider directly.
     - Stores the final verified answer in `state["answer"]`.
+    - Skips the call and returns the draft, marked unverified, when the
+      remaining latency budget cannot cover another LLM call.
     """
     question = state["question"]
     context = state.get("context", "")
     draft_answer = state.get("draft_answer", "")
 
+    skipped: QAState = {
+        "answer": str(draft_answer),
+        "verified": False,
+        "degradations": [budget.SKIPPED_VERIFICATION],
+    }
+    remaining = budget.remaining_seconds(state)
+    if remaining is not None and remaining < budget.estimated_llm_seconds():
+        return skipped
+
     user_content = f"""Question: {question}
 
 Context:
@@ -117,23 +304,98 @@ Draft Answer:
 
 Please verify and correct the draft answer, removing any unsupported claims."""
 
-    # Instantiate Settings directly
-    settings = Settings()
-    api_key = settings.openai_api_key.strip() if settings.openai_api_key else ""
-    
-    client = openai.Client(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model=settings.openai_model_name,
-        messages=[
-            {"role": "system", "content": VERIFICATION_SYSTEM_PROMPT},
-            {"role": "user", "content": user_content}
-        ],
-        temperature=0.0
-    )
-    
-    answer = response.choices[0].message.content
+    settings = get_settings()
+
+    raise_if_cancelled(runtime)
+    started = time.perf_counter()
+    try:
+        response = get_chat_provider().complete(
+            model=settings.openai_model_name,
+            messages=[
+                {"role": "system", "content": VERIFICATION_SYSTEM_PROMPT},
+                {"role": "user", "content": user_content}
+            ],
+            temperature=0.0,
+            timeout=budget.call_timeout(state),
+            cancel_token=cancel_token(runtime),
+        )
+    except openai.APITimeoutError:
+        metrics.increment("qa_llm_timeouts_total", stage="verification")
+        return skipped
+    finally:
+        budget.record_llm_latency(time.perf_counter() - started)
+
+    answer = response.content
 
     return {
         "answer": str(answer),
+        "verified": True,
+    }
+
+
+def fused_answer_node(state: QAState, runtime: Runtime[QARuntimeContext]) -> QAState:
+    """Fused Answer Node: answers and grounds in one structured LLM call.
+
+    This node:
+    - Asks for a JSON-schema response holding the answer and its claims,
+      each with supporting [C#] IDs and verbatim quotes.
+    - Checks every quote against its cited chunks locally and drops the
+      claims that fail, instead of making a second verification call.
+    - Stores the checked answer in `state["answer"]` and the surviving
+      claims in `state["claims"]`.
+    - Under a tight latency budget, trims the context and/or answers with
+      the fast model.
+    """
+    question = state["question"]
+    context = state.get("context")
+    citations = state.get("citations")
+
+    settings = get_settings()
+
+    model = state.get("model") or settings.openai_model_name
+    degradations: List[str] = []
+    remaining = budget.remaining_seconds(state)
+    if remaining is not None and remaining < budget.estimated_llm_seconds():
+        if context:
+            context, citations = budget.trim_context(
+                context, citations, settings.budget_trimmed_chunks
+            )
+            degradations.append(budget.TRIMMED_CONTEXT)
+        model = settings.openai_fast_model_name
+        degradations.append(budget.FAST_MODEL)
+
+    if not budget.can_call(state):
+        return _timed_out(degradations, stage="fused_answer")
+    raise_if_cancelled(runtime)
+    started = time.perf_counter()
+    try:
+        response = get_chat_provider().complete(
+            model=model,
+            messages=[
+                {"role": "system", "content": FUSED_ANSWER_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Question: {question}\n\nContext:\n{context}"},
+            ],
+            temperature=0.0,
+            timeout=budget.call_timeout(state),
+            cancel_token=cancel_token(runtime),
+            response_format=GROUNDED_ANSWER_FORMAT,
+        )
+    except openai.APITimeoutError:
+        return _timed_out(degradations, stage="fused_answer")
+    finally:
+        budget.record_llm_latency(time.perf_counter() - started)
+
+    draft_answer, claims = parse_grounded_answer(response.content)
+    kept, dropped = check_claims(claims, context or "")
+    metrics.increment("qa_fused_claims_total", len(kept), outcome="kept")
+    metrics.increment("qa_fused_claims_total", len(dropped), outcome="dropped")
+
+    return {
+        "draft_answer": draft_answer,
+        "answer": render_answer(kept),
+        "claims": kept,
+        "context": context,
+        "citations": citations,
+        "verified": True,
+        "degradations": degradations,
     }
@@ -0,0 +1,108 @@
+"""Per-request latency budget and the planned degradation ladder.
+
+A request carries an absolute `deadline` (epoch seconds) in graph state.
+Each node compares the remaining time with what its remaining work is
+expected to cost and degrades in fixed steps:
+
+1. `reduced_k`            retrieve fewer chunks
+2. `trimmed_context`      send only the top-ranked chunks to the LLM
+3. `fast_model`           draft with `settings.openai_fast_model_name`
+4. `skipped_verification` return the draft answer, marked unverified
+
+LLM calls get the remaining time as a hard timeout (no client retries).
+If a call still times out, or no time is left to start one, the node
+degrades instead of failing: verification returns the draft, and an
+answering node returns `TIMED_OUT_ANSWER` marked `timed_out`. Any other
+node failure after the deadline is raised as `DeadlineExceeded`, which is
+never retried.
+
+LLM call cost is estimated from an exponentially weighted moving average of
+observed call latencies, so the ladder tightens automatically when the
+provider slows down.
+"""
+
+import re
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from ..config import get_settings
+
+REDUCED_K = "reduced_k"
+TRIMMED_CONTEXT = "trimmed_context"
+FAST_MODEL = "fast_model"
+SKIPPED_VERIFICATION = "skipped_verification"
+TIMED_OUT = "timed_out"
+
+TIMED_OUT_ANSWER = "The answer could not be produced within the latency budget."
+
+# Weight of the newest observation in the LLM latency moving average.
+_EWMA_ALPHA = 0.2
+# Do not start an LLM call with less time than this left.
+_MIN_CALL_SECONDS = 0.5
+
+_CHUNK_START_RE = re.compile(r"^(?=\[C\d+\] )", re.MULTILINE)
+
+_lock = threading.Lock()
+_llm_latency_ewma: float | None = None
+
+
+class DeadlineExceeded(Exception):
+    """A node failed after the request's deadline had passed."""
+
+
+def remaining_seconds(state: Dict[str, Any]) -> float | None:
+    """Seconds left before the request deadline, or None if unbounded."""
+    deadline = state.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def record_llm_latency(seconds: float) -> None:
+    """Feed an observed LLM call duration into the moving average."""
+    global _llm_latency_ewma
+    with _lock:
+        if _llm_latency_ewma is None:
+            _llm_latency_ewma = seconds
+        else:
+            _llm_latency_ewma = _EWMA_ALPHA * seconds + (1 - _EWMA_ALPHA) * _llm_latency_ewma
+
+
+def estimated_llm_seconds() -> float:
+    """Expected duration of one full-context LLM call."""
+    with _lock:
+        observed = _llm_latency_ewma
+    return observed if observed is not None else get_settings().llm_call_estimate_seconds
+
+
+def can_call(state: Dict[str, Any]) -> bool:
+    """Whether enough time is left to start an LLM call at all."""
+    remaining = remaining_seconds(state)
+    return remaining is None or remaining >= _MIN_CALL_SECONDS
+
+
+def call_timeout(state: Dict[str, Any]) -> float | None:
+    """Hard timeout for an LLM call: the time left before the deadline."""
+    remaining = remaining_seconds(state)
+    if remaining is None:
+        return None
+    return max(remaining, 0.0)
+
+
+def deadline_passed(state: Dict[str, Any]) -> bool:
+    """Whether the request's deadline has already passed."""
+    remaining = remaining_seconds(state)
+    return remaining is not None and remaining <= 0
+
+
+def trim_context(
+    context: str, citations: Dict[str, Any] | None, keep: int
+) -> Tuple[str, Dict[str, Any]]:
+    """Keep only the first `keep` serialized chunks (highest ranked first)."""
+    parts = [part.strip() for part in _CHUNK_START_RE.split(context) if part.strip()]
+    kept = parts[:keep]
+    kept_ids = {part[1 : part.index("]")] for part in kept}
+    return "\n\n".join(kept), {
+        cid: meta for cid, meta in (citations or {}).items() if cid in kept_ids
+    }
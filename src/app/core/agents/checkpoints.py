@@ -0,0 +1,119 @@
+"""Stage checkpoints and per-node retries for the QA graph.
+
+With a checkpointer configured, LangGraph saves the graph state after every
+node under the request's thread ID. Only requests with a client
+`request_id` are checkpointed, since nothing else could ever resume. A
+request that fails part-way (e.g. a transient provider error in
+verification) keeps its checkpoint, and a client retry with the same
+`request_id` resumes at the failed stage with the already-computed
+`context` and `draft_answer` instead of paying for retrieval and
+summarization again.
+
+Backends are selected with `settings.checkpoint_backend`:
+
+- `"memory"`: in-process `InMemorySaver` (default).
+- `"sqlite"`: `SqliteSaver` at `settings.checkpoint_path`, which survives
+  restarts. Requires the optional `langgraph-checkpoint-sqlite` package.
+- `"none"`: no checkpointing.
+
+Successful threads are deleted immediately; failed ones are kept for
+resumption, bounded to `settings.checkpoint_max_failed_threads`.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+import openai
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import RetryPolicy
+
+from ..concurrency import OperationCancelled
+from ..config import get_settings
+from ..metrics import metrics
+from .budget import DeadlineExceeded
+
+# LangGraph's default policy (retry on anything but programming and OS
+# errors), taken from the public RetryPolicy default.
+_default_retry_on = RetryPolicy().retry_on
+
+
+@lru_cache(maxsize=1)
+def get_checkpointer() -> BaseCheckpointSaver | None:
+    """Get the configured checkpointer (singleton via LRU cache)."""
+    settings = get_settings()
+    backend = settings.checkpoint_backend
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemorySaver()
+    if backend == "sqlite":
+        try:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError as exc:
+            raise ImportError(
+                "checkpoint_backend='sqlite' requires the optional "
+                "'langgraph-checkpoint-sqlite' package "
+                "(pip install 'class-12[checkpoint-sqlite]')."
+            ) from exc
+        path = Path(settings.checkpoint_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Graph runs execute on worker threads, so share one connection.
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        return SqliteSaver(conn)
+    raise ValueError(f"Unknown checkpoint_backend '{backend}'")
+
+
+def should_retry(exc: Exception) -> bool:
+    """Decide whether a failed node attempt is worth repeating in-process.
+
+    Cancellation and failures after the request deadline are never
+    retried. OpenAI-protocol errors are retried when they are transient
+    (connection problems, timeouts, 429 and 5xx); client errors such as
+    400/401 are not. Everything else follows LangGraph's default policy.
+    """
+    if isinstance(exc, (OperationCancelled, DeadlineExceeded)):
+        return False
+    if isinstance(exc, openai.APIConnectionError):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return _default_retry_on(exc)
+
+
+def node_retry_policy() -> RetryPolicy:
+    """Retry policy applied to every QA graph node."""
+    settings = get_settings()
+    return RetryPolicy(
+        initial_interval=settings.node_retry_initial_interval_seconds,
+        max_attempts=settings.node_max_attempts,
+        retry_on=should_retry,
+    )
+
+
+_lock = threading.Lock()
+_failed_threads: "OrderedDict[str, None]" = OrderedDict()
+
+
+def retain_failed_thread(checkpointer: BaseCheckpointSaver, thread_id: str) -> None:
+    """Keep a failed thread for resumption, evicting the oldest beyond the cap."""
+    with _lock:
+        _failed_threads[thread_id] = None
+        _failed_threads.move_to_end(thread_id)
+        evicted = []
+        while len(_failed_threads) > get_settings().checkpoint_max_failed_threads:
+            evicted.append(_failed_threads.popitem(last=False)[0])
+        metrics.set_gauge("qa_checkpoint_failed_threads", len(_failed_threads))
+    for old_thread_id in evicted:
+        checkpointer.delete_thread(old_thread_id)
+
+
+def release_thread(checkpointer: BaseCheckpointSaver, thread_id: str) -> None:
+    """Delete a thread's checkpoints once it no longer needs resuming."""
+    with _lock:
+        _failed_threads.pop(thread_id, None)
+        metrics.set_gauge("qa_checkpoint_failed_threads", len(_failed_threads))
+    checkpointer.delete_thread(thread_id)
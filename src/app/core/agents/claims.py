@@ -0,0 +1,129 @@
+"""Structured claims for the fused answer-and-verify mode.
+
+In the fused graph the answering call returns JSON (enforced with a JSON
+schema) instead of prose: the answer plus a list of claims, each with the
+[C#] IDs that support it and short verbatim quotes from those chunks.
+Verification then happens locally instead of in a second LLM call: a claim
+is kept only if every quote appears in the text of one of its cited chunks
+(after whitespace, case and quote-character normalization). The answer
+returned to the client is always rebuilt from the kept claims, so no text
+the check did not cover reaches it.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+CANNOT_ANSWER = "I cannot answer based on the available document."
+
+# OpenAI `response_format` for strict structured output.
+GROUNDED_ANSWER_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "grounded_answer",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "additionalProperties": False,
+            "required": ["answer", "claims"],
+            "properties": {
+                "answer": {"type": "string"},
+                "claims": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "required": ["text", "citations", "quotes"],
+                        "properties": {
+                            "text": {"type": "string"},
+                            "citations": {"type": "array", "items": {"type": "string"}},
+                            "quotes": {"type": "array", "items": {"type": "string"}},
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+_CHUNK_HEADER_RE = re.compile(r"^\[(C\d+)\][^\n]*:\n", re.MULTILINE)
+_QUOTE_CHARS = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"'})
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.translate(_QUOTE_CHARS).casefold().split())
+
+
+def chunk_texts(context: str) -> Dict[str, str]:
+    """Map [C#] IDs to their normalized chunk text in a serialized context."""
+    headers = list(_CHUNK_HEADER_RE.finditer(context or ""))
+    texts: Dict[str, str] = {}
+    for header, following in zip(headers, headers[1:] + [None]):
+        end = following.start() if following is not None else len(context)
+        texts[header.group(1)] = _normalize(context[header.end() : end])
+    return texts
+
+
+def parse_grounded_answer(content: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Parse the model's JSON into (answer, claims); malformed output has no claims."""
+    try:
+        payload = json.loads(content or "{}")
+    except json.JSONDecodeError:
+        return "", []
+    if not isinstance(payload, dict):
+        return "", []
+    claims = [
+        {
+            "text": str(claim.get("text", "")).strip(),
+            "citations": [str(c).strip("[] ") for c in claim.get("citations") or []],
+            "quotes": [str(q) for q in claim.get("quotes") or []],
+        }
+        for claim in payload.get("claims") or []
+        if isinstance(claim, dict)
+    ]
+    return str(payload.get("answer", "")).strip(), claims
+
+
+def check_claims(
+    claims: List[Dict[str, Any]], context: str
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split claims into (kept, dropped) by checking their quotes locally.
+
+    Citations of chunks that are not in the context are removed first. A
+    claim is kept when it still has a citation and at least one quote, and
+    every quote occurs in one of its cited chunks.
+    """
+    texts = chunk_texts(context)
+    kept: List[Dict[str, Any]] = []
+    dropped: List[Dict[str, Any]] = []
+    for claim in claims:
+        citations = [cid for cid in dict.fromkeys(claim["citations"]) if cid in texts]
+        quotes = [_normalize(q) for q in claim["quotes"] if q.strip()]
+        supported = (
+            claim["text"]
+            and citations
+            and quotes
+            and all(any(q in texts[cid] for cid in citations) for q in quotes)
+        )
+        if supported:
+            kept.append({**claim, "citations": citations})
+        else:
+            dropped.append(claim)
+    return kept, dropped
+
+
+def render_answer(kept: List[Dict[str, Any]]) -> str:
+    """Final answer text: the kept claims, each followed by its citations.
+
+    The model's own prose is never returned, since it may state more than
+    its claims do and only the claims were checked.
+    """
+    if not kept:
+        return CANNOT_ANSWER
+    sentences = []
+    for claim in kept:
+        text = claim["text"].rstrip()
+        end = text[-1] if text[-1] in ".!?" else "."
+        body = text[:-1] if text[-1] in ".!?" else text
+        sentences.append(f"{body} {''.join(f'[{cid}]' for cid in claim['citations'])}{end}")
+    return " ".join(sentences)
@@ -1,49 +1,159 @@
 """LangGraph orchestration for the linear multi-agent QA flow."""
 
+import inspect
+import time
+import uuid
 from functools import lru_cache
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List
 
 from langgraph.constants import END, START
 from langgraph.graph import StateGraph
+from langgraph.runtime import Runtime
 
-from .agents import retrieval_node, summarization_node, verification_node
+from ..concurrency import CancelToken, OperationCancelled
+from ..config import get_settings
+from ..metrics import metrics
+from . import budget
+from .agents import (
+    fused_answer_node,
+    retrieval_node,
+    routing_node,
+    summarization_node,
+    verification_node,
+)
+from .checkpoints import (
+    get_checkpointer,
+    node_retry_policy,
+    release_thread,
+    retain_failed_thread,
+)
+from .runtime import QARuntimeContext
 from .state import QAState
 
+# Graph variants: retrieval -> routing, then either summarization ->
+# verification (two LLM calls) or one fused structured answer call.
+STAGED = "staged"
+FUSED = "fused"
+QA_GRAPH_MODES = (STAGED, FUSED)
 
-def create_qa_graph() -> Any:
-    """Create and compile the linear multi-agent QA graph.
 
-    The graph executes in order:
+def _timed(stage: str, node: Callable[..., QAState]) -> Callable[..., QAState]:
+    """Wrap a node to record its wall-clock time in state and metrics.
+
+    Failures after the request deadline are re-raised as
+    `budget.DeadlineExceeded`, which the retry policy does not retry.
+    """
+
+    takes_runtime = "runtime" in inspect.signature(node).parameters
+
+    def run(state: QAState, runtime: Runtime[QARuntimeContext]) -> QAState:
+        started = time.perf_counter()
+        try:
+            if takes_runtime:
+                result = node(state, runtime)
+            else:
+                result = node(state)
+        except OperationCancelled:
+            raise
+        except Exception as exc:
+            # A retry could only overrun the deadline further.
+            if budget.deadline_passed(state):
+                raise budget.DeadlineExceeded(f"{stage} failed after the deadline") from exc
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.observe("qa_stage_seconds", elapsed, stage=stage)
+        return {**result, "stage_timings": {stage: elapsed}}
+
+    run.__name__ = node.__name__
+    return run
+
+
+def _after_summarization(state: QAState) -> str:
+    """Skip verification when the router (or the budget) already finalized."""
+    return END if state.get("answer") is not None else "verification"
+
+
+def create_qa_graph(mode: str = STAGED, checkpointed: bool = True) -> Any:
+    """Create and compile the multi-agent QA graph.
+
+    The staged graph executes in order:
     1. Retrieval Agent: gathers context from vector store
-    2. Summarization Agent: generates draft answer from context
-    3. Verification Agent: verifies and corrects the answer
+    2. Router: picks the fast or strong model from cheap signals
+    3. Summarization Agent: generates draft answer from context
+    4. Verification Agent: verifies and corrects the answer (skipped when
+       the router marks the draft as final)
+
+    The fused graph replaces 3 and 4 with a single structured call whose
+    claims are quote-checked locally (see `fused_answer_node`).
+
+    Every node retries transient failures in-process, and state is
+    checkpointed after each node when a checkpointer is configured.
+
+    Args:
+        mode: `"staged"` or `"fused"`.
+        checkpointed: Compile with the configured checkpointer. Requests
+            without a `request_id` can never be resumed, so they run on a
+            graph compiled without one and skip the per-node serialization.
 
     Returns:
         Compiled graph ready for execution.
     """
-    builder = StateGraph(QAState)
+    if mode not in QA_GRAPH_MODES:
+        raise ValueError(f"Unknown QA graph mode '{mode}'. Available: {list(QA_GRAPH_MODES)}")
+    builder = StateGraph(QAState, context_schema=QARuntimeContext)
+    retry = node_retry_policy()
+    checkpointer = get_checkpointer() if checkpointed else None
 
     # Add nodes for each agent
-    builder.add_node("retrieval", retrieval_node)
-    builder.add_node("summarization", summarization_node)
-    builder.add_node("verification", verification_node)
-
-    # Define linear flow: START -> retrieval -> summarization -> verification -> END
+    builder.add_node("retrieval", _timed("retrieval", retrieval_node), retry_policy=retry)
+    builder.add_node("routing", _timed("routing", routing_node), retry_policy=retry)
     builder.add_edge(START, "retrieval")
-    builder.add_edge("retrieval", "summarization")
-    builder.add_edge("summarization", "verification")
+    builder.add_edge("retrieval", "routing")
+
+    if mode == FUSED:
+        # START -> retrieval -> routing -> fused_answer -> END
+        builder.add_node(
+            "fused_answer", _timed("fused_answer", fused_answer_node), retry_policy=retry
+        )
+        builder.add_edge("routing", "fused_answer")
+        builder.add_edge("fused_answer", END)
+        return builder.compile(checkpointer=checkpointer)
+
+    builder.add_node(
+        "summarization", _timed("summarization", summarization_node), retry_policy=retry
+    )
+    builder.add_node(
+        "verification", _timed("verification", verification_node), retry_policy=retry
+    )
+
+    # START -> retrieval -> routing -> summarization -> [verification] -> END
+    builder.add_edge("routing", "summarization")
+    builder.add_conditional_edges(
+        "summarization", _after_summarization, ["verification", END]
+    )
     builder.add_edge("verification", END)
 
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
 
 
-@lru_cache(maxsize=1)
-def get_qa_graph() -> Any:
-    """Get the compiled QA graph instance (singleton via LRU cache)."""
-    return create_qa_graph()
+@lru_cache(maxsize=2 * len(QA_GRAPH_MODES))
+def get_qa_graph(mode: str = STAGED, checkpointed: bool = True) -> Any:
+    """Get the compiled QA graph for a mode (one instance per variant via LRU cache)."""
+    return create_qa_graph(mode, checkpointed)
 
 
-def run_qa_flow(question: str) -> Dict[str, Any]:
+def run_qa_flow(
+    question: str,
+    session_context: Dict[str, Any] | None = None,
+    cancel_token: CancelToken | None = None,
+    deadline: float | None = None,
+    request_id: str | None = None,
+    collection: str | None = None,
+    metadata_filter: Dict[str, Any] | None = None,
+    mode: str | None = None,
+    query_vector: List[float] | None = None,
+) -> Dict[str, Any]:
     """Run the complete multi-agent QA flow for a question.
 
     This is the main entry point for the QA system. It:
@@ -53,22 +163,99 @@ def run_qa_flow(question: str) -> Dict[str, Any]:
 
     Args:
         question: The user's question about the vector databases paper.
+        session_context: Chunk set carried over from earlier turns of a
+            conversational session, or None for a stateless request.
+        cancel_token: Optional cancellation token. Nodes check it before
+            every vector query and LLM call and raise `OperationCancelled`
+            once it is set.
+        deadline: Absolute latency deadline (epoch seconds). Nodes degrade
+            in planned steps as it approaches; None means unbounded.
+        request_id: Client-chosen ID used as the checkpoint thread. If an
+            earlier run with this ID failed part-way on the same question,
+            the graph resumes at the failed stage instead of starting over.
+        collection: Collection (vector namespace) to answer from; None for
+            the default collection.
+        metadata_filter: Metadata filter pushed down to the vector query
+            (see `retrieval.collections.build_metadata_filter`).
+        mode: Graph variant, `"staged"` or `"fused"`; defaults to
+            `settings.qa_graph_mode`.
+        query_vector: Embedding of `question` the caller already computed;
+            retrieval uses it instead of embedding the question again.
 
     Returns:
         Dictionary with keys:
         - `answer`: Final verified answer
         - `draft_answer`: Initial draft answer from summarization agent
         - `context`: Retrieved context from vector store
+        - `session_context`: Updated chunk set (session requests only)
+        - `degradations`: Budget degradations applied, in order
+        - `verified`: False when verification was skipped
+        - `route`: Routing decision (`easy`/`hard`), if the router ran
+        - `claims`: Quote-checked claims (fused mode only)
+        - `stage_timings`: Seconds spent in each node
     """
-    graph = get_qa_graph()
+    mode = mode or get_settings().qa_graph_mode
+    # Only a client-supplied ID can resume a thread, so anything else runs
+    # without checkpoints.
+    checkpointer = get_checkpointer() if request_id else None
+    graph = get_qa_graph(mode, checkpointed=checkpointer is not None)
 
     initial_state: QAState = {
         "question": question,
         "context": None,
         "draft_answer": None,
         "answer": None,
+        "session_context": session_context,
+        "collection": collection,
+        "metadata_filter": metadata_filter,
+        "deadline": deadline,
+        "degradations": [],
+        "verified": None,
+        "claims": None,
+        "route": None,
+        "model": None,
+        "verify": None,
+        "stage_timings": {},
     }
 
-    final_state = graph.invoke(initial_state)
+    # Modes have different nodes, so they never share a checkpoint thread.
+    thread_id = f"{mode}:{request_id}" if request_id else uuid.uuid4().hex
+    config = {"configurable": {"thread_id": thread_id}}
+    graph_input: QAState | None = initial_state
+
+    if checkpointer is not None:
+        snapshot = graph.get_state(config)
+        same_request = (
+            snapshot.values.get("question") == question
+            and snapshot.values.get("collection") == collection
+            and snapshot.values.get("metadata_filter") == metadata_filter
+        )
+        if snapshot.next and same_request:
+            # Resume at the failed stage; only the deadline is refreshed.
+            graph.update_state(config, {"deadline": deadline})
+            graph_input = None
+            metrics.increment("qa_checkpoint_resumed_total", stage=snapshot.next[0])
+        elif snapshot.values:
+            release_thread(checkpointer, thread_id)
+
+    started = time.perf_counter()
+    try:
+        final_state = graph.invoke(
+            graph_input,
+            config,
+            context=QARuntimeContext(cancel_token=cancel_token, query_vector=query_vector),
+        )
+    except BaseException:
+        if checkpointer is not None:
+            retain_failed_thread(checkpointer, thread_id)
+        raise
+    if checkpointer is not None:
+        release_thread(checkpointer, thread_id)
+    metrics.observe(
+        "qa_latency_seconds",
+        time.perf_counter() - started,
+        route=final_state.get("route") or "unrouted",
+        mode=mode,
+    )
 
     return final_state
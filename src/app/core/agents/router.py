@@ -0,0 +1,84 @@
+"""Difficulty-based routing between the fast and the strong model.
+
+The router runs after retrieval and classifies each request from cheap
+signals only (no LLM call):
+
+- retrieval similarity: the best chunk score, when the vector store
+  returns scores;
+- question length, in words;
+- how many distinct source documents the retrieved chunks come from;
+- whether the question asks for comparison, explanation or aggregation.
+
+Easy questions (short, single-source lookups with a confident top hit) go
+to `settings.openai_fast_model_name` and, unless `router_verify_easy` is
+set, skip verification. Everything else goes to the strong model and is
+verified. Routing is off unless `router_enabled` is set, since it changes
+answer quality for the questions it classifies as easy.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from ..config import Settings
+
+EASY = "easy"
+HARD = "hard"
+
+_COMPLEX_QUESTION_RE = re.compile(
+    r"\b(compare|comparison|versus|vs\.?|why|explain|how does|how do|trend|"
+    r"difference|differences|change|changed|summar\w*|overall|analy\w*)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Outcome of routing one request."""
+
+    route: str
+    model: str
+    verify: bool
+    reasons: List[str]
+
+
+def classify_question(
+    question: str, citations: Dict[str, Any] | None, settings: Settings
+) -> RouteDecision:
+    """Route a request to the fast or the strong model.
+
+    Args:
+        question: The user's question.
+        citations: Citation map produced by retrieval (`source` and, when
+            available, `score` per chunk).
+        settings: Application settings with router thresholds.
+
+    Returns:
+        The routing decision, including the reasons a request was sent to
+        the strong model (empty for easy requests).
+    """
+    citations = citations or {}
+    reasons: List[str] = []
+
+    if not citations:
+        reasons.append("no_context")
+
+    if len(question.split()) > settings.router_max_easy_words:
+        reasons.append("long_question")
+
+    sources = {meta.get("source") for meta in citations.values()}
+    if len(sources) > settings.router_max_easy_sources:
+        reasons.append("multiple_sources")
+
+    scores = [meta["score"] for meta in citations.values() if meta.get("score") is not None]
+    if scores and max(scores) < settings.router_min_easy_score:
+        reasons.append("low_similarity")
+
+    if _COMPLEX_QUESTION_RE.search(question):
+        reasons.append("complex_question")
+
+    if reasons:
+        return RouteDecision(HARD, settings.openai_model_name, True, reasons)
+    return RouteDecision(
+        EASY, settings.openai_fast_model_name, settings.router_verify_easy, []
+    )
@@ -0,0 +1,54 @@
+"""Per-invocation runtime context for the QA graph.
+
+Values here are supplied by the caller on each `graph.invoke` and are not
+part of the graph state (they are not serializable and must not be
+checkpointed).
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+from langgraph.runtime import Runtime
+
+from ..concurrency import CancelToken
+
+
+@dataclass
+class QARuntimeContext:
+    """Runtime context passed to every node via `Runtime.context`."""
+
+    cancel_token: CancelToken | None = None
+    # Embedding of the question computed before the graph ran (e.g. for the
+    # precomputed Q/A lookup), so retrieval does not embed it again.
+    query_vector: List[float] | None = None
+
+
+def raise_if_cancelled(runtime: Runtime[QARuntimeContext] | None) -> None:
+    """Abort the graph if every caller waiting on it has gone away.
+
+    Nodes call this before each expensive step (vector query, LLM call) so a
+    cancelled request stops issuing provider calls at the next boundary.
+    """
+    if runtime is None or runtime.context is None:
+        return
+    token = runtime.context.cancel_token
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def cancel_token(runtime: Runtime[QARuntimeContext] | None) -> CancelToken | None:
+    """The invocation's cancel token, if any.
+
+    Nodes pass it to provider calls so an in-flight LLM request is aborted,
+    not just skipped at the next node boundary, once every caller is gone.
+    """
+    if runtime is None or runtime.context is None:
+        return None
+    return runtime.context.cancel_token
+
+
+def query_vector(runtime: Runtime[QARuntimeContext] | None) -> List[float] | None:
+    """The question's precomputed embedding, if the caller supplied one."""
+    if runtime is None or runtime.context is None:
+        return None
+    return runtime.context.query_vector
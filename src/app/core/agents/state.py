@@ -1,6 +1,12 @@
 """LangGraph state schema for the multi-agent QA flow."""
 
-from typing import TypedDict
+import operator
+from typing import Annotated, Any, TypedDict
+
+
+def _merge_dicts(left: dict | None, right: dict | None) -> dict:
+    """Reducer that merges per-node dict updates into the existing value."""
+    return {**(left or {}), **(right or {})}
 
 
 class QAState(TypedDict):
@@ -8,8 +14,26 @@ class QAState(TypedDict):
 
     The state flows through three agents:
     1. Retrieval Agent: populates `context` from `question`
-    2. Summarization Agent: generates `draft_answer` from `question` + `context`
-    3. Verification Agent: produces final `answer` from `question` + `context` + `draft_answer`
+    2. Router: picks `route`, `model` and whether to `verify` from cheap signals
+    3. Summarization Agent: generates `draft_answer` from `question` + `context`
+    4. Verification Agent: produces final `answer` from `question` + `context` + `draft_answer`
+
+    `session_context` is only set for conversational requests; it carries the
+    session's chunk set (see `retrieval.session_chunks`) in and out of the
+    graph.
+
+    `deadline` is the absolute (epoch seconds) latency deadline, or None for
+    an unbounded request; nodes append the degradations they apply to
+    `degradations`, and `verified` is False when verification was skipped.
+
+    `collection` names the collection (vector namespace) to search and
+    `metadata_filter` is the filter pushed down to the vector query; both
+    are None for an unscoped request.
+
+    `claims` is only set by the fused graph: the answer's claims that
+    passed the local quote check (see `agents.claims`).
+
+    `stage_timings` maps node name to wall-clock seconds spent in it.
     """
 
     question: str
@@ -17,3 +41,14 @@ class QAState(TypedDict):
     citations: dict[str, dict] | None
     draft_answer: str | None
     answer: str | None
+    session_context: dict[str, Any] | None
+    collection: str | None
+    metadata_filter: dict[str, Any] | None
+    deadline: float | None
+    degradations: Annotated[list[str], operator.add]
+    verified: bool | None
+    claims: list[dict[str, Any]] | None
+    route: str | None
+    model: str | None
+    verify: bool | None
+    stage_timings: Annotated[dict[str, float], _merge_dicts]
@@ -2,28 +2,84 @@
 
 from langchain_core.tools import tool
 
-from ..retrieval.vector_store import retrieve
+from ..config import get_settings
+from ..retrieval.dynamic_k import select_dynamic_k
+from ..retrieval.hierarchy import CHUNK, retrieve_summaries, select_levels
+from ..retrieval.vector_store import retrieve_with_scores
 from ..retrieval.serialization import serialize_chunks_with_ids
 
 
 @tool(response_format="content_and_artifact")
-def retrieval_tool(query: str):
+def retrieval_tool(
+    query: str,
+    k: int | None = None,
+    collection: str | None = None,
+    metadata_filter: dict | None = None,
+    query_vector: list[float] | None = None,
+):
     """Search the vector database for relevant document chunks.
 
-    This tool retrieves the top 4 most relevant chunks from the Pinecone
-    vector store based on the query. The chunks are formatted with stable
-    IDs [C1], [C2] for citation.
+    This tool over-fetches scored candidates from the Pinecone vector store
+    and keeps between `retrieval_min_k` and `k` of them, cutting off at the
+    configured score threshold or at a sharp relative drop between
+    consecutive scores. The chunks are formatted with stable IDs [C1], [C2]
+    for citation.
+
+    When the hierarchical summary index is enabled, broad questions search
+    page/section/document summaries instead of raw chunks, falling back to
+    chunks for collections that have no summaries.
 
     Args:
         query: The search query string to find relevant document chunks.
+        k: Maximum number of chunks to keep (defaults to `retrieval_k`).
+        collection: Collection (namespace) to search; None for the default.
+        metadata_filter: Metadata filter pushed down to the vector query.
+        query_vector: Precomputed embedding of `query` (optional).
 
     Returns:
         Tuple of (serialized_content, artifact) where:
         - serialized_content: Formatted string with chunks and [ID] tags.
         - artifact: Dictionary containing 'docs' (raw objects) and 'citations' (metadata map).
     """
-    # Retrieve documents from vector store
-    docs = retrieve(query, k=4)
+    settings = get_settings()
+    max_k = k if k is not None else settings.retrieval_k
+
+    # Over-fetch scored candidates, then cut with the dynamic-k policy
+    levels = select_levels(query) if settings.hierarchy_enabled else [CHUNK]
+    scored = []
+    if levels != [CHUNK]:
+        scored = retrieve_summaries(
+            query,
+            levels,
+            k=settings.summary_k,
+            collection=collection,
+            metadata_filter=metadata_filter,
+            query_vector=query_vector,
+        )
+        if scored:
+            max_k = min(max_k, settings.summary_k)
+    if not scored:
+        # Collections indexed before (or without) the hierarchy have no
+        # summaries, so broad questions fall back to raw chunks.
+        scored = retrieve_with_scores(
+            query,
+            k=max(settings.retrieval_fetch_k, max_k),
+            collection=collection,
+            metadata_filter=metadata_filter,
+            query_vector=query_vector,
+        )
+    kept = select_dynamic_k(
+        scored,
+        min_k=min(settings.retrieval_min_k, max_k),
+        max_k=max_k,
+        score_threshold=settings.retrieval_score_threshold,
+        max_relative_drop=settings.retrieval_max_relative_drop,
+    )
+
+    docs = []
+    for doc, score in kept:
+        doc.metadata["score"] = float(score)
+        docs.append(doc)
 
     # Serialize chunks into formatted string with stable IDs
     context, citation_map = serialize_chunks_with_ids(docs)
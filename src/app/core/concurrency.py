@@ -0,0 +1,130 @@
+"""Concurrency primitives shared by the service layer and the agent graph.
+
+- `CancelToken`: a cooperative cancellation flag checked between stages.
+- `SingleFlight`: collapses concurrent calls with the same key into one
+  execution whose result (or exception) is delivered to every caller.
+"""
+
+import copy
+import threading
+from typing import Callable, Dict, Hashable, Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+class OperationCancelled(Exception):
+    """Raised when a caller gives up on (or cancels) an in-flight operation."""
+
+
+class CancelToken:
+    """Cooperative cancellation flag.
+
+    A token can be linked to several parent events; it reports cancelled only
+    once *every* parent is set. This is what lets one shared execution keep
+    running while at least one coalesced caller is still waiting for it.
+    """
+
+    def __init__(self, event: threading.Event | None = None) -> None:
+        self._lock = threading.Lock()
+        self._events: List[threading.Event | None] = [event]
+
+    def link(self, event: threading.Event | None) -> None:
+        """Attach another caller's cancel event (None means "never cancels")."""
+        with self._lock:
+            self._events.append(event)
+
+    def is_cancelled(self) -> bool:
+        with self._lock:
+            return all(event is not None and event.is_set() for event in self._events)
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled():
+            raise OperationCancelled("Operation cancelled by all callers.")
+
+
+class _Call(Generic[T]):
+    def __init__(self, token: CancelToken) -> None:
+        self.done = threading.Event()
+        self.token = token
+        self.result: T | None = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicate concurrent executions of the same keyed operation.
+
+    The first caller for a key (the leader) runs `fn` on its own (calling)
+    thread; callers arriving while it is in flight block until it finishes
+    and get the same result, or the same exception re-raised. When a result
+    is shared, every caller receives its own deep copy, so one caller
+    mutating its response cannot affect another's. Nothing is cached once
+    the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call[T]] = {}
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently executing."""
+        with self._lock:
+            return len(self._calls)
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[CancelToken], T],
+        cancel_event: threading.Event | None = None,
+        poll_interval: float = 0.05,
+    ) -> tuple[T, bool]:
+        """Run `fn` once per key across concurrent callers.
+
+        Args:
+            key: Identity of the operation; equal keys are coalesced.
+            fn: The operation. It receives a `CancelToken` that reports
+                cancelled only when every attached caller has cancelled.
+            cancel_event: Optional per-caller cancellation event. A waiting
+                caller whose event is set stops waiting immediately and
+                raises `OperationCancelled`; the shared execution continues
+                for the remaining callers.
+            poll_interval: How often waiters re-check `cancel_event`.
+
+        Returns:
+            Tuple of (result, shared) where `shared` is True if this caller
+            attached to an execution started by another caller.
+        """
+        shared_result = False
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call(CancelToken(cancel_event))
+                self._calls[key] = call
+            else:
+                call.token.link(cancel_event)
+                call.waiters += 1
+
+        if leader:
+            try:
+                call.result = fn(call.token)
+            except BaseException as exc:
+                call.error = exc
+            finally:
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                    # No caller can attach once the key is removed.
+                    shared_result = call.waiters > 0
+                call.done.set()
+        else:
+            timeout = poll_interval if cancel_event is not None else None
+            while not call.done.wait(timeout):
+                if cancel_event.is_set():
+                    raise OperationCancelled("Caller stopped waiting.")
+
+        if call.error is not None:
+            raise call.error
+        if leader and not shared_result:
+            return call.result, False
+        return copy.deepcopy(call.result), not leader
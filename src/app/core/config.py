@@ -2,27 +2,162 @@
 
 This module uses Pydantic Settings to load and validate environment variables
 for OpenAI models, Pinecone settings, and other system parameters.
+
+Setting `SETTINGS_PROFILE=<name>` layers `profiles/<name>.env` (e.g. one
+written by `autotune.py`) over `.env`; real environment variables still
+take precedence over both.
 """
 
+import os
+from pathlib import Path
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
+    # LLM / Embedding Provider Configuration
+    # "openai", "openai_compatible" (local llama.cpp/vLLM server) or "stub"
+    llm_provider: str = "openai"
+    llm_base_url: str | None = None
+    embedding_provider: str = "openai"
+    embedding_base_url: str | None = None
+    embedding_dimension: int = 3072
+
     # OpenAI Configuration
-    openai_api_key: str
+    # Optional so local and stub providers work without an OpenAI account.
+    openai_api_key: str = ""
     openai_model_name: str = "gpt-4o-mini"
+    openai_fast_model_name: str = "gpt-4.1-nano"
     openai_embedding_model_name: str = "text-embedding-3-large"
 
+    # Vector Store Configuration
+    # "pinecone" or "memory" (local numpy store persisted under local_store_dir)
+    vector_backend: str = "pinecone"
+    local_store_dir: str = "data/local_index"
+
+    # Chunk Store Configuration
+    # Keep chunk text and full metadata in a local SQLite store; vectors then
+    # carry only the chunk ID and small filterable fields.
+    chunk_store_enabled: bool = False
+    chunk_store_path: str = "data/chunks.sqlite"
+    chunk_store_cache_size: int = 2048
+
     # Pinecone Configuration
-    pinecone_api_key: str
-    pinecone_index_name: str
+    # Required when vector_backend is "pinecone".
+    pinecone_api_key: str = ""
+    pinecone_index_name: str = ""
     pinecone_host: str | None = None
 
 
     # Retrieval Configuration
+    # `retrieval_k` is the upper bound; dynamic k may send fewer chunks.
     retrieval_k: int = 4
+    retrieval_min_k: int = 1
+    retrieval_fetch_k: int = 10
+    retrieval_score_threshold: float | None = 0.3
+    retrieval_max_relative_drop: float | None = 0.15
+
+    # Chunking Configuration
+    chunker: str = "structured"
+    chunk_size_tokens: int = 256
+    chunk_overlap_tokens: int = 32
+
+    # Precomputed Q/A Index Configuration
+    qa_index_enabled: bool = False
+    qa_index_namespace: str = "precomputed-qa"
+    qa_index_min_score: float = 0.92
+    qa_index_questions_per_section: int = 5
+
+    # Hierarchical Summary Index Configuration
+    hierarchy_enabled: bool = False
+    summary_index_namespace: str = "summaries"
+    summary_k: int = 3
+    # Concurrent LLM calls while summarizing one level of the tree at ingest.
+    summary_max_concurrency: int = 8
+
+    # Session Configuration
+    session_ttl_seconds: float = 1800.0
+    session_max_sessions: int = 1000
+    session_max_chunks: int = 12
+    session_followup_k: int = 2
+    # Follow-ups whose embedding is at least this similar to an earlier
+    # question in the session re-use its chunks without a vector query.
+    session_reuse_min_similarity: float = 0.9
+
+    # Admission Control Configuration
+    qa_max_concurrency: int = 8
+    qa_max_queue: int = 32
+    qa_queue_timeout_seconds: float = 10.0
+    qa_retry_after_seconds: int = 5
+
+    # Latency Budget Configuration
+    qa_latency_budget_seconds: float | None = 20.0
+    llm_call_estimate_seconds: float = 4.0
+    retrieval_estimate_seconds: float = 1.0
+    budget_trimmed_chunks: int = 2
+
+    # Model Routing Configuration
+    # Opt-in: routed "easy" questions use the fast model and, unless
+    # router_verify_easy is set, skip verification.
+    router_enabled: bool = False
+    router_max_easy_words: int = 20
+    router_max_easy_sources: int = 1
+    router_min_easy_score: float = 0.5
+    router_verify_easy: bool = False
+    # Global switch; when False no request is verified.
+    verification_enabled: bool = True
+
+    # QA Graph Configuration
+    # "staged" (summarization + verification calls) or "fused" (one
+    # structured call, claims quote-checked locally); requests may override.
+    qa_graph_mode: str = "staged"
+
+    # Checkpoint Configuration
+    # "memory", "sqlite" (needs langgraph-checkpoint-sqlite) or "none"
+    checkpoint_backend: str = "memory"
+    checkpoint_path: str = "data/checkpoints.sqlite"
+    checkpoint_max_failed_threads: int = 256
+    node_max_attempts: int = 3
+    node_retry_initial_interval_seconds: float = 0.5
+
+    # Shared Cache Configuration
+    # Cross-process (SQLite) cache for stateless answers and query embeddings;
+    # also shares the index version between workers. `serve.py` enables it
+    # when running more than one worker.
+    shared_cache_enabled: bool = False
+    shared_cache_path: str = "data/shared_cache.sqlite"
+    shared_cache_ttl_seconds: float = 3600.0
+    shared_cache_max_entries: int = 10000
+
+    # Profiling Configuration
+    # Per-request CPU (sampled stacks) and allocation profiles, triggered by
+    # the `X-Profile: 1` header, `POST /admin/profiles/arm` or sampling.
+    # The header trigger and the `/admin` endpoints require
+    # `profiling_admin_token` in `X-Admin-Token`; with no token set they are
+    # disabled, leaving only sampling.
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_interval_ms: float = 5.0
+    profiling_dir: str = "data/profiles"
+    profiling_max_profiles: int = 50
+    profiling_top_n: int = 25
+    profiling_admin_token: str = ""
+
+    # Traffic Capture Configuration
+    # Records requests to `capture_paths` as rotating JSONL for
+    # `replay_traffic.py`. List settings take JSON in the environment,
+    # e.g. CAPTURE_REDACT_FIELDS='["question"]'.
+    capture_enabled: bool = False
+    capture_dir: str = "data/capture"
+    capture_paths: list[str] = ["/qa", "/index-pdf"]
+    capture_max_file_bytes: int = 64 * 1024 * 1024
+    capture_max_files: int = 20
+    capture_max_body_bytes: int = 10 * 1024 * 1024
+    capture_store_uploads: bool = False
+    capture_redact_fields: list[str] = []
+    capture_redact_pattern: str = ""
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -44,7 +179,14 @@ def get_settings() -> Settings:
     """
     global _settings
     if _settings is None:
-        _settings = Settings()
+        profile = os.environ.get("SETTINGS_PROFILE")
+        if profile:
+            profile_path = Path("profiles") / f"{profile}.env"
+            if not profile_path.exists():
+                raise ValueError(f"Settings profile not found: {profile_path}")
+            _settings = Settings(_env_file=(".env", str(profile_path)))
+        else:
+            _settings = Settings()
         # Force strip keys to avoid hidden whitespace issues
         if _settings.openai_api_key:
             _settings.openai_api_key = _settings.openai_api_key.strip()
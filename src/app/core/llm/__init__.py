@@ -1 +1,5 @@
-"""LLM factory module for creating LangChain chat models."""
+"""LLM factory module for creating LangChain chat models and LLM providers."""
+
+from .providers import ChatProvider, ChatResult, get_chat_provider
+
+__all__ = ["ChatProvider", "ChatResult", "get_chat_provider"]
@@ -0,0 +1,36 @@
+"""Embeddings wrapper that memoizes query vectors in the shared cache."""
+
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ..shared_cache import cache_key, get_shared_cache
+
+_NAMESPACE = "embedding"
+
+
+class SharedCacheEmbeddings(Embeddings):
+    """Serve repeated query embeddings from the cross-process cache.
+
+    Only `embed_query` is cached: queries repeat across users and workers,
+    while document embeddings are computed once at ingest. Vectors are
+    stored as raw float32 bytes.
+    """
+
+    def __init__(self, inner: Embeddings, model: str) -> None:
+        self._inner = inner
+        self._model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        cache = get_shared_cache()
+        key = cache_key(self._model, text)
+        cached = cache.get(_NAMESPACE, key)
+        if cached is not None:
+            return np.frombuffer(cached, dtype=np.float32).tolist()
+        vector = self._inner.embed_query(text)
+        cache.set(_NAMESPACE, key, np.asarray(vector, dtype=np.float32).tobytes())
+        return vector
@@ -1,22 +1,77 @@
-"""Factory functions for creating LangChain v1 LLM instances."""
+"""Factory functions for creating LangChain v1 LLM and embedding instances."""
 
-from langchain_openai import ChatOpenAI
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models import BaseChatModel, FakeListChatModel
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 from ..config import get_settings
+from .embedding_cache import SharedCacheEmbeddings
 
 
-def create_chat_model(temperature: float = 0.0) -> ChatOpenAI:
-    """Create a LangChain v1 ChatOpenAI instance.
+def create_chat_model(temperature: float = 0.0) -> BaseChatModel:
+    """Create a LangChain v1 chat model for the configured `llm_provider`.
 
     Args:
         temperature: Model temperature (default: 0.0 for deterministic outputs).
 
     Returns:
-        Configured ChatOpenAI instance.
+        Configured ChatOpenAI instance, or a fake chat model for `"stub"`.
     """
     settings = get_settings()
+    if settings.llm_provider == "stub":
+        return FakeListChatModel(responses=["Hello from the stub provider."])
     return ChatOpenAI(
         model=settings.openai_model_name,
-        api_key=settings.openai_api_key,
+        api_key=settings.openai_api_key or "not-needed",
+        base_url=settings.llm_base_url if settings.llm_provider == "openai_compatible" else None,
         temperature=temperature,
     )
+
+
+def create_embeddings() -> Embeddings:
+    """Create the embedding model for the configured `embedding_provider`.
+
+    - `"openai"`: OpenAI embeddings (`openai_embedding_model_name`).
+    - `"openai_compatible"`: an OpenAI-protocol server at
+      `embedding_base_url`; texts are sent as strings since local servers
+      generally do not accept pre-tokenized input.
+    - `"stub"`: deterministic hash-based vectors of `embedding_dimension`
+      (no network; useful for tests and benchmarks only).
+
+    With `shared_cache_enabled`, query embeddings are memoized across worker
+    processes.
+
+    Returns:
+        A LangChain `Embeddings` implementation.
+    """
+    settings = get_settings()
+    embeddings = _create_provider_embeddings()
+    if settings.shared_cache_enabled:
+        return SharedCacheEmbeddings(
+            embeddings,
+            model=f"{settings.embedding_provider}:{settings.openai_embedding_model_name}",
+        )
+    return embeddings
+
+
+def _create_provider_embeddings() -> Embeddings:
+    settings = get_settings()
+    if settings.embedding_provider == "openai":
+        return OpenAIEmbeddings(
+            model=settings.openai_embedding_model_name,
+            api_key=settings.openai_api_key,
+        )
+    if settings.embedding_provider == "openai_compatible":
+        if not settings.embedding_base_url:
+            raise ValueError(
+                "embedding_base_url is required for the openai_compatible embedding provider"
+            )
+        return OpenAIEmbeddings(
+            model=settings.openai_embedding_model_name,
+            api_key=settings.openai_api_key or "not-needed",
+            base_url=settings.embedding_base_url,
+            check_embedding_ctx_length=False,
+        )
+    if settings.embedding_provider == "stub":
+        return DeterministicFakeEmbedding(size=settings.embedding_dimension)
+    raise ValueError(f"Unknown embedding_provider '{settings.embedding_provider}'")
@@ -0,0 +1,343 @@
+"""LLM provider abstraction used by the agent nodes and ingest stages.
+
+Providers are selected with `settings.llm_provider`:
+
+- `"openai"`: the OpenAI API.
+- `"openai_compatible"`: any server speaking the OpenAI chat completions
+  protocol at `settings.llm_base_url` (e.g. a local llama.cpp or vLLM-CPU
+  server), for a low-latency path in air-gapped environments.
+- `"stub"`: an in-process deterministic provider with zero network, for
+  tests and benchmarks.
+
+Clients are created once per process and reused, so connection pools are
+kept warm across requests.
+
+A call made with a `cancel_token` is streamed, and the HTTP request is
+aborted as soon as the token reports cancelled, instead of paying for a
+completion nobody will read. A watchdog thread checks every streamed call,
+so this also applies while the call is still waiting for its first token.
+Until the response headers arrive, only `timeout` bounds the wait.
+
+A call made with a `timeout` is a hard deadline: it is not retried by the
+client, and a streamed call is aborted with `openai.APITimeoutError` once
+the timeout has elapsed in total (httpx only bounds each read).
+"""
+
+import json
+import re
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Protocol
+
+import httpx
+import openai
+
+from ..concurrency import CancelToken, OperationCancelled
+from ..config import get_settings
+from ..metrics import metrics
+
+
+@dataclass
+class ChatResult:
+    """Text returned by a provider plus token usage when reported."""
+
+    content: str
+    model: str
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+
+
+class ChatProvider(Protocol):
+    """Interface every chat backend implements."""
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.0,
+        timeout: float | None = None,
+        response_format: Dict[str, Any] | None = None,
+        cancel_token: CancelToken | None = None,
+    ) -> ChatResult:
+        """Run one chat completion.
+
+        Raises:
+            OperationCancelled: `cancel_token` was cancelled mid-call.
+        """
+        ...
+
+
+# How often the stream watchdog checks cancel tokens and deadlines.
+_WATCH_INTERVAL_SECONDS = 0.05
+
+_CANCELLED = "cancelled"
+_TIMED_OUT = "timed_out"
+
+
+@dataclass
+class _WatchedCall:
+    stream: Any
+    cancel_token: CancelToken
+    expires: float | None
+    aborted: str | None = None
+
+
+class _StreamWatchdog:
+    """Abort streamed calls whose callers cancelled or whose deadline passed.
+
+    One daemon thread per process polls the in-flight streamed calls. An
+    abort shuts the call's socket down, which wakes a read blocked on the
+    next (or first) chunk; closing the stream from another thread would not.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._calls: Dict[int, _WatchedCall] = {}
+        self._thread: threading.Thread | None = None
+
+    def watch(self, call: _WatchedCall) -> None:
+        with self._cond:
+            self._calls[id(call)] = call
+            # Threads do not survive a fork; start one in each process.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="llm-stream-watchdog", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def unwatch(self, call: _WatchedCall) -> None:
+        with self._cond:
+            self._calls.pop(id(call), None)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._calls:
+                    self._cond.wait()
+                calls = list(self._calls.values())
+            now = time.monotonic()
+            for call in calls:
+                if call.aborted is not None:
+                    continue
+                if call.cancel_token.is_cancelled():
+                    call.aborted = _CANCELLED
+                elif call.expires is not None and now > call.expires:
+                    call.aborted = _TIMED_OUT
+                else:
+                    continue
+                _shutdown_stream(call.stream)
+            time.sleep(_WATCH_INTERVAL_SECONDS)
+
+
+def _shutdown_stream(stream: Any) -> None:
+    network_stream = stream.response.extensions.get("network_stream")
+    sock = network_stream.get_extra_info("socket") if network_stream is not None else None
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        # Already closed by the owning thread.
+        pass
+
+
+_watchdog = _StreamWatchdog()
+
+
+def _record_usage(result: ChatResult) -> ChatResult:
+    if result.prompt_tokens is not None:
+        metrics.increment("llm_prompt_tokens_total", result.prompt_tokens, model=result.model)
+    if result.completion_tokens is not None:
+        metrics.increment(
+            "llm_completion_tokens_total", result.completion_tokens, model=result.model
+        )
+    return result
+
+
+class OpenAIChatProvider:
+    """Chat completions over the OpenAI protocol (hosted or self-hosted)."""
+
+    def __init__(self, api_key: str, base_url: str | None = None) -> None:
+        self._client = openai.Client(api_key=api_key, base_url=base_url)
+        # Client-side retries would multiply a deadline-derived timeout.
+        self._deadline_client = self._client.with_options(max_retries=0)
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.0,
+        timeout: float | None = None,
+        response_format: Dict[str, Any] | None = None,
+        cancel_token: CancelToken | None = None,
+    ) -> ChatResult:
+        kwargs: Dict[str, Any] = {}
+        client = self._client
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+            client = self._deadline_client
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+
+        if cancel_token is not None:
+            return self._complete_streamed(
+                client, messages, model, temperature, timeout, cancel_token, kwargs
+            )
+
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            **kwargs,
+        )
+        usage = getattr(response, "usage", None)
+        return _record_usage(
+            ChatResult(
+                content=str(response.choices[0].message.content or ""),
+                model=model,
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None),
+            )
+        )
+
+    def _complete_streamed(
+        self,
+        client: openai.Client,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        timeout: float | None,
+        cancel_token: CancelToken,
+        kwargs: Dict[str, Any],
+    ) -> ChatResult:
+        cancel_token.raise_if_cancelled()
+        expires = time.monotonic() + timeout if timeout is not None else None
+        stream = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs,
+        )
+        parts: List[str] = []
+        usage = None
+        call = _WatchedCall(stream, cancel_token, expires)
+        _watchdog.watch(call)
+        try:
+            try:
+                for chunk in stream:
+                    if call.aborted is not None:
+                        break
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+            except httpx.TimeoutException as exc:
+                # openai only maps timeouts raised before the stream starts.
+                if call.aborted is None:
+                    raise openai.APITimeoutError(request=stream.response.request) from exc
+            except Exception:
+                # An abort surfaces as a read error on the shut-down socket.
+                if call.aborted is None:
+                    raise
+        finally:
+            _watchdog.unwatch(call)
+            # Closing the stream closes the HTTP response, aborting the call
+            # when we stop early.
+            stream.close()
+        if call.aborted == _CANCELLED:
+            metrics.increment("llm_calls_aborted_total", model=model)
+            raise OperationCancelled("LLM call aborted: every caller cancelled.")
+        if call.aborted == _TIMED_OUT:
+            raise openai.APITimeoutError(request=stream.response.request)
+        return _record_usage(
+            ChatResult(
+                content="".join(parts),
+                model=model,
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None),
+            )
+        )
+
+
+_STUB_CHUNK_RE = re.compile(r"^\[(C\d+)\][^\n]*:\n(.+)$", re.MULTILINE)
+
+
+class StubChatProvider:
+    """Deterministic in-process provider (no network).
+
+    Plain-text requests are answered with the first line of the first
+    [C#] chunk in the prompt, cited. Requests for the `grounded_answer`
+    schema get the same answer as a single claim quoting that line; other
+    JSON requests get an empty but well-formed object. Token counts are
+    approximated as words.
+    """
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.0,
+        timeout: float | None = None,
+        response_format: Dict[str, Any] | None = None,
+        cancel_token: CancelToken | None = None,
+    ) -> ChatResult:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        prompt = "\n".join(message["content"] for message in messages)
+        match = _STUB_CHUNK_RE.search(prompt)
+        answer = (
+            f"{match.group(2).strip()} [{match.group(1)}]"
+            if match
+            else "I cannot answer based on the available document."
+        )
+        schema_name = (response_format or {}).get("json_schema", {}).get("name")
+        if schema_name == "grounded_answer":
+            claims = (
+                [
+                    {
+                        "text": match.group(2).strip(),
+                        "citations": [match.group(1)],
+                        "quotes": [match.group(2).strip()],
+                    }
+                ]
+                if match
+                else []
+            )
+            content = json.dumps({"answer": answer, "claims": claims})
+        elif response_format is not None:
+            content = json.dumps({"items": []})
+        else:
+            content = answer
+        return _record_usage(
+            ChatResult(
+                content=content,
+                model=model,
+                prompt_tokens=len(prompt.split()),
+                completion_tokens=len(content.split()),
+            )
+        )
+
+
+@lru_cache(maxsize=1)
+def get_chat_provider() -> ChatProvider:
+    """Get the configured chat provider (singleton via LRU cache)."""
+    settings = get_settings()
+    if settings.llm_provider == "openai":
+        return OpenAIChatProvider(api_key=settings.openai_api_key)
+    if settings.llm_provider == "openai_compatible":
+        if not settings.llm_base_url:
+            raise ValueError("llm_base_url is required for the openai_compatible provider")
+        # Local servers usually ignore the key, but the client requires one.
+        return OpenAIChatProvider(
+            api_key=settings.openai_api_key or "not-needed",
+            base_url=settings.llm_base_url,
+        )
+    if settings.llm_provider == "stub":
+        return StubChatProvider()
+    raise ValueError(f"Unknown llm_provider '{settings.llm_provider}'")
@@ -0,0 +1,64 @@
+"""Minimal in-process metrics registry.
+
+Counters, gauges and latency summaries are kept in memory and exposed as a
+JSON snapshot by the `/metrics` endpoint. Metric names follow the
+`<area>_<thing>[_total|_seconds]` convention; labels are folded into the
+name as `name{key=value}`.
+"""
+
+import threading
+from typing import Any, Dict
+
+
+def _labelled(name: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f"{key}={value}" for key, value in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and latency summaries."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, amount: float = 1, **labels: Any) -> None:
+        key = _labelled(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = _labelled(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one observation (e.g. a latency in seconds)."""
+        key = _labelled(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = {"count": 0, "sum": 0.0, "min": value, "max": value}
+                self._summaries[key] = summary
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["min"] = min(summary["min"], value)
+            summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {
+                    key: {**summary, "avg": summary["sum"] / summary["count"]}
+                    for key, summary in self._summaries.items()
+                },
+            }
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,306 @@
+"""On-demand per-request profiling for the QA path.
+
+A profiled request runs under two profilers:
+
+- a sampling profiler: a background thread reads the request thread's
+  Python stack every `settings.profiling_interval_ms` and aggregates the
+  samples as collapsed stacks (`outer;inner;leaf count` lines), the input
+  format of flamegraph.pl, speedscope and inferno. Samples are wall-clock,
+  so time spent waiting on the LLM or vector store shows up as well;
+  `cpu_seconds` reports the thread's actual CPU time alongside;
+- tracemalloc, whose before/after snapshot diff gives the top allocation
+  sites of the request.
+
+Profiles are written to `settings.profiling_dir` as `<id>.json` (summary:
+timings, top functions, top allocation sites) and `<id>.collapsed`, so any
+worker of a multi-process server can serve them; the oldest are pruned
+beyond `settings.profiling_max_profiles`.
+
+Nothing is installed until a request is selected for profiling, so the
+disabled path is one settings check. tracemalloc is process-wide while any
+profile is running, which slows (and is attributed to) concurrent requests
+too; only the sampled stacks are strictly per request.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, TypeVar
+
+from .config import get_settings
+from .metrics import metrics
+
+T = TypeVar("T")
+
+_ID_CHARS = frozenset("0123456789abcdef")
+
+# Requests armed through the admin endpoint (per process).
+_armed_lock = threading.Lock()
+_armed = 0
+
+# tracemalloc is shared by all concurrently profiled requests.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def arm(count: int) -> int:
+    """Profile the next `count` requests served by this process.
+
+    Returns:
+        The number of requests now armed.
+    """
+    global _armed
+    with _armed_lock:
+        _armed += count
+        return _armed
+
+
+def should_profile(requested: bool) -> str | None:
+    """Decide whether to profile a request.
+
+    Args:
+        requested: The client asked for it (`X-Profile` header).
+
+    Returns:
+        The trigger (`header`, `armed` or `sampled`), or None.
+    """
+    global _armed
+    settings = get_settings()
+    if not settings.profiling_enabled:
+        return None
+    if requested:
+        return "header"
+    if _armed:
+        with _armed_lock:
+            if _armed > 0:
+                _armed -= 1
+                return "armed"
+    if settings.profiling_sample_rate and random.random() < settings.profiling_sample_rate:
+        return "sampled"
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    """Path relative to the longest matching `sys.path` entry."""
+    prefixes = sorted(
+        (os.path.abspath(entry) for entry in sys.path if entry), key=len, reverse=True
+    )
+    for prefix in prefixes:
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1 :]
+    return filename
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_qualname} ({_short_path(code.co_filename)})"
+
+
+class _StackSampler(threading.Thread):
+    """Periodically record one thread's Python stack."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(name="qa-profiler", daemon=True)
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stopped = threading.Event()
+        self.stacks: Counter[str] = Counter()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            names: List[str] = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+def _start_tracemalloc() -> tracemalloc.Snapshot:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+    return tracemalloc.take_snapshot()
+
+
+def _stop_tracemalloc(before: tracemalloc.Snapshot, top: int) -> Dict[str, Any]:
+    global _tracemalloc_users, _tracemalloc_owned
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+    ignore = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    sites = [
+        {
+            "site": f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size_diff,
+            "count": stat.count_diff,
+        }
+        for stat in diff
+        if stat.size_diff > 0
+    ]
+    return {"peak_bytes": peak, "top_allocations": sites[:top]}
+
+
+def _top_functions(stacks: Counter, top: int) -> List[Dict[str, Any]]:
+    self_counts: Counter[str] = Counter()
+    total_counts: Counter[str] = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for name in set(frames):
+            total_counts[name] += count
+    return [
+        {"function": name, "total_samples": total, "self_samples": self_counts[name]}
+        for name, total in total_counts.most_common(top)
+    ]
+
+
+def _summaries_by_age(directory: Path) -> List[Path]:
+    """Stored summaries, oldest first.
+
+    Other workers prune concurrently, so files that vanish between the
+    listing and the `stat` are skipped.
+    """
+    dated = []
+    for path in directory.glob("*.json"):
+        try:
+            dated.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    return [path for _, path in sorted(dated)]
+
+
+def _prune(directory: Path, keep: int) -> None:
+    summaries = _summaries_by_age(directory)
+    for path in summaries[: max(0, len(summaries) - keep)]:
+        path.unlink(missing_ok=True)
+        path.with_suffix(".collapsed").unlink(missing_ok=True)
+
+
+def run_profiled(
+    func: Callable[[], T],
+    trigger: str,
+    describe: Callable[[T], Dict[str, Any]] | None = None,
+) -> tuple[T, str]:
+    """Run `func` in the current thread under the CPU and allocation profilers.
+
+    The profile is stored even when `func` raises.
+
+    Args:
+        func: The work to profile (runs in the calling thread).
+        trigger: Why the request is profiled, recorded in the summary.
+        describe: Extracts extra summary fields from the result.
+
+    Returns:
+        (result of `func`, profile ID).
+    """
+    settings = get_settings()
+    profile_id = uuid.uuid4().hex
+    sampler = _StackSampler(threading.get_ident(), settings.profiling_interval_ms / 1000)
+    allocations_before = _start_tracemalloc()
+    started_at = time.time()
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    sampler.start()
+
+    summary: Dict[str, Any] = {"id": profile_id, "trigger": trigger, "error": None}
+    try:
+        result = func()
+        if describe is not None:
+            summary.update(describe(result))
+        return result, profile_id
+    except BaseException as exc:
+        summary["error"] = type(exc).__name__
+        raise
+    finally:
+        sampler.stop()
+        summary.update(
+            created_at=started_at,
+            duration_seconds=time.perf_counter() - started,
+            cpu_seconds=time.thread_time() - cpu_started,
+            interval_ms=settings.profiling_interval_ms,
+            samples=sum(sampler.stacks.values()),
+            top_functions=_top_functions(sampler.stacks, settings.profiling_top_n),
+            **_stop_tracemalloc(allocations_before, settings.profiling_top_n),
+        )
+        directory = Path(settings.profiling_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{profile_id}.collapsed").write_text(
+            "".join(f"{stack} {count}\n" for stack, count in sampler.stacks.items()),
+            encoding="utf-8",
+        )
+        # Atomic, so a concurrent listing never reads half a summary.
+        summary_tmp = directory / f"{profile_id}.json.tmp"
+        summary_tmp.write_text(json.dumps(summary), encoding="utf-8")
+        os.replace(summary_tmp, directory / f"{profile_id}.json")
+        _prune(directory, settings.profiling_max_profiles)
+        metrics.increment("qa_profiles_total", trigger=trigger)
+
+
+def _profile_path(profile_id: str, suffix: str) -> Path | None:
+    # IDs are generated hex strings; anything else cannot name a profile.
+    if not profile_id or not set(profile_id) <= _ID_CHARS:
+        return None
+    path = Path(get_settings().profiling_dir) / f"{profile_id}{suffix}"
+    return path if path.exists() else None
+
+
+def load_profile(profile_id: str) -> Dict[str, Any] | None:
+    """Return a stored profile summary, or None."""
+    path = _profile_path(profile_id, ".json")
+    try:
+        return json.loads(path.read_text(encoding="utf-8")) if path else None
+    except FileNotFoundError:
+        return None
+
+
+def load_collapsed(profile_id: str) -> str | None:
+    """Return a stored profile's collapsed stacks, or None."""
+    path = _profile_path(profile_id, ".collapsed")
+    try:
+        return path.read_text(encoding="utf-8") if path else None
+    except FileNotFoundError:
+        return None
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, newest first (ID, trigger, duration)."""
+    directory = Path(get_settings().profiling_dir)
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in reversed(_summaries_by_age(directory)):
+        try:
+            summary = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            continue
+        profiles.append(
+            {key: summary.get(key) for key in ("id", "trigger", "created_at", "duration_seconds")}
+        )
+    return profiles
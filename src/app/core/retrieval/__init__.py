@@ -1,5 +1,6 @@
 """Retrieval module for vector store operations."""
 
-from .vector_store import get_retriever, retrieve
+from .dynamic_k import select_dynamic_k
+from .vector_store import get_retriever, retrieve, retrieve_with_scores
 
-__all__ = ["get_retriever", "retrieve"]
+__all__ = ["get_retriever", "retrieve", "retrieve_with_scores", "select_dynamic_k"]
@@ -0,0 +1,170 @@
+"""Local chunk store so vectors only carry IDs and small filterable fields.
+
+With `settings.chunk_store_enabled`, chunk text and the full chunk metadata
+are written to a local SQLite database keyed by `chunk_id`, and the vector
+index stores only `VECTOR_METADATA_KEYS` plus an empty text field. This
+keeps index storage and every query response small. Retrieval then fills in
+(hydrates) the returned documents in one bulk lookup, served from a
+hot-chunk LRU cache in front of SQLite where possible.
+
+Rows are compact: text and JSON metadata are zlib-compressed blobs in a
+`WITHOUT ROWID` table clustered on the chunk ID.
+
+Vectors written before the store was enabled still carry their text and
+are returned unchanged.
+"""
+
+import json
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import get_settings
+from ..metrics import metrics
+
+# Metadata kept on the vector itself: enough to filter and to find the row.
+VECTOR_METADATA_KEYS = ("chunk_id", "source", "page", "document_date", "parent_id")
+
+# SQLite caps bound parameters per statement (999 on older builds).
+_MAX_PARAMS = 500
+
+_StoredChunk = Tuple[str, Dict[str, Any]]
+
+
+def slim_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """The subset of chunk metadata stored on the vector."""
+    return {k: metadata[k] for k in VECTOR_METADATA_KEYS if metadata.get(k) is not None}
+
+
+def _pack(value: str) -> bytes:
+    return zlib.compress(value.encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class ChunkStore:
+    """SQLite-backed chunk text/metadata store with an in-memory hot cache."""
+
+    def __init__(self, path: Path, cache_size: int = 2048) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Queries run on request worker threads; one connection, one lock.
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " chunk_id TEXT PRIMARY KEY,"
+            " text BLOB NOT NULL,"
+            " metadata BLOB NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, _StoredChunk]" = OrderedDict()
+        self._cache_size = cache_size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def _remember(self, chunk_id: str, chunk: _StoredChunk) -> None:
+        self._cache[chunk_id] = chunk
+        self._cache.move_to_end(chunk_id)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def put_many(self, docs: Iterable[Document]) -> int:
+        """Insert or replace chunks keyed by `metadata["chunk_id"]`."""
+        rows = [
+            (
+                doc.metadata["chunk_id"],
+                _pack(doc.page_content),
+                _pack(json.dumps(doc.metadata, ensure_ascii=False)),
+            )
+            for doc in docs
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, text, metadata) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            for chunk_id, _, _ in rows:
+                self._cache.pop(chunk_id, None)
+        return len(rows)
+
+    def get_many(self, chunk_ids: Sequence[str]) -> Dict[str, _StoredChunk]:
+        """Bulk lookup of (text, metadata) by chunk ID; unknown IDs are omitted."""
+        found: Dict[str, _StoredChunk] = {}
+        unique = list(dict.fromkeys(chunk_ids))
+        with self._lock:
+            missing = []
+            for chunk_id in unique:
+                cached = self._cache.get(chunk_id)
+                if cached is None:
+                    missing.append(chunk_id)
+                else:
+                    self._cache.move_to_end(chunk_id)
+                    found[chunk_id] = cached
+            for start in range(0, len(missing), _MAX_PARAMS):
+                batch = missing[start : start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                for chunk_id, text, metadata in self._conn.execute(
+                    f"SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id IN ({placeholders})",
+                    batch,
+                ):
+                    chunk = (_unpack(text), json.loads(_unpack(metadata)))
+                    self._remember(chunk_id, chunk)
+                    found[chunk_id] = chunk
+        metrics.increment(
+            "chunk_store_lookups_total", len(unique) - len(missing), outcome="cache_hit"
+        )
+        metrics.increment("chunk_store_lookups_total", len(missing), outcome="cache_miss")
+        return found
+
+    def hydrate(self, docs: List[Document]) -> List[Document]:
+        """Fill in text and full metadata for documents returned without text.
+
+        Documents that already have text (vectors written before the chunk
+        store was enabled) are left as they are. Documents whose chunk is
+        not in the store are dropped.
+        """
+        wanted = [
+            doc.metadata.get("chunk_id") or doc.id for doc in docs if not doc.page_content
+        ]
+        if not wanted:
+            return docs
+        stored = self.get_many([chunk_id for chunk_id in wanted if chunk_id])
+
+        hydrated: List[Document] = []
+        for doc in docs:
+            if doc.page_content:
+                hydrated.append(doc)
+                continue
+            chunk = stored.get(doc.metadata.get("chunk_id") or doc.id)
+            if chunk is None:
+                metrics.increment("chunk_store_missing_total")
+                continue
+            text, metadata = chunk
+            doc.page_content = text
+            # Vector-side values (e.g. a score set by the caller) win.
+            doc.metadata = {**metadata, **doc.metadata}
+            hydrated.append(doc)
+        return hydrated
+
+
+@lru_cache(maxsize=1)
+def get_chunk_store() -> ChunkStore:
+    """Get the configured chunk store (singleton via LRU cache)."""
+    settings = get_settings()
+    return ChunkStore(
+        Path(settings.chunk_store_path), cache_size=settings.chunk_store_cache_size
+    )
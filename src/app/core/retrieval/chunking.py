@@ -0,0 +1,321 @@
+"""Pluggable document chunkers used at indexing time.
+
+The default `StructuredTokenChunker` sizes chunks in model tokens and keeps
+the structure of financial statements intact: table rows are never split,
+headings start new sections, and every chunk records the page and section it
+came from so `serialize_chunks_with_ids` can cite it precisely.
+
+The original character-based splitter is still available as the
+`"recursive"` chunker for comparison (see `benchmark_chunking.py`).
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Protocol, Sequence
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ..config import get_settings
+
+try:  # tiktoken ships with langchain-openai, but keep chunking usable without it
+    import tiktoken
+except ImportError:  # pragma: no cover - exercised only in minimal installs
+    tiktoken = None
+
+
+# Metadata keys copied from loader output onto each chunk. Everything else
+# the PDF loader emits (producer, creator, ...) is dropped to keep vector
+# metadata small.
+_KEPT_METADATA_KEYS = (
+    "source",
+    "page",
+    "page_label",
+    "total_pages",
+    "title",
+    "document_date",
+)
+
+# A line ending in one or more amount columns, e.g. "Inventory 159,144 156,657"
+# or "Cash $ 11,552 $ --". Such lines are table rows and must stay whole.
+_TABLE_ROW_RE = re.compile(
+    r"(?:\s+(?:\$\s*)?(?:\(?[\d][\d,]*(?:\.\d+)?\)?|--))+\s*$"
+)
+# Short upper-case lines ("BALANCE SHEET", "CASH FLOWS FROM ...") or short
+# title-case lines without terminal punctuation ("Income Statement").
+_UPPER_HEADING_RE = re.compile(r"^[A-Z][A-Z0-9 ,'&()\-/.\"]{2,80}$")
+_TITLE_HEADING_RE = re.compile(
+    r"^[A-Z][\w'’\-]*(?:\s+(?:of|and|the|for|to|in|on|&|[A-Z][\w'’\-]*)){0,6}$"
+)
+_BLANK_RE = re.compile(r"^\s*$")
+
+_LINE, _ROW, _HEADING = 0, 1, 2
+
+
+class Chunker(Protocol):
+    """Interface implemented by every chunker."""
+
+    def split_documents(self, docs: Sequence[Document]) -> List[Document]:
+        """Split loader documents into chunk documents."""
+        ...
+
+
+@lru_cache(maxsize=4)
+def _load_encoding(encoding_name: str):
+    """Load a tiktoken encoding once per process.
+
+    tiktoken downloads its BPE ranks on first use, so air-gapped hosts fall
+    back to the character estimate instead of failing to index.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception:
+        return None
+
+
+class _TokenCounter:
+    """Count tokens with tiktoken, falling back to a 4-chars-per-token estimate."""
+
+    def __init__(self, encoding_name: str = "cl100k_base") -> None:
+        self._encoding = _load_encoding(encoding_name)
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        if not texts:
+            return []
+        if self._encoding is None:
+            return [max(1, len(text) // 4) for text in texts]
+        # One batched call is much cheaper than encoding line by line.
+        return [len(ids) for ids in self._encoding.encode_ordinary_batch(list(texts))]
+
+    def split(self, text: str, size: int) -> List[str]:
+        """Split an oversized unit into windows of at most `size` tokens."""
+        if self._encoding is None:
+            step = size * 4
+            return [text[i : i + step] for i in range(0, len(text), step)]
+        ids = self._encoding.encode_ordinary(text)
+        return [self._encoding.decode(ids[i : i + size]) for i in range(0, len(ids), size)]
+
+
+def _chunk_id(source: str, page: object, index: int, text: str) -> str:
+    """Deterministic chunk ID for a chunk's position and text.
+
+    Changed text gets a new ID, so re-indexing does not overwrite the old
+    vectors; `index_chunks` deletes a source's vectors before upserting.
+    """
+    digest = hashlib.sha1(f"{source}|{page}|{index}|{text}".encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def _base_metadata(doc: Document) -> Dict[str, object]:
+    return {k: doc.metadata[k] for k in _KEPT_METADATA_KEYS if k in doc.metadata}
+
+
+class StructuredTokenChunker:
+    """Token-sized chunker that respects table rows, paragraphs and headings.
+
+    Each page is scanned once with precompiled regexes and classified into
+    units (heading, table row, prose paragraph). Units are then packed into
+    chunks of at most `chunk_size` tokens; a unit is only ever split when it
+    alone exceeds the budget. Chunks never cross page boundaries and a new
+    chunk is started at a heading once the current one is reasonably full.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        min_section_tokens: int | None = None,
+    ) -> None:
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.min_section_tokens = (
+            chunk_size // 4 if min_section_tokens is None else min_section_tokens
+        )
+        self._counter = _TokenCounter()
+
+    @staticmethod
+    def _classify(line: str) -> int:
+        if _TABLE_ROW_RE.search(line):
+            return _ROW
+        if len(line) <= 80 and (
+            _UPPER_HEADING_RE.match(line) or _TITLE_HEADING_RE.match(line)
+        ):
+            return _HEADING
+        return _LINE
+
+    def _units(self, text: str) -> List[tuple[int, str]]:
+        """Group raw page lines into (kind, text) units."""
+        units: List[tuple[int, str]] = []
+        paragraph: List[str] = []
+        for raw in text.splitlines():
+            line = raw.strip()
+            if _BLANK_RE.match(line):
+                if paragraph:
+                    units.append((_LINE, " ".join(paragraph)))
+                    paragraph = []
+                continue
+            kind = self._classify(line)
+            if kind == _LINE:
+                paragraph.append(line)
+                # A sentence-final line closes the paragraph.
+                if line.endswith((".", ":", ";")):
+                    units.append((_LINE, " ".join(paragraph)))
+                    paragraph = []
+                continue
+            if paragraph:
+                units.append((_LINE, " ".join(paragraph)))
+                paragraph = []
+            units.append((kind, line))
+        if paragraph:
+            units.append((_LINE, " ".join(paragraph)))
+        return units
+
+    def _split_page(self, doc: Document, section: str) -> tuple[List[Document], str]:
+        units = self._units(doc.page_content)
+        counts = self._counter.count_many([text for _, text in units])
+        base = _base_metadata(doc)
+
+        chunks: List[Document] = []
+        current: List[tuple[str, int]] = []
+        current_tokens = 0
+        chunk_section = section
+        has_body = False
+        heading_run: List[str] = []
+
+        def flush(keep_overlap: bool) -> None:
+            nonlocal current, current_tokens, chunk_section, has_body
+            if not current:
+                return
+            text = "\n".join(t for t, _ in current)
+            metadata = dict(base)
+            metadata.update(
+                section=chunk_section,
+                token_count=current_tokens,
+            )
+            chunks.append(Document(page_content=text, metadata=metadata))
+            carried: List[tuple[str, int]] = []
+            if keep_overlap and self.chunk_overlap:
+                budget = self.chunk_overlap
+                for unit in reversed(current):
+                    if unit[1] > budget:
+                        break
+                    carried.insert(0, unit)
+                    budget -= unit[1]
+            current = carried
+            current_tokens = sum(n for _, n in carried)
+            chunk_section = section
+            has_body = bool(carried)
+
+        for (kind, text), tokens in zip(units, counts):
+            if kind == _HEADING:
+                heading_run.append(text)
+                section = " / ".join(heading_run)[:200]
+                if current_tokens >= self.min_section_tokens:
+                    flush(keep_overlap=False)
+                # Consecutive headings at the top of a chunk name its section.
+                if not has_body:
+                    chunk_section = section
+            else:
+                heading_run = []
+                has_body = True
+
+            if tokens > self.chunk_size:
+                flush(keep_overlap=False)
+                for piece in self._counter.split(text, self.chunk_size):
+                    current = [(piece, self.chunk_size)]
+                    current_tokens = self.chunk_size
+                    flush(keep_overlap=False)
+                continue
+
+            if current_tokens + tokens > self.chunk_size:
+                flush(keep_overlap=kind != _ROW)
+                # The overlap is best effort: drop carried units that would
+                # push the next chunk over budget.
+                while current and current_tokens + tokens > self.chunk_size:
+                    current_tokens -= current.pop(0)[1]
+                has_body = bool(current) or kind != _HEADING
+            current.append((text, tokens))
+            current_tokens += tokens
+
+        flush(keep_overlap=False)
+        return chunks, section
+
+    def split_documents(self, docs: Sequence[Document]) -> List[Document]:
+        chunks: List[Document] = []
+        section = ""
+        for doc in docs:
+            page_chunks, section = self._split_page(doc, section)
+            chunks.extend(page_chunks)
+        return _assign_ids(chunks)
+
+
+class RecursiveCharacterChunker:
+    """The original character-count splitter, kept for comparison."""
+
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50) -> None:
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+
+    def split_documents(self, docs: Sequence[Document]) -> List[Document]:
+        return _assign_ids(self._splitter.split_documents(list(docs)))
+
+
+def _assign_ids(chunks: List[Document]) -> List[Document]:
+    """Stamp `chunk_index` and a deterministic `chunk_id` onto each chunk."""
+    for index, chunk in enumerate(chunks):
+        chunk.metadata["chunk_index"] = index
+        chunk_id = _chunk_id(
+            str(chunk.metadata.get("source", "")),
+            chunk.metadata.get("page", ""),
+            index,
+            chunk.page_content,
+        )
+        chunk.metadata["chunk_id"] = chunk_id
+        chunk.id = chunk_id
+    return chunks
+
+
+CHUNKERS: Dict[str, Callable[..., Chunker]] = {
+    "structured": StructuredTokenChunker,
+    "recursive": RecursiveCharacterChunker,
+}
+
+
+def get_chunker(
+    name: str | None = None,
+    chunk_size: int | None = None,
+    chunk_overlap: int | None = None,
+) -> Chunker:
+    """Build a chunker by name.
+
+    Args:
+        name: Registered chunker name (defaults to `settings.chunker`).
+        chunk_size: Chunk size override. Tokens for `"structured"`,
+            characters for `"recursive"`.
+        chunk_overlap: Overlap override, in the same unit as `chunk_size`.
+
+    Returns:
+        A chunker instance implementing `split_documents`.
+    """
+    settings = get_settings()
+    name = name or settings.chunker
+    if name not in CHUNKERS:
+        raise ValueError(f"Unknown chunker '{name}'. Available: {sorted(CHUNKERS)}")
+
+    if name == "recursive":
+        return RecursiveCharacterChunker(
+            chunk_size=chunk_size or 500,
+            chunk_overlap=50 if chunk_overlap is None else chunk_overlap,
+        )
+    return CHUNKERS[name](
+        chunk_size=chunk_size or settings.chunk_size_tokens,
+        chunk_overlap=(
+            settings.chunk_overlap_tokens if chunk_overlap is None else chunk_overlap
+        ),
+    )
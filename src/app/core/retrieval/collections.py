@@ -0,0 +1,123 @@
+"""Collections (tenant namespaces) and metadata filter pushdown.
+
+Each collection is its own vector namespace, so a query only searches the
+collection it names and one tenant's uploads do not grow another tenant's
+search space. The default collection (None) is the original un-namespaced
+index, so existing data keeps working.
+
+Derived indexes follow their collection: the summary and precomputed Q/A
+namespaces of collection `acme` are `acme:summaries` and
+`acme:precomputed-qa`. The default collection keeps the plain names, which
+are therefore reserved.
+
+Request filters are translated into Pinecone metadata filters and passed
+to the vector query itself, so the backend applies them during the search
+instead of the app filtering a fixed top-k afterwards.
+"""
+
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+from ..config import get_settings
+
+_COLLECTION_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_\-]{0,62}$")
+_ISO_DATE_RE = re.compile(r"(\d{4})-?(\d{2})-?(\d{2})")
+
+
+def validate_collection(collection: str | None) -> str | None:
+    """Return the collection name, or raise ValueError if it is not allowed."""
+    if collection is None:
+        return None
+    settings = get_settings()
+    if not _COLLECTION_RE.match(collection):
+        raise ValueError(
+            "collection must be 1-63 letters, digits, '-' or '_' and start "
+            "with a letter or digit"
+        )
+    if collection in (settings.summary_index_namespace, settings.qa_index_namespace):
+        raise ValueError(f"collection name '{collection}' is reserved")
+    return collection
+
+
+def chunk_namespace(collection: str | None) -> str:
+    """Namespace holding a collection's chunk vectors."""
+    return collection or ""
+
+
+def derived_namespace(collection: str | None, base: str) -> str:
+    """Namespace of a derived index (summaries, precomputed Q/A) of a collection."""
+    return f"{collection}:{base}" if collection else base
+
+
+def is_chunk_namespace(namespace: str) -> bool:
+    """True for namespaces holding chunk vectors (not derived indexes)."""
+    settings = get_settings()
+    return ":" not in namespace and namespace not in (
+        settings.summary_index_namespace,
+        settings.qa_index_namespace,
+    )
+
+
+def date_key(value: date | datetime | str | None) -> int | None:
+    """Encode a date as YYYYMMDD for numeric range filters.
+
+    Pinecone only supports range operators on numbers, so document dates
+    are stored and filtered in this form. Strings are parsed leniently from
+    their leading ISO date (PDF `creationdate`/`moddate` values); anything
+    unparseable yields None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.year * 10000 + value.month * 100 + value.day
+    match = _ISO_DATE_RE.search(str(value))
+    if not match:
+        return None
+    year, month, day = (int(part) for part in match.groups())
+    if year < 1000 or not 1 <= month <= 12 or not 1 <= day <= 31:
+        return None
+    return year * 10000 + month * 100 + day
+
+
+def build_metadata_filter(
+    sources: List[str] | None = None,
+    page_from: int | None = None,
+    page_to: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> Dict[str, Any] | None:
+    """Translate request filters into a Pinecone metadata filter.
+
+    Args:
+        sources: Allowed `source` values (as shown in citations).
+        page_from: First page, 1-based and inclusive (as shown in citations).
+        page_to: Last page, 1-based and inclusive.
+        date_from: Earliest document date, inclusive.
+        date_to: Latest document date, inclusive.
+
+    Returns:
+        A filter dict, or None when no filter was given.
+    """
+    clauses: List[Dict[str, Any]] = []
+    if sources:
+        clauses.append({"source": {"$in": list(sources)}})
+    # Chunk metadata stores the loader's 0-based page index.
+    page_range = {}
+    if page_from is not None:
+        page_range["$gte"] = page_from - 1
+    if page_to is not None:
+        page_range["$lte"] = page_to - 1
+    if page_range:
+        clauses.append({"page": page_range})
+    date_range = {}
+    if date_from is not None:
+        date_range["$gte"] = date_key(date_from)
+    if date_to is not None:
+        date_range["$lte"] = date_key(date_to)
+    if date_range:
+        clauses.append({"document_date": date_range})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
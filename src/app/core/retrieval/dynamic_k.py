@@ -0,0 +1,48 @@
+"""Score-aware selection of how many retrieved chunks to keep.
+
+Retrieval over-fetches candidates with similarity scores and this policy
+decides where to cut: always keep `min_k`, never more than `max_k`, and
+stop early at the first chunk that falls below an absolute score threshold
+or drops off sharply (the "elbow") relative to the chunk before it.
+"""
+
+from typing import List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+
+def select_dynamic_k(
+    scored: Sequence[Tuple[Document, float]],
+    min_k: int,
+    max_k: int,
+    score_threshold: float | None = None,
+    max_relative_drop: float | None = None,
+) -> List[Tuple[Document, float]]:
+    """Cut a scored candidate list down to the chunks worth sending.
+
+    Args:
+        scored: (document, similarity) pairs; higher scores are better.
+        min_k: Minimum number of chunks to keep, regardless of score.
+        max_k: Maximum number of chunks to keep.
+        score_threshold: Stop at the first chunk scoring below this.
+        max_relative_drop: Stop at the first chunk whose score is lower than
+            the previous one by more than this fraction (e.g. 0.15 = 15%).
+
+    Returns:
+        The kept (document, score) pairs, best first.
+    """
+    ranked = sorted(scored, key=lambda pair: pair[1], reverse=True)
+    max_k = max(min_k, max_k)
+    kept: List[Tuple[Document, float]] = []
+
+    for doc, score in ranked[:max_k]:
+        if len(kept) >= min_k:
+            if score_threshold is not None and score < score_threshold:
+                break
+            if max_relative_drop is not None and kept:
+                previous = kept[-1][1]
+                if previous > 0 and (previous - score) / previous > max_relative_drop:
+                    break
+        kept.append((doc, score))
+
+    return kept
@@ -0,0 +1,258 @@
+"""Hierarchical summary index for broad questions.
+
+At ingest time chunks are organised into a strict tree::
+
+    document
+      └── section   (contiguous pages sharing their top heading)
+            └── page
+                  └── chunk
+
+Every page, section and document node gets an LLM summary built bottom-up
+(pages from their chunk text, sections from page summaries, the document
+from section summaries). Summaries are embedded into a separate namespace
+with `level`, `node_id`, `parent_id` and `child_ids` metadata; chunks carry
+the `parent_id` of their page.
+
+At query time `select_levels` picks which levels to search from the wording
+of the question, so "summarize the income statement" is served from a few
+compact section/page summaries instead of dozens of raw chunks.
+
+Nodes of one level only depend on the level below, so each level is
+summarized with up to `summary_max_concurrency` concurrent LLM calls.
+"""
+
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from ..agents.prompts import SUMMARY_SYSTEM_PROMPT
+from ..config import get_settings
+from ..llm.providers import get_chat_provider
+from .collections import derived_namespace
+from .vector_store import _get_vector_store, bump_index_version, delete_source
+
+CHUNK = "chunk"
+PAGE = "page"
+SECTION = "section"
+DOCUMENT = "document"
+
+# Questions asking for an overview rather than a specific fact.
+_BROAD_RE = re.compile(
+    r"\b(summar\w*|overview|overall|main (points|findings|topics)|key (points|findings|takeaways)|"
+    r"what is (this|the) (document|report) about|in general|outline|describe)\b",
+    re.IGNORECASE,
+)
+# A broad question scoped to one part of the document.
+_SCOPED_RE = re.compile(
+    r"\b(statement|balance sheet|schedule|notes?|section|page \d+|cash flow)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class SummaryNode:
+    """One non-leaf node of the summary tree."""
+
+    node_id: str
+    level: str
+    parent_id: str | None
+    child_ids: List[str] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    summary: str = ""
+
+
+def _node_id(*parts: Any) -> str:
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+
+
+def select_levels(question: str) -> List[str]:
+    """Pick the tree levels to search for a question.
+
+    Returns:
+        `[DOCUMENT, SECTION]` for document-wide overview questions,
+        `[SECTION, PAGE]` for overviews of a named part, and `[CHUNK]` for
+        everything else (specific facts are best served by raw chunks).
+    """
+    if not _BROAD_RE.search(question):
+        return [CHUNK]
+    if _SCOPED_RE.search(question):
+        return [SECTION, PAGE]
+    return [DOCUMENT, SECTION]
+
+
+def plan_summary_tree(chunks: Sequence[Document]) -> List[SummaryNode]:
+    """Lay out the tree for freshly chunked documents (no LLM calls).
+
+    Stamps each chunk's metadata with the `parent_id` of its page node so
+    the links are stored when the chunks are indexed.
+
+    Returns:
+        Page, section and document nodes, children before parents.
+    """
+    nodes: List[SummaryNode] = []
+    for source, doc_chunks in groupby(chunks, key=lambda c: c.metadata.get("source")):
+        doc_chunks = list(doc_chunks)
+        # Carried onto every node so request filters also apply to summaries.
+        document_date = doc_chunks[0].metadata.get("document_date")
+        doc_id = _node_id(DOCUMENT, source)
+        doc_node = SummaryNode(
+            doc_id,
+            DOCUMENT,
+            None,
+            metadata={"source": source, "document_date": document_date},
+        )
+
+        pages: List[Tuple[SummaryNode, str]] = []
+        for page, page_chunks in groupby(doc_chunks, key=lambda c: c.metadata.get("page")):
+            page_chunks = list(page_chunks)
+            first = page_chunks[0].metadata
+            page_node = SummaryNode(
+                _node_id(PAGE, source, page),
+                PAGE,
+                None,
+                metadata={
+                    "source": source,
+                    "page": page,
+                    "page_label": first.get("page_label", str(page)),
+                    "document_date": document_date,
+                },
+            )
+            for chunk in page_chunks:
+                chunk.metadata["parent_id"] = page_node.node_id
+                page_node.child_ids.append(chunk.metadata["chunk_id"])
+            # A page belongs to the section named by its top heading.
+            pages.append((page_node, str(first.get("section") or "")))
+
+        for section, section_pages in groupby(pages, key=lambda item: item[1]):
+            section_pages = [node for node, _ in section_pages]
+            section_node = SummaryNode(
+                _node_id(SECTION, source, section_pages[0].node_id),
+                SECTION,
+                doc_id,
+                metadata={
+                    "source": source,
+                    "section": section,
+                    "page": section_pages[0].metadata["page"],
+                    "page_label": section_pages[0].metadata["page_label"],
+                    "document_date": document_date,
+                },
+            )
+            for page_node in section_pages:
+                page_node.parent_id = section_node.node_id
+                section_node.child_ids.append(page_node.node_id)
+            nodes.extend(section_pages)
+            nodes.append(section_node)
+            doc_node.child_ids.append(section_node.node_id)
+
+        nodes.append(doc_node)
+    return nodes
+
+
+def _summarize(level: str, content: str, max_words: int) -> str:
+    settings = get_settings()
+    response = get_chat_provider().complete(
+        model=settings.openai_model_name,
+        messages=[
+            {
+                "role": "system",
+                "content": SUMMARY_SYSTEM_PROMPT.format(level=level, max_words=max_words),
+            },
+            {"role": "user", "content": content},
+        ],
+        temperature=0.0,
+    )
+    return response.content.strip()
+
+
+def build_summary_index(
+    nodes: List[SummaryNode],
+    chunks: Sequence[Document],
+    collection: str | None = None,
+) -> int:
+    """Summarize every tree node bottom-up and store the summaries.
+
+    The previous summaries of every source in `nodes` are deleted first, so
+    pages and sections that no longer exist are not retrieved.
+
+    Args:
+        nodes: Output of `plan_summary_tree` (children before parents).
+        chunks: The chunks the tree was planned over.
+        collection: Collection the chunks were indexed into.
+
+    Returns:
+        Number of summary nodes stored.
+    """
+    settings = get_settings()
+    namespace = derived_namespace(collection, settings.summary_index_namespace)
+    texts: Dict[str, str] = {c.metadata["chunk_id"]: c.page_content for c in chunks}
+    max_words = {PAGE: 120, SECTION: 160, DOCUMENT: 200}
+
+    with ThreadPoolExecutor(max_workers=max(1, settings.summary_max_concurrency)) as pool:
+        for level in (PAGE, SECTION, DOCUMENT):
+            level_nodes = [node for node in nodes if node.level == level]
+            contents = [
+                "\n\n".join(texts[child] for child in node.child_ids if child in texts)
+                for node in level_nodes
+            ]
+            summaries = pool.map(
+                _summarize,
+                [level] * len(level_nodes),
+                contents,
+                [max_words[level]] * len(level_nodes),
+            )
+            for node, summary in zip(level_nodes, summaries):
+                node.summary = summary
+                texts[node.node_id] = summary
+
+    for source in dict.fromkeys(node.metadata.get("source") for node in nodes):
+        if source is not None:
+            delete_source(str(source), namespace)
+
+    documents = [
+        Document(
+            page_content=node.summary,
+            metadata={
+                **{k: v for k, v in node.metadata.items() if v is not None},
+                "level": node.level,
+                "node_id": node.node_id,
+                "parent_id": node.parent_id or "",
+                "child_ids": node.child_ids,
+            },
+        )
+        for node in nodes
+    ]
+    if documents:
+        _get_vector_store().add_documents(
+            documents,
+            ids=[node.node_id for node in nodes],
+            namespace=namespace,
+        )
+        bump_index_version()
+    return len(documents)
+
+
+def retrieve_summaries(
+    query: str,
+    levels: Sequence[str],
+    k: int,
+    collection: str | None = None,
+    metadata_filter: Dict[str, Any] | None = None,
+    query_vector: List[float] | None = None,
+) -> List[Tuple[Document, float]]:
+    """Search a collection's summary namespace restricted to the given tree levels."""
+    settings = get_settings()
+    level_filter: Dict[str, Any] = {"level": {"$in": list(levels)}}
+    vector_store = _get_vector_store()
+    if query_vector is None:
+        query_vector = vector_store.embeddings.embed_query(query)
+    return vector_store.similarity_search_by_vector_with_score(
+        query_vector,
+        k=k,
+        filter={"$and": [level_filter, metadata_filter]} if metadata_filter else level_filter,
+        namespace=derived_namespace(collection, settings.summary_index_namespace),
+    )
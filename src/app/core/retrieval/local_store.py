@@ -0,0 +1,437 @@
+"""Local, numpy-backed vector store used when `vector_backend="memory"`.
+
+Vectors are L2-normalized and kept in one float32 matrix, so a query is a
+single matrix-vector product and scores are cosine similarities, the same
+scale Pinecone returns for a cosine index. Namespaces and the subset of the
+Pinecone metadata filter language used by this app (`$eq`, `$ne`, `$in`,
+`$nin`, `$gt`, `$gte`, `$lt`, `$lte`, `$exists`, `$and`, `$or`) behave like
+their Pinecone counterparts, so callers do not care which backend is active.
+
+The store persists itself under a directory as `vectors.npy` (the matrix)
+and `rows.jsonl` (ID, namespace, text and metadata per row), written
+atomically by `flush()`. Writes stay in memory until then, so a writer
+flushes once per batch (e.g. once per ingested document) rather than
+rewriting both files after every upsert and delete. The matrix is loaded as a read-only memory
+map, so worker processes serving the same directory share one copy through
+the page cache, and a store reloads itself when another process rewrites
+the files. Writes go to a private buffer with spare rows that grows
+geometrically, so an upsert copies the matrix only when the buffer is full
+(or once, out of the memory map, on the first write after a load).
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+_VECTORS_FILE = "vectors.npy"
+_ROWS_FILE = "rows.jsonl"
+# Smallest write buffer, in rows.
+_MIN_CAPACITY = 256
+
+_COMPARATORS = {
+    "$eq": lambda value, arg: value == arg,
+    "$ne": lambda value, arg: value != arg,
+    "$in": lambda value, arg: value in arg,
+    "$nin": lambda value, arg: value not in arg,
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+}
+
+
+def matches_filter(metadata: Dict[str, Any], flt: Dict[str, Any] | None) -> bool:
+    """Evaluate a Pinecone-style metadata filter against one row."""
+    if not flt:
+        return True
+    for key, condition in flt.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, arg in condition.items():
+                if op == "$exists":
+                    if (key in metadata) != bool(arg):
+                        return False
+                elif op not in _COMPARATORS:
+                    raise ValueError(f"Unsupported filter operator '{op}'")
+                else:
+                    try:
+                        if not _COMPARATORS[op](value, arg):
+                            return False
+                    except TypeError:
+                        return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class LocalVectorStore(VectorStore):
+    """Exact cosine-similarity vector store held in process memory."""
+
+    def __init__(self, embedding: Embeddings, path: Path | None = None) -> None:
+        self._embedding = embedding
+        self._path = Path(path) if path is not None else None
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._namespaces: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._positions: Dict[Tuple[str, str], int] = {}
+        # Row indices per namespace, rebuilt lazily after writes.
+        self._namespace_rows: Dict[str, List[int]] | None = None
+        # Rows in use; a view of `_buffer`, which has spare rows for appends.
+        self._vectors: np.ndarray | None = None
+        self._buffer: np.ndarray | None = None
+        self._loaded_mtime_ns: int | None = None
+        # Writes not yet saved; they win over files rewritten meanwhile.
+        self._dirty = False
+        if self._path is not None and (self._path / _VECTORS_FILE).exists():
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # Persistence ---------------------------------------------------------
+
+    def _load(self) -> None:
+        ids: List[str] = []
+        namespaces: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        with open(self._path / _ROWS_FILE, encoding="utf-8") as f:
+            for row in map(json.loads, f):
+                ids.append(row["id"])
+                namespaces.append(row["namespace"])
+                texts.append(row["text"])
+                metadatas.append(row["metadata"])
+        vectors_file = self._path / _VECTORS_FILE
+        mtime_ns = vectors_file.stat().st_mtime_ns
+        vectors = np.load(vectors_file, mmap_mode="r")
+        # A concurrent writer can replace the files between the two reads;
+        # leave the mtime unset so the next access loads them again.
+        self._loaded_mtime_ns = mtime_ns if vectors.shape[0] == len(ids) else None
+        if vectors.shape[0] != len(ids):
+            return
+        self._vectors = self._buffer = vectors
+        self._ids, self._namespaces = ids, namespaces
+        self._texts, self._metadatas = texts, metadatas
+        self._positions = {(ns, vid): i for i, (ns, vid) in enumerate(zip(namespaces, ids))}
+        self._namespace_rows = None
+
+    def _reload_if_changed(self) -> None:
+        """Pick up files rewritten by another process (e.g. another worker)."""
+        if self._path is None or self._dirty:
+            return
+        try:
+            mtime_ns = (self._path / _VECTORS_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime_ns != self._loaded_mtime_ns:
+            self._load()
+
+    def save(self) -> None:
+        """Write the store to its directory (no-op for an unbacked store)."""
+        if self._path is None:
+            return
+        with self._lock:
+            self._path.mkdir(parents=True, exist_ok=True)
+            vectors_tmp = self._path / f"{_VECTORS_FILE}.tmp"
+            rows_tmp = self._path / f"{_ROWS_FILE}.tmp"
+            with open(vectors_tmp, "wb") as f:
+                np.save(f, self._matrix())
+            with open(rows_tmp, "w", encoding="utf-8") as f:
+                for row in zip(self._ids, self._namespaces, self._texts, self._metadatas):
+                    f.write(
+                        json.dumps(
+                            dict(zip(("id", "namespace", "text", "metadata"), row)),
+                            ensure_ascii=False,
+                        )
+                        + "\n"
+                    )
+            # Rows first: a reader triggered by the new matrix mtime must
+            # find matching rows.
+            os.replace(rows_tmp, self._path / _ROWS_FILE)
+            os.replace(vectors_tmp, self._path / _VECTORS_FILE)
+            self._loaded_mtime_ns = (self._path / _VECTORS_FILE).stat().st_mtime_ns
+            self._dirty = False
+
+    def flush(self) -> None:
+        """Save pending writes, if there are any."""
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def _matrix(self) -> np.ndarray:
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vectors
+
+    def _reserve(self, rows: int, dimension: int) -> np.ndarray:
+        """Return a writable buffer with room for `rows` rows.
+
+        The buffer is reallocated (at least doubling) only when it is
+        read-only, too small or of another dimension, so appends cost
+        amortized O(1) per row.
+        """
+        buffer = self._buffer
+        if (
+            buffer is not None
+            and buffer.flags.writeable
+            and buffer.shape[0] >= rows
+            and buffer.shape[1] == dimension
+        ):
+            return buffer
+        used = len(self._ids) if self._vectors is not None else 0
+        # Spare rows only when appending; an update just copies.
+        capacity = max(rows, 2 * used if rows > used else used, _MIN_CAPACITY)
+        grown = np.empty((capacity, dimension), dtype=np.float32)
+        if used:
+            grown[:used] = self._vectors
+        self._buffer = grown
+        self._vectors = grown[:used]
+        return grown
+
+    # Writes --------------------------------------------------------------
+
+    def add_vectors(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        namespace: str = "",
+        persist: bool = False,
+    ) -> List[str]:
+        """Upsert precomputed vectors (no embedding call).
+
+        Rows with an existing (namespace, id) are overwritten in place.
+
+        Args:
+            ids: Vector IDs.
+            vectors: Array of shape (len(ids), dimension).
+            texts: Chunk texts, aligned with `ids`.
+            metadatas: Metadata dicts, aligned with `ids`.
+            namespace: Target namespace ("" is the default namespace).
+            persist: Save to disk afterwards. By default the write is kept
+                in memory until `flush()`.
+
+        Returns:
+            The upserted IDs.
+        """
+        vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            self._reload_if_changed()
+            matrix = self._matrix()
+            if matrix.size and matrix.shape[1] != vectors.shape[1]:
+                raise ValueError(
+                    f"Vector dimension {vectors.shape[1]} does not match the "
+                    f"store's dimension {matrix.shape[1]}"
+                )
+            buffer = self._reserve(len(self._ids) + len(ids), vectors.shape[1])
+            for vector_id, vector, text, metadata in zip(ids, vectors, texts, metadatas):
+                key = (namespace, vector_id)
+                position = self._positions.get(key)
+                if position is not None:
+                    buffer[position] = vector
+                    self._texts[position] = text
+                    self._metadatas[position] = dict(metadata)
+                    continue
+                buffer[len(self._ids)] = vector
+                self._positions[key] = len(self._ids)
+                self._ids.append(vector_id)
+                self._namespaces.append(namespace)
+                self._texts.append(text)
+                self._metadatas.append(dict(metadata))
+                self._namespace_rows = None
+            self._vectors = buffer[: len(self._ids)]
+            self._dirty = True
+            if persist:
+                self.save()
+        return list(ids)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: List[dict] | None = None,
+        *,
+        ids: List[str] | None = None,
+        namespace: str = "",
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [os.urandom(12).hex() for _ in texts]
+        vectors = np.asarray(self._embedding.embed_documents(texts), dtype=np.float32)
+        return self.add_vectors(
+            ids, vectors, texts, metadatas, namespace=namespace,
+            persist=kwargs.get("persist", False),
+        )
+
+    def delete(self, ids: List[str] | None = None, **kwargs: Any) -> bool | None:
+        """Delete rows of one namespace by ID and/or Pinecone-style `filter`.
+
+        Like writes, deletes are kept in memory until `flush()` unless
+        `persist=True` is passed.
+        """
+        namespace = kwargs.get("namespace", "")
+        flt = kwargs.get("filter")
+        doomed = set(ids or ())
+        with self._lock:
+            self._reload_if_changed()
+            keep = [
+                i
+                for i in range(len(self._ids))
+                if not (
+                    self._namespaces[i] == namespace
+                    and (
+                        self._ids[i] in doomed
+                        or (flt is not None and matches_filter(self._metadatas[i], flt))
+                    )
+                )
+            ]
+            if len(keep) == len(self._ids):
+                return True
+            self._vectors = self._buffer = np.array(self._matrix()[keep], dtype=np.float32)
+            self._ids = [self._ids[i] for i in keep]
+            self._namespaces = [self._namespaces[i] for i in keep]
+            self._texts = [self._texts[i] for i in keep]
+            self._metadatas = [self._metadatas[i] for i in keep]
+            self._positions = {
+                (ns, vid): i for i, (ns, vid) in enumerate(zip(self._namespaces, self._ids))
+            }
+            self._namespace_rows = None
+            self._dirty = True
+            if kwargs.get("persist", False):
+                self.save()
+        return True
+
+    # Reads ---------------------------------------------------------------
+
+    def _rows_in(self, namespace: str) -> List[int]:
+        if self._namespace_rows is None:
+            rows: Dict[str, List[int]] = {}
+            for i, ns in enumerate(self._namespaces):
+                rows.setdefault(ns, []).append(i)
+            self._namespace_rows = rows
+        return self._namespace_rows.get(namespace, [])
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        filter: Dict[str, Any] | None = None,
+        namespace: str = "",
+    ) -> List[Tuple[Document, float]]:
+        """Top-k rows by cosine similarity within a namespace."""
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock:
+            self._reload_if_changed()
+            matrix = self._matrix()
+            # Only the namespace's rows are visited, and the filter is
+            # applied before scoring, so a narrow collection or filter
+            # shrinks the search itself.
+            candidates = [
+                i
+                for i in self._rows_in(namespace)
+                if filter is None or matches_filter(self._metadatas[i], filter)
+            ]
+            if not candidates or k <= 0:
+                return []
+            if len(candidates) == len(self._ids):
+                # Everything matches: score in place rather than copying
+                # every row out of the shared memory map.
+                scores = matrix @ query
+            else:
+                scores = matrix[candidates] @ query
+            top = min(k, len(candidates))
+            order = np.argpartition(-scores, top - 1)[:top]
+            order = order[np.argsort(-scores[order])]
+            return [
+                (
+                    Document(
+                        id=self._ids[candidates[j]],
+                        page_content=self._texts[candidates[j]],
+                        metadata=dict(self._metadatas[candidates[j]]),
+                    ),
+                    float(scores[j]),
+                )
+                for j in order
+            ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k=k, **kwargs
+        )
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    def namespaces(self) -> Dict[str, int]:
+        """Row count per namespace."""
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for ns in self._namespaces:
+                counts[ns] = counts.get(ns, 0) + 1
+        return counts
+
+    def iter_batches(
+        self, namespace: str, batch_size: int
+    ) -> Iterator[Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]]:
+        """Yield (ids, texts, metadatas, vectors) batches of one namespace."""
+        with self._lock:
+            rows = [i for i, ns in enumerate(self._namespaces) if ns == namespace]
+            ids, texts, metadatas = list(self._ids), list(self._texts), list(self._metadatas)
+            matrix = self._matrix()
+            # Upserts overwrite the write buffer in place; export a stable copy.
+            if matrix.flags.writeable:
+                matrix = matrix.copy()
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            yield (
+                [ids[i] for i in batch],
+                [texts[i] for i in batch],
+                [dict(metadatas[i]) for i in batch],
+                np.asarray(matrix[batch], dtype=np.float32),
+            )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: List[dict] | None = None,
+        *,
+        ids: List[str] | None = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, path=kwargs.pop("path", None))
+        store.add_texts(texts, metadatas, ids=ids, **kwargs)
+        return store
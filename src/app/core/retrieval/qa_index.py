@@ -0,0 +1,169 @@
+"""Ingest-time precomputed question/answer index.
+
+Our documents are fixed reports, so many user questions are predictable.
+At ingest time `build_qa_index` asks the LLM, once per section, for likely
+questions with grounded, cited answers, and stores the *questions* as
+vectors in a separate Pinecone namespace with the answer and its citations
+as metadata. Re-indexing a source first deletes its previous Q/A entries,
+so answers generated from an older version of a document are not served.
+
+At query time `lookup_precomputed_answer` embeds the question and, on a
+near-duplicate match (`qa_index_min_score`), returns the stored answer
+without any LLM call. Everything else falls through to the QA graph.
+"""
+
+import hashlib
+import json
+import re
+from itertools import groupby
+from typing import Any, Dict, List
+
+from langchain_core.documents import Document
+
+from ..agents.prompts import QA_GENERATION_SYSTEM_PROMPT
+from ..config import get_settings
+from ..llm.providers import get_chat_provider
+from .collections import derived_namespace
+from .serialization import serialize_chunks_with_ids
+from .vector_store import _get_vector_store, bump_index_version, delete_source
+
+_CITATION_RE = re.compile(r"\[(C\d+)\]")
+
+
+def _section_key(doc: Document) -> tuple:
+    return (
+        doc.metadata.get("source"),
+        doc.metadata.get("page"),
+        doc.metadata.get("section"),
+    )
+
+
+def _generate_items(context: str, max_questions: int) -> List[Dict[str, str]]:
+    settings = get_settings()
+    response = get_chat_provider().complete(
+        model=settings.openai_model_name,
+        messages=[
+            {
+                "role": "system",
+                "content": QA_GENERATION_SYSTEM_PROMPT.format(max_questions=max_questions),
+            },
+            {"role": "user", "content": f"Context:\n{context}"},
+        ],
+        temperature=0.0,
+        response_format={"type": "json_object"},
+    )
+    try:
+        payload = json.loads(response.content or "{}")
+    except json.JSONDecodeError:
+        return []
+    items = payload.get("items", [])
+    return [item for item in items if isinstance(item, dict)]
+
+
+def build_qa_index(chunks: List[Document], collection: str | None = None) -> int:
+    """Generate, embed and store precomputed Q/A pairs for indexed chunks.
+
+    Chunks are grouped by (source, page, section); each group gets one LLM
+    call. Answers whose citations do not resolve to chunks of that group
+    are discarded, so every stored answer is grounded in indexed text.
+
+    Args:
+        chunks: The chunk documents that were just indexed.
+        collection: Collection the chunks were indexed into.
+
+    Returns:
+        Number of question/answer pairs stored.
+    """
+    settings = get_settings()
+    namespace = derived_namespace(collection, settings.qa_index_namespace)
+    questions: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    ids: List[str] = []
+
+    for source in dict.fromkeys(doc.metadata.get("source") for doc in chunks):
+        if source is not None:
+            delete_source(str(source), namespace)
+
+    for _, group in groupby(chunks, key=_section_key):
+        section_chunks = list(group)
+        context, citation_map = serialize_chunks_with_ids(section_chunks)
+        for item in _generate_items(context, settings.qa_index_questions_per_section):
+            question = str(item.get("question", "")).strip()
+            answer = str(item.get("answer", "")).strip()
+            cited = set(_CITATION_RE.findall(answer))
+            if not question or not answer or not cited or not cited <= citation_map.keys():
+                continue
+
+            cited_docs = [
+                doc
+                for cid, doc in zip(citation_map, section_chunks)
+                if cid in cited
+            ]
+            cited_context, cited_citations = serialize_chunks_with_ids(
+                cited_docs, ids=[cid for cid in citation_map if cid in cited]
+            )
+            source = str(section_chunks[0].metadata.get("source", ""))
+            questions.append(question)
+            metadatas.append(
+                {
+                    "answer": answer,
+                    "context": cited_context,
+                    "citations": json.dumps(cited_citations),
+                    "source": source,
+                }
+            )
+            ids.append(hashlib.sha1(f"{source}|{question}".encode("utf-8")).hexdigest()[:24])
+
+    if questions:
+        _get_vector_store().add_texts(
+            questions, metadatas=metadatas, ids=ids, namespace=namespace
+        )
+    # Also after a pure deletion: cached answers may quote the old entries.
+    bump_index_version()
+    return len(questions)
+
+
+def lookup_precomputed_answer(
+    question: str,
+    collection: str | None = None,
+    query_vector: List[float] | None = None,
+) -> Dict[str, Any] | None:
+    """Answer from the precomputed index on a near-duplicate question.
+
+    Args:
+        question: The user's question.
+        collection: Collection whose precomputed answers to search.
+        query_vector: Precomputed embedding of `question` (optional).
+
+    Returns:
+        A result dict shaped like `run_qa_flow` output (with `route` set to
+        `"precomputed"`), or None when no stored question is similar enough.
+    """
+    settings = get_settings()
+    vector_store = _get_vector_store()
+    if query_vector is None:
+        query_vector = vector_store.embeddings.embed_query(question)
+    matches = vector_store.similarity_search_by_vector_with_score(
+        query_vector,
+        k=1,
+        namespace=derived_namespace(collection, settings.qa_index_namespace),
+    )
+    if not matches:
+        return None
+
+    doc, score = matches[0]
+    if score < settings.qa_index_min_score or "answer" not in doc.metadata:
+        return None
+
+    answer = str(doc.metadata["answer"])
+    return {
+        "question": question,
+        "answer": answer,
+        "draft_answer": answer,
+        "context": str(doc.metadata.get("context", "")),
+        "citations": json.loads(doc.metadata.get("citations") or "{}"),
+        "route": "precomputed",
+        "verified": True,
+        "degradations": [],
+        "precomputed_score": float(score),
+    }
@@ -5,9 +5,11 @@ from typing import List
 from langchain_core.documents import Document
 
 
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Sequence
 
-def serialize_chunks_with_ids(docs: List[Document]) -> Tuple[str, Dict[str, Any]]:
+def serialize_chunks_with_ids(
+    docs: List[Document], ids: Sequence[str] | None = None
+) -> Tuple[str, Dict[str, Any]]:
     """Serialize a list of Document objects into a formatted CONTEXT string with stable IDs.
 
     Formats chunks with stable IDs [C1], [C2], etc.
@@ -15,6 +17,8 @@ def serialize_chunks_with_ids(docs: List[Document]) -> Tuple[str, Dict[str, Any]
 
     Args:
         docs: List of Document objects with metadata.
+        ids: Optional explicit chunk IDs, one per document. Used by sessions
+            to keep IDs stable across turns; defaults to C1..Cn.
 
     Returns:
         Tuple containing:
@@ -24,17 +28,30 @@ def serialize_chunks_with_ids(docs: List[Document]) -> Tuple[str, Dict[str, Any]
     context_parts = []
     citation_map = {}
 
-    for idx, doc in enumerate(docs, start=1):
-        chunk_id = f"C{idx}"
+    if ids is None:
+        ids = [f"C{idx}" for idx in range(1, len(docs) + 1)]
+
+    for chunk_id, doc in zip(ids, docs):
         
         # Extract metadata
-        page_num = doc.metadata.get("page") or doc.metadata.get(
-            "page_number", "unknown"
-        )
+        page_num = doc.metadata.get("page_label") or doc.metadata.get("page")
+        if page_num is None:
+            page_num = doc.metadata.get("page_number", "unknown")
         source = doc.metadata.get("source", "unknown")
-        
+        section = doc.metadata.get("section") or None
+        level = doc.metadata.get("level", "chunk")
+
         # Format chunk with stable ID
-        chunk_header = f"[{chunk_id}] Chunk from page {page_num}:"
+        if level == "chunk":
+            chunk_header = f"[{chunk_id}] Chunk from page {page_num}"
+        elif level == "document":
+            chunk_header = f"[{chunk_id}] Document summary"
+        else:
+            # Hierarchical summary node (page or section)
+            chunk_header = f"[{chunk_id}] {level.title()} summary from page {page_num}"
+        if section:
+            chunk_header += f" ({section})"
+        chunk_header += ":"
         chunk_content = doc.page_content.strip()
 
         context_parts.append(f"{chunk_header}\n{chunk_content}")
@@ -44,6 +61,8 @@ def serialize_chunks_with_ids(docs: List[Document]) -> Tuple[str, Dict[str, Any]
             "id": chunk_id,
             "page": page_num,
             "source": source,
+            "section": section,
+            "score": doc.metadata.get("score"),
             "snippet": chunk_content[:150] + "..." if len(chunk_content) > 150 else chunk_content
         }
 
@@ -0,0 +1,191 @@
+"""Chunk sets that persist across the turns of a conversational session.
+
+A session's chunk set is plain data so it can live in graph state::
+
+    {
+        "next_id": 5,
+        "chunks": [{"id": "C1", "key": "...", "doc": Document, "cited": True}, ...],
+        "turns": [{"vector": [...], "keys": ["...", ...]}, ...],
+    }
+
+Chunks keep the [C#] ID they were first cited with for the lifetime of the
+session. IDs are never reused, even after a chunk is evicted. `turns` holds
+the query vector and retrieved chunk keys of the latest retrievals, so a
+follow-up close to an earlier question can re-use that turn's chunks
+without a vector query.
+
+Each turn only sends the text of the chunks retrieved (or re-used) for it;
+chunks cited by earlier answers are listed by ID and location, not
+repeated, so prompt size does not grow with the length of the session.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .serialization import serialize_chunks_with_ids
+
+# Query vectors kept per session for follow-up re-use.
+_MAX_TURNS = 4
+
+_CITATION_RE = re.compile(r"\[(C\d+)\]")
+
+
+def new_session_context() -> Dict[str, Any]:
+    """Return an empty session chunk set."""
+    return {"next_id": 1, "chunks": [], "turns": []}
+
+
+def chunk_key(doc: Document) -> str:
+    """Identity of a chunk across retrievals."""
+    return str(doc.metadata.get("chunk_id") or doc.id or hash(doc.page_content))
+
+
+def merge_session_chunks(
+    session_context: Dict[str, Any],
+    docs: Sequence[Document],
+    max_chunks: int,
+) -> Dict[str, Any]:
+    """Extend a session chunk set with newly retrieved documents.
+
+    Chunks already in the set keep their ID and stored text and are marked as
+    recently used; new chunks get the next free ID. When the set grows past
+    `max_chunks`, the least recently used chunks are evicted.
+
+    Args:
+        session_context: Existing chunk set (see module docstring).
+        docs: Documents retrieved for the current turn.
+        max_chunks: Upper bound on chunks kept in the set.
+
+    Returns:
+        A new chunk set; the input is not mutated.
+    """
+    entries: List[Dict[str, Any]] = list(session_context.get("chunks", []))
+    next_id = int(session_context.get("next_id", 1))
+    by_key = {entry["key"]: entry for entry in entries}
+
+    for doc in docs:
+        key = chunk_key(doc)
+        entry = by_key.get(key)
+        if entry is not None:
+            # Re-use the stored chunk; move it to the most-recent end.
+            entries.remove(entry)
+        else:
+            entry = {"id": f"C{next_id}", "key": key, "doc": doc, "cited": False}
+            by_key[key] = entry
+            next_id += 1
+        entries.append(entry)
+
+    if len(entries) > max_chunks:
+        entries = entries[len(entries) - max_chunks :]
+
+    return {**session_context, "next_id": next_id, "chunks": entries}
+
+
+def record_turn(
+    session_context: Dict[str, Any], vector: Sequence[float], docs: Sequence[Document]
+) -> Dict[str, Any]:
+    """Remember a retrieval's query vector and chunks for follow-up re-use."""
+    turn = {"vector": [float(x) for x in vector], "keys": [chunk_key(doc) for doc in docs]}
+    turns = list(session_context.get("turns", []))[-(_MAX_TURNS - 1) :] + [turn]
+    return {**session_context, "turns": turns}
+
+
+def reusable_chunks(
+    session_context: Dict[str, Any], vector: Sequence[float], min_similarity: float
+) -> List[Document] | None:
+    """Chunks of the earlier turn whose query is closest to `vector`.
+
+    Returns None (run a vector query) unless that turn's cosine similarity
+    is at least `min_similarity` and its chunks are still in the set.
+    """
+    turns = session_context.get("turns") or []
+    if not turns:
+        return None
+    query = np.asarray(vector, dtype=np.float32)
+    previous = np.asarray([turn["vector"] for turn in turns], dtype=np.float32)
+    norms = np.linalg.norm(previous, axis=1) * (np.linalg.norm(query) or 1.0)
+    similarities = previous @ query / np.where(norms == 0, 1.0, norms)
+    best = int(np.argmax(similarities))
+    if similarities[best] < min_similarity:
+        return None
+    by_key = {entry["key"]: entry["doc"] for entry in session_context.get("chunks", [])}
+    docs = [by_key[key] for key in turns[best]["keys"] if key in by_key]
+    return docs or None
+
+
+def serialize_session_turn(
+    session_context: Dict[str, Any], docs: Sequence[Document]
+) -> Tuple[str, Dict[str, Any]]:
+    """Serialize one turn's chunks with their stable session IDs.
+
+    `docs` (already merged into the set) are sent in full, in rank order.
+    Other chunks that earlier answers cited are appended as one-line
+    references so the model can keep citing them consistently.
+    """
+    by_key = {entry["key"]: entry for entry in session_context.get("chunks", [])}
+    current = [by_key[key] for key in dict.fromkeys(map(chunk_key, docs)) if key in by_key]
+    context, citations = serialize_chunks_with_ids(
+        [entry["doc"] for entry in current], ids=[entry["id"] for entry in current]
+    )
+
+    sent = {entry["id"] for entry in current}
+    earlier = sorted(
+        (
+            entry
+            for entry in session_context.get("chunks", [])
+            if entry.get("cited") and entry["id"] not in sent
+        ),
+        key=lambda entry: int(entry["id"][1:]),
+    )
+    if not earlier:
+        return context, citations
+    _, earlier_citations = serialize_chunks_with_ids(
+        [entry["doc"] for entry in earlier], ids=[entry["id"] for entry in earlier]
+    )
+    lines = ["Cited in earlier turns (text not repeated):"]
+    for entry in earlier:
+        meta = earlier_citations[entry["id"]]
+        where = f"page {meta['page']}" + (f" ({meta['section']})" if meta["section"] else "")
+        lines.append(f"- [{entry['id']}] {meta['source']}, {where}")
+    citations.update(earlier_citations)
+    return "\n\n".join(part for part in (context, "\n".join(lines)) if part), citations
+
+
+def mark_cited(session_context: Dict[str, Any], answer: str) -> Dict[str, Any]:
+    """Flag the session chunks cited in `answer`."""
+    cited = set(_CITATION_RE.findall(answer or ""))
+    if not cited:
+        return session_context
+    chunks = [
+        {**entry, "cited": True} if entry["id"] in cited else entry
+        for entry in session_context.get("chunks", [])
+    ]
+    return {**session_context, "chunks": chunks}
+
+
+def encode_session_context(session_context: Dict[str, Any]) -> bytes:
+    """Serialize a chunk set for storage outside the process."""
+    chunks = [
+        {
+            **{k: v for k, v in entry.items() if k != "doc"},
+            "doc": {
+                "id": entry["doc"].id,
+                "page_content": entry["doc"].page_content,
+                "metadata": entry["doc"].metadata,
+            },
+        }
+        for entry in session_context.get("chunks", [])
+    ]
+    return json.dumps({**session_context, "chunks": chunks}, default=str).encode("utf-8")
+
+
+def decode_session_context(data: bytes) -> Dict[str, Any]:
+    """Inverse of `encode_session_context`."""
+    session_context = json.loads(data)
+    for entry in session_context.get("chunks", []):
+        entry["doc"] = Document(**entry["doc"])
+    return session_context
@@ -1,48 +1,140 @@
-"""Vector store wrapper for Pinecone integration with LangChain."""
+"""Vector store wrapper for Pinecone integration with LangChain.
 
+`settings.vector_backend` selects Pinecone (default) or the local
+numpy-backed `LocalVectorStore`; both expose the LangChain vector store
+interface, including Pinecone-style namespaces and metadata filters.
+
+With `settings.chunk_store_enabled`, chunk text lives in the local chunk
+store and retrieval results are hydrated from it (see `chunk_store`).
+"""
+
+import threading
+from datetime import date
 from pathlib import Path
 from functools import lru_cache
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 from pinecone import Pinecone
+from pinecone.exceptions import NotFoundException
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
 from langchain_pinecone import PineconeVectorStore
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
 from ..config import get_settings
+from ..llm.factory import create_embeddings
+from ..shared_cache import get_shared_cache
+from .chunk_store import get_chunk_store, slim_metadata
+from .chunking import get_chunker
+from .collections import chunk_namespace, date_key
+from .local_store import LocalVectorStore
+
+
+# Pinecone rejects upsert requests over 2 MB. Values are sent as JSON
+# numbers, roughly this many bytes each.
+_PINECONE_MAX_REQUEST_BYTES = 2_000_000
+_JSON_BYTES_PER_VALUE = 22
+
+# Bumped whenever this process writes to the index. Used to key in-flight
+# request coalescing so answers computed before a re-index are not shared
+# with requests that arrive after it.
+_index_version = 0
+_SHARED_INDEX_VERSION = "index_version"
+
+
+def get_index_version() -> int:
+    """Return the current index version counter.
+
+    With the shared cache enabled the counter is shared by every worker
+    process, so a re-index through one worker is seen by all of them.
+    """
+    if get_settings().shared_cache_enabled:
+        return get_shared_cache().counter(_SHARED_INDEX_VERSION)
+    return _index_version
 
 
 @lru_cache(maxsize=1)
-def _get_vector_store() -> PineconeVectorStore:
-    """Create a PineconeVectorStore instance configured from settings."""
+def _get_pinecone_index():
+    """Create the Pinecone index client configured from settings."""
     settings = get_settings()
+    if not settings.pinecone_api_key or not settings.pinecone_index_name:
+        raise ValueError(
+            "pinecone_api_key and pinecone_index_name are required "
+            "when vector_backend is 'pinecone'"
+        )
 
     pc = Pinecone(api_key=settings.pinecone_api_key)
-    
+
     # Use explicit host if available (faster for serverless)
     if settings.pinecone_host:
-        index = pc.Index(settings.pinecone_index_name, host=settings.pinecone_host)
-    else:
-        index = pc.Index(settings.pinecone_index_name)
+        return pc.Index(settings.pinecone_index_name, host=settings.pinecone_host)
+    return pc.Index(settings.pinecone_index_name)
 
-    embeddings = OpenAIEmbeddings(
-        model=settings.openai_embedding_model_name,
-        api_key=settings.openai_api_key,
-    )
 
-    return PineconeVectorStore(
-        index=index,
-        embedding=embeddings,
-    )
+class _LazyEmbeddings(Embeddings):
+    """Creates the embedding model on first use.
+
+    Lets `serve.py` load the local store in the master process without
+    building an HTTP client there, which every forked worker would inherit.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._embeddings: Embeddings | None = None
+
+    def _get(self) -> Embeddings:
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = create_embeddings()
+            return self._embeddings
 
-def get_retriever(k: int | None = None):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._get().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._get().embed_query(text)
+
+
+@lru_cache(maxsize=1)
+def _get_vector_store() -> VectorStore:
+    """Create the vector store for the configured `vector_backend`."""
+    settings = get_settings()
+
+    if settings.vector_backend == "memory":
+        return LocalVectorStore(_LazyEmbeddings(), path=Path(settings.local_store_dir))
+    if settings.vector_backend == "pinecone":
+        return PineconeVectorStore(
+            index=_get_pinecone_index(),
+            embedding=create_embeddings(),
+        )
+    raise ValueError(f"Unknown vector_backend '{settings.vector_backend}'")
+
+def pinecone_upsert_batch_size(dimension: int, requested: int) -> int:
+    """Largest batch up to `requested` that fits one Pinecone upsert request."""
+    per_vector = dimension * _JSON_BYTES_PER_VALUE + 2_000  # + metadata and text
+    return max(1, min(requested, _PINECONE_MAX_REQUEST_BYTES // per_vector))
+
+
+def _hydrate(docs: List[Document]) -> List[Document]:
+    """Fill in chunk text from the local chunk store when it is enabled."""
+    if not get_settings().chunk_store_enabled:
+        return docs
+    return get_chunk_store().hydrate(docs)
+
+
+def get_retriever(
+    k: int | None = None,
+    collection: str | None = None,
+    metadata_filter: Dict[str, Any] | None = None,
+):
     """Get a Pinecone retriever instance.
 
     Args:
         k: Number of documents to retrieve (defaults to config value).
+        collection: Collection to search (None for the default collection).
+        metadata_filter: Pinecone metadata filter pushed down to the query.
 
     Returns:
         PineconeVectorStore instance configured as a retriever.
@@ -51,38 +143,228 @@ def get_retriever(k: int | None = None):
     if k is None:
         k = settings.retrieval_k
 
+    search_kwargs: Dict[str, Any] = {"k": k, "namespace": chunk_namespace(collection)}
+    if metadata_filter:
+        search_kwargs["filter"] = metadata_filter
     vector_store = _get_vector_store()
-    return vector_store.as_retriever(search_kwargs={"k": k})
+    return vector_store.as_retriever(search_kwargs=search_kwargs)
 
 
-def retrieve(query: str, k: int | None = None) -> List[Document]:
+def retrieve(
+    query: str,
+    k: int | None = None,
+    collection: str | None = None,
+    metadata_filter: Dict[str, Any] | None = None,
+) -> List[Document]:
     """Retrieve documents from Pinecone for a given query.
 
     Args:
         query: Search query string.
         k: Number of documents to retrieve (defaults to config value).
+        collection: Collection to search (None for the default collection).
+        metadata_filter: Pinecone metadata filter pushed down to the query.
 
     Returns:
         List of Document objects with metadata (including page numbers).
     """
-    retriever = get_retriever(k=k)
-    return retriever.invoke(query)
+    retriever = get_retriever(k=k, collection=collection, metadata_filter=metadata_filter)
+    return _hydrate(retriever.invoke(query))
 
-def index_documents(file_path: Path) -> int:
-    """Index a list of Document objects into the Pinecone vector store.
+def embed_query(query: str) -> List[float]:
+    """Embed a query with the vector store's embedding model."""
+    return _get_vector_store().embeddings.embed_query(query)
+
+
+def retrieve_with_scores(
+    query: str,
+    k: int | None = None,
+    collection: str | None = None,
+    metadata_filter: Dict[str, Any] | None = None,
+    query_vector: List[float] | None = None,
+) -> List[Tuple[Document, float]]:
+    """Retrieve documents together with their similarity scores.
 
     Args:
-        file_path: Path to the PDF file to index.
+        query: Search query string.
+        k: Number of candidates to fetch (defaults to config value).
+        collection: Collection to search (None for the default collection).
+        metadata_filter: Pinecone metadata filter pushed down to the query.
+        query_vector: Precomputed embedding of `query`, to avoid embedding
+            it again.
 
     Returns:
-        The number of documents indexed.
+        List of (Document, score) pairs, most similar first. Scores are
+        similarities, so higher is better.
+    """
+    settings = get_settings()
+    if k is None:
+        k = settings.retrieval_k
+    vector_store = _get_vector_store()
+    if query_vector is None:
+        query_vector = vector_store.embeddings.embed_query(query)
+    scored = vector_store.similarity_search_by_vector_with_score(
+        query_vector,
+        k=k,
+        namespace=chunk_namespace(collection),
+        filter=metadata_filter or None,
+    )
+    if not get_settings().chunk_store_enabled:
+        return scored
+    scores = {id(doc): score for doc, score in scored}
+    return [(doc, scores[id(doc)]) for doc in _hydrate([doc for doc, _ in scored])]
+
+
+def load_pdf_pages(file_path: Path, document_date: date | None = None) -> List[Document]:
+    """Parse a PDF into one document per page.
+
+    Args:
+        file_path: Path to the PDF file.
+        document_date: Date to filter this document by. Defaults to the
+            PDF's creation (or modification) date when it has a valid one.
+
+    Returns:
+        Page documents; `document_date` (YYYYMMDD) is set when known.
     """
-    loader = PyPDFLoader(str(file_path), mode="single")
-    docs = loader.load()
+    loader = PyPDFLoader(str(file_path), mode="page")
+    pages = loader.load()
+    for page in pages:
+        stamped = (
+            date_key(document_date)
+            or date_key(page.metadata.get("creationdate"))
+            or date_key(page.metadata.get("moddate"))
+        )
+        if stamped is not None:
+            page.metadata["document_date"] = stamped
+    return pages
+
+
+def load_pdf_chunks(file_path: Path, document_date: date | None = None) -> List[Document]:
+    """Load a PDF page by page and split it with the configured chunker.
+
+    Args:
+        file_path: Path to the PDF file.
+        document_date: Overrides the date read from the PDF metadata.
+
+    Returns:
+        Chunk documents carrying `page`, `section`, `chunk_id` and, when
+        known, `document_date` (YYYYMMDD) metadata.
+    """
+    return get_chunker().split_documents(load_pdf_pages(file_path, document_date))
+
 
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    texts = text_splitter.split_documents(docs)
+def delete_source(source: str, namespace: str) -> None:
+    """Delete every vector of one source document from a namespace."""
+    source_filter = {"source": {"$eq": source}}
+    vector_store = _get_vector_store()
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.delete(filter=source_filter, namespace=namespace)
+        return
+    try:
+        _get_pinecone_index().delete(filter=source_filter, namespace=namespace)
+    except NotFoundException:
+        # The namespace does not exist yet: nothing to delete.
+        pass
+
+
+def index_chunks(chunks: List[Document], collection: str | None = None) -> int:
+    """Embed and upsert already-chunked documents into the vector store.
+
+    Chunk IDs hash the chunk text, so the previous vectors of every source
+    in `chunks` are deleted first; otherwise chunks of an older version of
+    a re-indexed file would still be retrieved and cited.
+
+    Args:
+        chunks: Chunk documents as produced by `load_pdf_chunks`.
+        collection: Collection (namespace) to write into; None for the
+            default collection.
 
+    Returns:
+        The number of chunks indexed.
+    """
+    namespace = chunk_namespace(collection)
     vector_store = _get_vector_store()
-    vector_store.add_documents(texts)
-    return len(texts)
\ No newline at end of file
+    ids = [doc.metadata["chunk_id"] for doc in chunks]
+    for source in dict.fromkeys(doc.metadata.get("source") for doc in chunks):
+        if source is not None:
+            delete_source(source, namespace)
+    if get_settings().chunk_store_enabled:
+        # Text goes to the chunk store first, so a query never sees a vector
+        # it cannot hydrate.
+        get_chunk_store().put_many(chunks)
+        _upsert_slim(
+            ids,
+            vector_store.embeddings.embed_documents([doc.page_content for doc in chunks]),
+            [slim_metadata(doc.metadata) for doc in chunks],
+            namespace,
+        )
+    else:
+        vector_store.add_documents(chunks, ids=ids, namespace=namespace)
+    bump_index_version()
+    return len(chunks)
+
+
+def _upsert_slim(
+    ids: List[str], vectors: List[List[float]], metadatas: List[dict], namespace: str
+) -> None:
+    """Upsert vectors whose text lives in the chunk store.
+
+    The text field is kept but empty: `PineconeVectorStore` skips matches
+    without one.
+    """
+    vector_store = _get_vector_store()
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.add_vectors(ids, vectors, [""] * len(ids), metadatas, namespace)
+        return
+    payload = [
+        {"id": vector_id, "values": list(vector), "metadata": {**metadata, "text": ""}}
+        for vector_id, vector, metadata in zip(ids, vectors, metadatas)
+    ]
+    _get_pinecone_index().upsert(
+        vectors=payload,
+        namespace=namespace,
+        batch_size=pinecone_upsert_batch_size(len(vectors[0]) if vectors else 1, 100),
+        show_progress=False,
+    )
+
+
+def bump_index_version() -> None:
+    """Invalidate coalescing keys after an out-of-band index change."""
+    global _index_version
+    _index_version += 1
+    if get_settings().shared_cache_enabled:
+        get_shared_cache().increment(_SHARED_INDEX_VERSION)
+
+
+def flush_index() -> None:
+    """Persist buffered writes of the local store and publish them.
+
+    `LocalVectorStore` keeps upserts and deletes in memory, so an ingest
+    calls this once when it is done; other processes see the new vectors
+    only afterwards, which is why the index version is bumped again here.
+    Pinecone writes are remote already, so for it this only bumps the
+    version.
+    """
+    vector_store = _get_vector_store()
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.flush()
+    bump_index_version()
+
+
+def index_documents(
+    file_path: Path,
+    collection: str | None = None,
+    document_date: date | None = None,
+) -> int:
+    """Index a list of Document objects into the Pinecone vector store.
+
+    Args:
+        file_path: Path to the PDF file to index.
+        collection: Collection (namespace) to write into.
+        document_date: Overrides the date read from the PDF metadata.
+
+    Returns:
+        The number of documents indexed.
+    """
+    indexed = index_chunks(load_pdf_chunks(file_path, document_date), collection)
+    flush_index()
+    return indexed
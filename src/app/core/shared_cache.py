@@ -0,0 +1,144 @@
+"""Cross-process cache shared by all workers of a multi-process server.
+
+Backed by one SQLite database in WAL mode, so every worker forked by
+`serve.py` (or any other process on the host) sees the same entries:
+
+- stateless answers, keyed by normalized question and index version;
+- query embeddings, so a question embedded by one worker is free for the
+  others;
+- conversational session chunk sets, so consecutive turns of a session can
+  be served by different workers;
+- named counters, used to share the index version so a re-index through
+  one worker invalidates cached answers in all of them.
+
+Entries expire after `settings.shared_cache_ttl_seconds` and the table is
+trimmed to `settings.shared_cache_max_entries`. Connections are opened
+lazily per process, so the cache is safe to create before forking.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from .config import get_settings
+from .metrics import metrics
+
+# Expired/overflow entries are swept every this many writes.
+_SWEEP_EVERY = 256
+
+
+def cache_key(*parts: object) -> str:
+    """Stable key for a tuple of values."""
+    return hashlib.sha1("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+class SharedCache:
+    """Small TTL key/value store plus counters, shared across processes."""
+
+    def __init__(self, path: Path, ttl_seconds: float, max_entries: int) -> None:
+        self._path = Path(path)
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork: reopen in each process.
+        if self._conn is None or self._pid != os.getpid():
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                " name TEXT PRIMARY KEY, value INTEGER NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+            self._writes = 0
+        return self._conn
+
+    def get(self, namespace: str, key: str) -> bytes | None:
+        """Return a live entry, or None."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?",
+                (f"{namespace}:{key}", time.time()),
+            ).fetchone()
+        metrics.increment(
+            "shared_cache_lookups_total",
+            namespace=namespace,
+            outcome="hit" if row else "miss",
+        )
+        return row[0] if row else None
+
+    def set(
+        self, namespace: str, key: str, value: bytes, ttl_seconds: float | None = None
+    ) -> None:
+        """Insert or replace an entry with the configured (or the given) TTL."""
+        ttl = self._ttl if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (f"{namespace}:{key}", value, time.time() + ttl),
+            )
+            self._writes += 1
+            if self._writes % _SWEEP_EVERY == 0:
+                self._sweep(conn)
+            conn.commit()
+
+    def _sweep(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            " SELECT key FROM entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self._max_entries,),
+        )
+
+    def counter(self, name: str) -> int:
+        """Current value of a named counter (0 if never incremented)."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM counters WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def increment(self, name: str) -> int:
+        """Atomically increment a named counter and return the new value."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+            conn.commit()
+            return conn.execute(
+                "SELECT value FROM counters WHERE name = ?", (name,)
+            ).fetchone()[0]
+
+
+@lru_cache(maxsize=1)
+def get_shared_cache() -> SharedCache:
+    """Get the process-wide shared cache handle (singleton via LRU cache)."""
+    settings = get_settings()
+    return SharedCache(
+        Path(settings.shared_cache_path),
+        ttl_seconds=settings.shared_cache_ttl_seconds,
+        max_entries=settings.shared_cache_max_entries,
+    )
@@ -0,0 +1,251 @@
+"""Opt-in capture of API traffic for time-accurate replay.
+
+With `settings.capture_enabled`, `TrafficCaptureMiddleware` records every
+request to `settings.capture_paths` as one JSON line:
+
+- `ts`: arrival time (epoch seconds), used by `replay_traffic.py` to keep
+  the original inter-arrival times;
+- `method`, `path`, `query`, `content_type`;
+- the request body: JSON bodies inline (`body`), after redaction; other
+  bodies (PDF uploads) as a content-addressed blob under `blobs/` when
+  `capture_store_uploads` is set, otherwise only their size and hash;
+- `status` and `latency_seconds` as observed by the server;
+- fields the endpoint adds through `annotate` (per-stage timings, route,
+  degradations).
+
+Redaction: string values of JSON fields named in `capture_redact_fields`
+are replaced by `[REDACTED:<hash>]`, so equal values stay equal (replayed
+traffic keeps its coalescing and cache-hit pattern). `capture_redact_pattern`
+is a regex masked the same way in every JSON string. Upload blobs are not
+redacted. Request headers are not recorded.
+
+Lines are written by a background thread to per-process files in
+`capture_dir`, rotated at `capture_max_file_bytes`; the oldest files are
+removed beyond `capture_max_files`. Records that cannot be prepared or
+written are counted in `capture_errors_total` (by stage) and the writer
+moves on, so a full disk never stops the capture thread for good.
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from .config import get_settings
+from .metrics import metrics
+
+_current: contextvars.ContextVar[Dict[str, Any] | None] = contextvars.ContextVar(
+    "traffic_capture_record", default=None
+)
+
+
+def annotate(**fields: Any) -> None:
+    """Attach extra fields to the captured record of the current request."""
+    record = _current.get()
+    if record is not None:
+        record.update(fields)
+
+
+def _mask(value: str) -> str:
+    return f"[REDACTED:{hashlib.sha1(value.encode('utf-8')).hexdigest()[:12]}]"
+
+
+def redact(value: Any, fields: frozenset, pattern: re.Pattern | None) -> Any:
+    """Redact named fields and pattern matches in a decoded JSON value."""
+    if isinstance(value, dict):
+        return {
+            key: (
+                _mask(json.dumps(item, sort_keys=True))
+                if key in fields
+                else redact(item, fields, pattern)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item, fields, pattern) for item in value]
+    if isinstance(value, str) and pattern is not None:
+        return pattern.sub(lambda match: _mask(match.group(0)), value)
+    return value
+
+
+_Pending = Tuple[Dict[str, Any], bytes, bool]
+
+
+class _RotatingWriter(threading.Thread):
+    """Finish and append records to rotating JSONL files off the event loop."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_file_bytes: int,
+        max_files: int,
+        prepare: Callable[[Dict[str, Any], bytes, bool], None],
+    ) -> None:
+        super().__init__(name="traffic-capture", daemon=True)
+        self._directory = directory
+        self._max_file_bytes = max_file_bytes
+        self._max_files = max_files
+        self._prepare = prepare
+        self._queue: "queue.Queue[_Pending]" = queue.Queue(maxsize=10_000)
+        self._file = None
+        self._written = 0
+
+    def submit(self, record: Dict[str, Any], body: bytes, truncated: bool) -> None:
+        try:
+            self._queue.put_nowait((record, body, truncated))
+        except queue.Full:
+            metrics.increment("capture_dropped_total")
+
+    def _open(self) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        if self._file is not None:
+            self._file.close()
+        name = f"capture-{time.time_ns()}-{os.getpid()}.jsonl"
+        self._file = open(self._directory / name, "a", encoding="utf-8")
+        self._written = 0
+        # Other workers rotate the same directory; skip files they removed.
+        dated = []
+        for path in self._directory.glob("capture-*.jsonl"):
+            try:
+                dated.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        files = [path for _, path in sorted(dated)]
+        for old in files[: max(0, len(files) - self._max_files)]:
+            old.unlink(missing_ok=True)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        if self._file is None or self._written >= self._max_file_bytes:
+            self._open()
+        self._file.write(line)
+        self._written += len(line.encode("utf-8"))
+        # Flush once the burst is drained, not per line.
+        if self._queue.empty():
+            self._file.flush()
+
+    def _discard_file(self) -> None:
+        """Drop the current file after a write error; the next record reopens."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+
+    def run(self) -> None:
+        while True:
+            record, body, truncated = self._queue.get()
+            try:
+                self._prepare(record, body, truncated)
+            except Exception:
+                # The record is still written, without its body.
+                metrics.increment("capture_errors_total", stage="body")
+            try:
+                self._write(record)
+            except (TypeError, ValueError):
+                # A field added through `annotate` is not JSON-serializable.
+                metrics.increment("capture_errors_total", stage="encode")
+            except OSError:
+                metrics.increment("capture_errors_total", stage="write")
+                self._discard_file()
+
+
+class TrafficCaptureMiddleware:
+    """Pure ASGI middleware, so streaming and disconnect detection are unaffected."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+        settings = get_settings()
+        self._paths = frozenset(settings.capture_paths)
+        self._directory = Path(settings.capture_dir)
+        self._max_body = settings.capture_max_body_bytes
+        self._store_uploads = settings.capture_store_uploads
+        self._redact_fields = frozenset(settings.capture_redact_fields)
+        self._redact_pattern = (
+            re.compile(settings.capture_redact_pattern) if settings.capture_redact_pattern else None
+        )
+        self._writer = _RotatingWriter(
+            self._directory,
+            settings.capture_max_file_bytes,
+            settings.capture_max_files,
+            prepare=self._attach_body,
+        )
+        self._writer.start()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self._paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        record: Dict[str, Any] = {
+            "ts": time.time(),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "content_type": headers.get(b"content-type", b"").decode("latin-1"),
+            "status": None,
+        }
+        started = time.perf_counter()
+        body = bytearray()
+        truncated = False
+
+        async def capture_receive():
+            nonlocal truncated
+            message = await receive()
+            if message["type"] == "http.request" and not truncated:
+                chunk = message.get("body", b"")
+                if len(body) + len(chunk) > self._max_body:
+                    truncated = True
+                    body.clear()
+                else:
+                    body.extend(chunk)
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                record["status"] = message["status"]
+            await send(message)
+
+        token = _current.set(record)
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            _current.reset(token)
+            record["latency_seconds"] = time.perf_counter() - started
+            if record["status"] is None:
+                # The app raised before responding (or the client vanished).
+                record["status"] = 500
+            self._writer.submit(record, bytes(body), truncated)
+
+    def _attach_body(self, record: Dict[str, Any], body: bytes, truncated: bool) -> None:
+        if truncated:
+            record["body_truncated"] = True
+            return
+        if record["content_type"].startswith("application/json"):
+            try:
+                decoded = json.loads(body or b"null")
+            except ValueError:
+                decoded = None
+            record["body"] = redact(decoded, self._redact_fields, self._redact_pattern)
+            return
+        if not body:
+            return
+        digest = hashlib.sha1(body).hexdigest()
+        record["body_sha1"] = digest
+        record["body_bytes"] = len(body)
+        if self._store_uploads:
+            blob = self._directory / "blobs" / digest
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                tmp = blob.with_suffix(f".tmp{os.getpid()}")
+                tmp.write_bytes(body)
+                os.replace(tmp, blob)
+            record["body_blob"] = f"blobs/{digest}"
@@ -1,4 +1,31 @@
-from pydantic import BaseModel
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class QueryFilters(BaseModel):
+    """Metadata filters applied inside the vector query.
+
+    `sources` restricts retrieval to the given document sources (as shown
+    in citations). Pages are 1-based and inclusive, as shown in citations;
+    dates bound the document date (taken from the PDF metadata or given
+    at upload).
+    """
+
+    sources: list[str] | None = Field(default=None, min_length=1)
+    page_from: int | None = Field(default=None, ge=1)
+    page_to: int | None = Field(default=None, ge=1)
+    date_from: date | None = None
+    date_to: date | None = None
+
+    @model_validator(mode="after")
+    def _check_ranges(self) -> "QueryFilters":
+        if self.page_from and self.page_to and self.page_from > self.page_to:
+            raise ValueError("`page_from` must not be after `page_to`.")
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("`date_from` must not be after `date_to`.")
+        return self
 
 
 class QuestionRequest(BaseModel):
@@ -6,9 +33,46 @@ class QuestionRequest(BaseModel):
 
     The PRD specifies a single field named `question` that contains
     the user's natural language question about the vector databases paper.
+
+    Passing a `session_id` makes the request part of a conversation: the
+    server keeps the chunks retrieved for earlier turns and follow-ups
+    extend them, keeping [C#] IDs stable across turns.
+
+    `latency_budget_ms` overrides the server's default latency budget for
+    this request.
+
+    `request_id` is an optional client-chosen idempotency key. If a request
+    fails part-way (e.g. a transient provider error during verification),
+    retrying it with the same `request_id` resumes at the failed stage.
+
+    `collection` selects the collection (tenant namespace) to answer from;
+    omit it for the default collection. `filters` narrows retrieval by
+    source, page range and document date.
+
+    `mode` picks the QA graph for this request: `staged` (summarize, then
+    verify) or `fused` (one structured call with locally checked claims).
+    It defaults to the server's `qa_graph_mode`.
     """
 
     question: str
+    session_id: str | None = None
+    latency_budget_ms: int | None = Field(default=None, gt=0)
+    request_id: str | None = Field(default=None, min_length=1, max_length=128)
+    collection: str | None = None
+    filters: QueryFilters | None = None
+    mode: Literal["staged", "fused"] | None = None
+
+
+class Claim(BaseModel):
+    """A quote-checked claim behind a fused-mode answer.
+
+    `citations` are the [C#] IDs of the chunks supporting the claim, and
+    `quotes` the verbatim snippets found in those chunks.
+    """
+
+    text: str
+    citations: list[str]
+    quotes: list[str]
 
 
 class QAResponse(BaseModel):
@@ -17,8 +81,19 @@ class QAResponse(BaseModel):
     From the API consumer's perspective we only expose the final,
     verified answer plus some metadata (e.g. context snippets).
     Internal draft answers remain inside the agent pipeline.
+
+    `degradations` lists the latency-budget degradations applied (e.g.
+    `skipped_verification`); `verified` is False when the answer is the
+    unverified draft. `route` is the model route chosen by the router
+    (`easy` or `hard`). `claims` lists the quote-checked claims behind the
+    answer (fused mode only).
     """
 
     answer: str
     context: str
     citations: dict[str, dict] | None = None
+    session_id: str | None = None
+    degradations: list[str] = []
+    verified: bool = True
+    route: str | None = None
+    claims: list[Claim] | None = None
@@ -0,0 +1,137 @@
+"""Admission control for the `/qa` endpoint.
+
+At most `max_concurrency` requests run the QA graph at once; up to
+`max_queue` more wait in FIFO order. Anything beyond that is rejected
+immediately with 429, and a queued request that cannot start within
+`queue_timeout` seconds is rejected with 503. Both carry a `Retry-After`
+hint so clients back off instead of piling up.
+
+The controller runs entirely on the event loop, so it needs no locks.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Deque
+
+from fastapi import status
+
+from ..core.config import get_settings
+from ..core.metrics import metrics
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, status_code: int, retry_after: int, reason: str) -> None:
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """Bounded-concurrency gate with a bounded FIFO wait queue."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _publish(self) -> None:
+        metrics.set_gauge("qa_admission_in_flight", self._active)
+        metrics.set_gauge("qa_admission_queue_depth", len(self._waiters))
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejected:
+        metrics.increment("qa_admission_rejected_total", reason=reason)
+        return AdmissionRejected(status_code, self.retry_after, reason)
+
+    async def _acquire(self) -> None:
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(status.HTTP_429_TOO_MANY_REQUESTS, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot right as the timeout fired; keep it.
+                return
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            raise self._reject(status.HTTP_503_SERVICE_UNAVAILABLE, "queue_timeout")
+        except asyncio.CancelledError:
+            # Client went away while queued. Hand back a slot we were
+            # granted in the meantime, otherwise just leave the queue.
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            metrics.increment("qa_admission_cancelled_total", stage="queued")
+            raise
+        finally:
+            metrics.observe("qa_admission_wait_seconds", time.perf_counter() - started)
+            self._publish()
+
+    def _release(self) -> None:
+        # Transfer the slot straight to the next live waiter, if any.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish()
+                return
+        self._active -= 1
+        self._publish()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one execution slot for the duration of the block.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out.
+        """
+        await self._acquire()
+        self._publish()
+        try:
+            yield
+        finally:
+            self._release()
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller (singleton via LRU cache)."""
+    settings = get_settings()
+    return AdmissionController(
+        max_concurrency=settings.qa_max_concurrency,
+        max_queue=settings.qa_max_queue,
+        queue_timeout=settings.qa_queue_timeout_seconds,
+        retry_after=settings.qa_retry_after_seconds,
+    )
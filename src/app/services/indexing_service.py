@@ -1,19 +1,49 @@
 """Service functions for indexing documents into the vector database."""
 
+from datetime import date
 from pathlib import Path
 
-from langchain_community.document_loaders import PyPDFLoader
+from ..core.config import get_settings
+from ..core.retrieval.hierarchy import build_summary_index, plan_summary_tree
+from ..core.retrieval.qa_index import build_qa_index
+from ..core.retrieval.vector_store import flush_index, index_chunks, load_pdf_chunks
 
-from ..core.retrieval.vector_store import index_documents
 
-
-def index_pdf_file(file_path: Path) -> int:
+def index_pdf_file(
+    file_path: Path,
+    collection: str | None = None,
+    document_date: date | None = None,
+) -> int:
     """Load a PDF from disk and index it into the vector DB.
 
+    Optional ingest-time stages, each behind a setting:
+    - `hierarchy_enabled`: page/section/document summary tree
+      (see `core.retrieval.hierarchy`).
+    - `qa_index_enabled`: precomputed likely questions and grounded answers
+      (see `core.retrieval.qa_index`).
+
     Args:
         file_path: Path to the PDF file on disk.
+        collection: Collection (tenant namespace) to index into; None for
+            the default collection.
+        document_date: Overrides the date read from the PDF metadata.
 
     Returns:
         Number of document chunks indexed.
     """
-    return index_documents(file_path)
+    settings = get_settings()
+    chunks = load_pdf_chunks(file_path, document_date)
+
+    # Planning stamps parent links onto the chunks, so it runs before upsert.
+    summary_nodes = plan_summary_tree(chunks) if settings.hierarchy_enabled else []
+    indexed = index_chunks(chunks, collection)
+
+    if summary_nodes:
+        build_summary_index(summary_nodes, chunks, collection)
+    if settings.qa_index_enabled:
+        build_qa_index(chunks, collection)
+    # Every stage above only buffers writes to the local store; persist
+    # them once, rather than rewriting the store after each upsert.
+    flush_index()
+
+    return indexed
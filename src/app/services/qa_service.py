@@ -5,18 +5,183 @@ with the multi-agent RAG pipeline without depending directly on LangGraph
 or agent implementation details.
 """
 
+import json
+import threading
 from typing import Dict, Any
 
 from ..core.agents.graph import run_qa_flow
+from ..core.concurrency import CancelToken, SingleFlight
+from ..core.config import get_settings
+from ..core.metrics import metrics
+from ..core.retrieval.qa_index import lookup_precomputed_answer
+from ..core.retrieval.session_chunks import mark_cited
+from ..core.retrieval.vector_store import embed_query, get_index_version
+from ..core.shared_cache import cache_key, get_shared_cache
+from .session_store import get_session_store
 
 
-def answer_question(question: str) -> Dict[str, Any]:
+# Concurrent identical questions share a single graph execution.
+_in_flight: SingleFlight[Dict[str, Any]] = SingleFlight()
+
+# Result fields kept in the cross-process answer cache.
+_CACHED_ANSWER_KEYS = (
+    "answer",
+    "draft_answer",
+    "context",
+    "citations",
+    "verified",
+    "route",
+    "degradations",
+    "claims",
+)
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for request coalescing.
+
+    Case, surrounding whitespace, internal runs of whitespace and trailing
+    punctuation do not change what the graph retrieves or answers.
+    """
+    return " ".join(question.casefold().split()).rstrip("?!. ")
+
+
+def _answer_stateless(
+    question: str,
+    token: CancelToken,
+    deadline: float | None,
+    request_id: str | None,
+    answer_key: str,
+    collection: str | None,
+    metadata_filter: Dict[str, Any] | None,
+    mode: str,
+) -> Dict[str, Any]:
+    """Answer from the shared cache, the precomputed Q/A index, or the graph."""
+    settings = get_settings()
+    if settings.shared_cache_enabled:
+        cached = get_shared_cache().get("answer", answer_key)
+        if cached is not None:
+            return json.loads(cached)
+
+    result = None
+    query_vector = None
+    # Precomputed answers were generated without any filter in mind.
+    if settings.qa_index_enabled and not metadata_filter:
+        token.raise_if_cancelled()
+        # Embedded once for both the lookup and, on a miss, retrieval.
+        query_vector = embed_query(question)
+        result = lookup_precomputed_answer(question, collection, query_vector=query_vector)
+        metrics.increment(
+            "qa_precomputed_total", outcome="hit" if result is not None else "miss"
+        )
+    if result is None:
+        result = run_qa_flow(
+            question,
+            cancel_token=token,
+            deadline=deadline,
+            request_id=request_id,
+            collection=collection,
+            metadata_filter=metadata_filter,
+            mode=mode,
+            query_vector=query_vector,
+        )
+
+    # Degraded answers reflect one request's deadline; do not serve them
+    # to everyone else.
+    if settings.shared_cache_enabled and not result.get("degradations"):
+        cached_result = {k: result.get(k) for k in _CACHED_ANSWER_KEYS}
+        get_shared_cache().set("answer", answer_key, json.dumps(cached_result).encode())
+    return result
+
+
+def answer_question(
+    question: str,
+    session_id: str | None = None,
+    cancel_event: threading.Event | None = None,
+    deadline: float | None = None,
+    request_id: str | None = None,
+    collection: str | None = None,
+    metadata_filter: Dict[str, Any] | None = None,
+    mode: str | None = None,
+    latency_budget: float | None = None,
+) -> Dict[str, Any]:
     """Run the multi-agent QA flow for a given question.
 
+    Concurrent calls with the same normalized question, collection, filter,
+    graph mode and latency budget against the same index version attach to
+    one in-flight execution and all receive its result (or its exception).
+
+    Stateless questions that closely match a precomputed question are
+    answered from the ingest-time Q/A index without an LLM call. With the
+    shared cache enabled, stateless answers are also shared across worker
+    processes until the index changes.
+
+    Session requests are never coalesced: each turn builds on its own
+    session's chunk set, and turns of one session run one at a time. A
+    session's context is kept per collection and filter, so turns against
+    another collection or filter never see its chunks.
+
     Args:
         question: User's natural language question about the vector databases paper.
+        session_id: Optional conversational session identifier.
+        cancel_event: Set by the caller (e.g. on client disconnect) to stop
+            waiting. The graph itself is only cancelled once every caller
+            attached to it has cancelled.
+        deadline: Absolute latency deadline (epoch seconds) propagated
+            through the graph. Coalesced callers share the leader's deadline.
+        latency_budget: The budget (seconds) `deadline` was derived from.
+            Only callers with the same budget are coalesced, so a waiter's
+            own deadline is never earlier than the leader's. Without it,
+            callers with a deadline are not coalesced.
+        request_id: Client-chosen ID for checkpointing. A retry with the ID
+            of a request that failed part-way resumes at the failed stage.
+            Coalesced callers share the leader's checkpoint thread.
+        collection: Collection (tenant namespace) to answer from; None for
+            the default collection.
+        metadata_filter: Metadata filter pushed down to the vector query.
+        mode: QA graph variant (`"staged"` or `"fused"`); defaults to
+            `settings.qa_graph_mode`.
 
     Returns:
         Dictionary containing at least `answer` and `context` keys.
     """
-    return run_qa_flow(question)
+    mode = mode or get_settings().qa_graph_mode
+    scope = (
+        collection or "",
+        json.dumps(metadata_filter, sort_keys=True) if metadata_filter else "",
+    )
+    if session_id is not None:
+        store = get_session_store()
+        session_key = "\x1f".join((session_id, *scope))
+        with store.turn(session_key) as session_context:
+            result = run_qa_flow(
+                question,
+                session_context=session_context,
+                cancel_token=CancelToken(cancel_event),
+                deadline=deadline,
+                request_id=request_id,
+                collection=collection,
+                metadata_filter=metadata_filter,
+                mode=mode,
+            )
+            updated = result.get("session_context") or session_context
+            store.save(session_key, mark_cited(updated, result.get("answer")))
+        return result
+
+    key = (normalize_question(question), *scope, mode, get_index_version())
+    # The answer cache ignores the budget; degraded answers are not cached.
+    budget_key = latency_budget if latency_budget is not None else deadline
+    result, _shared = _in_flight.do(
+        (*key, budget_key),
+        lambda token: _answer_stateless(
+            question,
+            token,
+            deadline,
+            request_id,
+            cache_key(*key),
+            collection,
+            metadata_filter,
+            mode,
+        ),
+        cancel_event=cancel_event,
+    )
+    return result
@@ -0,0 +1,121 @@
+"""Server-side store for conversational QA sessions.
+
+Each session keeps the chunk set retrieved over its previous turns so
+follow-up questions can extend it instead of retrieving from scratch.
+Sessions expire after `session_ttl_seconds` of inactivity and the store
+holds at most `session_max_sessions`, evicting the least recently used.
+
+With the shared cache enabled (as `serve.py` does for more than one
+worker), chunk sets are also written to it after every turn and read back
+at the start of the next, so a session survives moving between workers.
+Turns of one session are only serialized within a worker; concurrent turns
+of the same session on two workers race, and the later save wins.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator
+
+from ..core.config import get_settings
+from ..core.retrieval.session_chunks import (
+    decode_session_context,
+    encode_session_context,
+    new_session_context,
+)
+from ..core.shared_cache import SharedCache, cache_key, get_shared_cache
+
+_NAMESPACE = "session"
+
+
+class SessionStore:
+    """Thread-safe in-memory session store with TTL and LRU size limits."""
+
+    def __init__(
+        self, ttl_seconds: float, max_sessions: int, shared: SharedCache | None = None
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._shared = shared
+        self._lock = threading.Lock()
+        # session_id -> (last_used, session_context, per-session turn lock)
+        self._sessions: "OrderedDict[str, tuple[float, Dict[str, Any], threading.Lock]]" = (
+            OrderedDict()
+        )
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            session_id, (last_used, _, _) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def _entry(self, session_id: str) -> tuple[float, Dict[str, Any], threading.Lock]:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = (now, new_session_context(), threading.Lock())
+            else:
+                entry = (now, entry[1], entry[2])
+            self._sessions[session_id] = entry
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return entry
+
+    @contextmanager
+    def turn(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """Serialize the turns of one session and yield its chunk set.
+
+        Turns of the same session run one at a time so a follow-up always
+        sees the chunks retrieved by the previous turn. Use `save` inside
+        the block to store the updated chunk set.
+        """
+        _, context, turn_lock = self._entry(session_id)
+        with turn_lock:
+            # Re-read in case a concurrent turn saved while we were waiting.
+            with self._lock:
+                entry = self._sessions.get(session_id)
+            if entry is not None:
+                context = entry[1]
+            if self._shared is not None:
+                # Another worker may have served the previous turn.
+                stored = self._shared.get(_NAMESPACE, cache_key(session_id))
+                if stored is not None:
+                    context = decode_session_context(stored)
+            yield context
+
+    def save(self, session_id: str, session_context: Dict[str, Any]) -> None:
+        """Store the chunk set produced by the latest turn."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            turn_lock = entry[2] if entry is not None else threading.Lock()
+            self._sessions[session_id] = (now, session_context, turn_lock)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+        if self._shared is not None:
+            self._shared.set(
+                _NAMESPACE,
+                cache_key(session_id),
+                encode_session_context(session_context),
+                ttl_seconds=self.ttl_seconds,
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore:
+    """Get the process-wide session store (singleton via LRU cache)."""
+    settings = get_settings()
+    return SessionStore(
+        ttl_seconds=settings.session_ttl_seconds,
+        max_sessions=settings.session_max_sessions,
+        shared=get_shared_cache() if settings.shared_cache_enabled else None,
+    )
@@ -2,6 +2,8 @@ export interface Citation {
     id: string;
     page: number | string;
     source: string;
+    section?: string | null;
+    score?: number | null;
     snippet: string;
 }
 
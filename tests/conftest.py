@@ -0,0 +1,38 @@
+"""Shared test setup.
+
+Settings are read from the environment the first time `get_settings()` is
+called, so offline providers are selected here, before any test imports the
+app. Tests that need other values patch attributes of `get_settings()`.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+_DATA_DIR = tempfile.mkdtemp(prefix="class-12-tests-")
+
+os.environ.update(
+    LLM_PROVIDER="stub",
+    EMBEDDING_PROVIDER="stub",
+    EMBEDDING_DIMENSION="32",
+    VECTOR_BACKEND="memory",
+    LOCAL_STORE_DIR=os.path.join(_DATA_DIR, "index"),
+    CHUNK_STORE_PATH=os.path.join(_DATA_DIR, "chunks.sqlite"),
+    CHECKPOINT_PATH=os.path.join(_DATA_DIR, "checkpoints.sqlite"),
+    SHARED_CACHE_PATH=os.path.join(_DATA_DIR, "shared_cache.sqlite"),
+    PROFILING_DIR=os.path.join(_DATA_DIR, "profiles"),
+    CAPTURE_DIR=os.path.join(_DATA_DIR, "capture"),
+)
+
+
+@pytest.fixture
+def local_index(tmp_path, monkeypatch):
+    """Point the vector store singleton at an empty local index for one test."""
+    from app.core.config import get_settings
+    from app.core.retrieval.vector_store import _get_vector_store
+
+    monkeypatch.setattr(get_settings(), "local_store_dir", str(tmp_path / "index"))
+    _get_vector_store.cache_clear()
+    yield _get_vector_store()
+    _get_vector_store.cache_clear()
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+def _controller(max_concurrency=1, max_queue=1, queue_timeout=1.0):
+    return AdmissionController(
+        max_concurrency=max_concurrency,
+        max_queue=max_queue,
+        queue_timeout=queue_timeout,
+        retry_after=3,
+    )
+
+
+async def _hold(controller, release, entered):
+    async with controller.slot():
+        entered.append(True)
+        await release.wait()
+
+
+def test_requests_beyond_the_queue_are_rejected_with_429():
+    async def scenario():
+        controller = _controller()
+        release, entered = asyncio.Event(), []
+        running = asyncio.create_task(_hold(controller, release, entered))
+        queued = asyncio.create_task(_hold(controller, release, entered))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.slot():
+                pass
+        assert (controller.active, controller.queued) == (1, 1)
+
+        release.set()
+        await asyncio.gather(running, queued)
+        assert (controller.active, controller.queued) == (0, 0)
+        return rejected.value, entered
+
+    rejected, entered = asyncio.run(scenario())
+    assert (rejected.status_code, rejected.retry_after, rejected.reason) == (
+        429,
+        3,
+        "queue_full",
+    )
+    assert entered == [True, True]
+
+
+def test_queued_request_times_out_with_503():
+    async def scenario():
+        controller = _controller(queue_timeout=0.05)
+        release, entered = asyncio.Event(), []
+        running = asyncio.create_task(_hold(controller, release, entered))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.slot():
+                pass
+        assert controller.queued == 0
+
+        release.set()
+        await running
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert (rejected.status_code, rejected.reason) == (503, "queue_timeout")
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = _controller()
+        release, entered = asyncio.Event(), []
+        running = asyncio.create_task(_hold(controller, release, entered))
+        queued = asyncio.create_task(_hold(controller, release, entered))
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert controller.queued == 0
+
+        release.set()
+        await running
+        return controller.active, entered
+
+    assert asyncio.run(scenario()) == (0, [True])
+
+
+def test_slots_are_handed_to_waiters_in_fifo_order():
+    async def scenario():
+        controller = _controller(max_queue=3)
+        order = []
+
+        async def request(name, hold):
+            async with controller.slot():
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(*(request(name, 0.01) for name in "abcd"))
+        return order
+
+    assert asyncio.run(scenario()) == ["a", "b", "c", "d"]
@@ -0,0 +1,74 @@
+import pytest
+
+import autotune
+from app.core.config import Settings
+
+
+def _row(p50, tokens, f1, **extra):
+    return {"p50_s": p50, "prompt_tokens": tokens, "answer_f1": f1, **extra}
+
+
+@pytest.mark.parametrize(
+    "answer, reference, f1",
+    [
+        ("Net income was $1,200 [C1].", "Net income was $1,200.", 1.0),
+        ("Revenue grew.", "Net income was 1,200.", 0.0),
+        ("", "Net income was 1,200.", 0.0),
+        ("net income 1,200", "Net income was 1,200", 2 * 1.0 * 0.75 / 1.75),
+    ],
+)
+def test_answer_f1(answer, reference, f1):
+    assert autotune.answer_f1(answer, reference) == pytest.approx(f1)
+
+
+def test_grounding_counts_sentences_citing_retrieved_chunks():
+    answer = "Net income was 1,200 [C1]. Revenue was 9,000 [C7]. It rose a lot. Ok."
+
+    # "Ok." is too short to count; [C7] was not retrieved.
+    assert autotune.grounding(answer, {"C1": {}}) == pytest.approx(1 / 3)
+    assert autotune.grounding("", {"C1": {}}) == 0.0
+
+
+def test_pareto_front_drops_dominated_rows():
+    fast = _row(1.0, 500, 0.6)
+    accurate = _row(3.0, 900, 0.9)
+    cheap = _row(2.0, 300, 0.6)
+    dominated = _row(3.5, 950, 0.8)
+    duplicate = dict(fast)
+
+    front = autotune.pareto_front([fast, accurate, cheap, dominated, duplicate])
+
+    assert front == [fast, accurate, cheap, duplicate]
+
+
+def test_choose_takes_the_fastest_point_within_tolerance():
+    front = [_row(1.0, 500, 0.80), _row(2.0, 400, 0.86), _row(3.0, 900, 0.90)]
+
+    assert autotune._choose(front, tolerance=0.05) == front[1]
+    assert autotune._choose(front, tolerance=0.2) == front[0]
+    assert autotune._choose(front, tolerance=0.0) == front[2]
+
+
+def test_written_profile_loads_as_settings(tmp_path):
+    chosen = _row(
+        1.2,
+        420,
+        0.8,
+        p95_s=2.0,
+        grounding=0.9,
+        chunk_size=128,
+        chunk_overlap=0,
+        k=4,
+        model="gpt-4.1-nano",
+        verify=False,
+        mode="fused",
+    )
+    path = tmp_path / "profiles" / "tuned.env"
+
+    autotune._write_profile(path, chosen, "structured", questions=12)
+    settings = Settings(_env_file=str(path))
+
+    assert (settings.chunk_size_tokens, settings.chunk_overlap_tokens) == (128, 0)
+    assert (settings.retrieval_k, settings.openai_model_name) == (4, "gpt-4.1-nano")
+    assert (settings.verification_enabled, settings.qa_graph_mode) == (False, "fused")
+    assert settings.router_enabled is False
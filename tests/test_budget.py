@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from app.core.agents import budget
+
+
+def test_unbounded_requests_never_degrade():
+    state = {}
+
+    assert budget.remaining_seconds(state) is None
+    assert budget.can_call(state)
+    assert budget.call_timeout(state) is None
+    assert not budget.deadline_passed(state)
+
+
+def test_deadline_limits_calls():
+    soon = {"deadline": time.time() + 0.2}
+    later = {"deadline": time.time() + 10}
+    passed = {"deadline": time.time() - 1}
+
+    assert not budget.can_call(soon)
+    assert budget.can_call(later)
+    assert 9 < budget.call_timeout(later) <= 10
+    assert budget.call_timeout(passed) == 0.0
+    assert budget.deadline_passed(passed)
+    assert not budget.deadline_passed(later)
+
+
+def test_llm_estimate_tracks_observed_latency(monkeypatch):
+    monkeypatch.setattr(budget, "_llm_latency_ewma", None)
+    monkeypatch.setattr(budget.get_settings(), "llm_call_estimate_seconds", 3.0)
+
+    assert budget.estimated_llm_seconds() == 3.0
+    budget.record_llm_latency(2.0)
+    assert budget.estimated_llm_seconds() == 2.0
+    budget.record_llm_latency(7.0)
+    assert budget.estimated_llm_seconds() == pytest.approx(0.2 * 7.0 + 0.8 * 2.0)
+
+
+def test_trim_context_keeps_the_top_chunks_and_their_citations():
+    context = (
+        "[C1] Chunk from page 1:\nfirst\n\n"
+        "[C2] Chunk from page 2:\nsecond\nstill second\n\n"
+        "[C3] Chunk from page 3:\nthird"
+    )
+    citations = {cid: {"id": cid} for cid in ("C1", "C2", "C3")}
+
+    trimmed, kept = budget.trim_context(context, citations, keep=2)
+
+    assert trimmed == (
+        "[C1] Chunk from page 1:\nfirst\n\n[C2] Chunk from page 2:\nsecond\nstill second"
+    )
+    assert sorted(kept) == ["C1", "C2"]
+    assert budget.trim_context(context, None, keep=1)[1] == {}
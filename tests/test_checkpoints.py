@@ -0,0 +1,61 @@
+import httpx
+import openai
+import pytest
+
+from app.core.agents import checkpoints
+from app.core.agents.budget import DeadlineExceeded
+from app.core.agents.checkpoints import release_thread, retain_failed_thread, should_retry
+from app.core.concurrency import OperationCancelled
+from app.core.config import get_settings
+
+_REQUEST = httpx.Request("POST", "http://llm/v1/chat/completions")
+
+
+def _status_error(code):
+    return openai.APIStatusError(
+        "error", response=httpx.Response(code, request=_REQUEST), body=None
+    )
+
+
+@pytest.mark.parametrize(
+    "exc, retried",
+    [
+        (OperationCancelled(), False),
+        (DeadlineExceeded(), False),
+        (openai.APIConnectionError(request=_REQUEST), True),
+        (openai.APITimeoutError(request=_REQUEST), True),
+        (_status_error(429), True),
+        (_status_error(503), True),
+        (_status_error(400), False),
+        (_status_error(401), False),
+        (ValueError("bad input"), False),
+        (ConnectionResetError(), True),
+    ],
+)
+def test_should_retry(exc, retried):
+    assert should_retry(exc) is retried
+
+
+class _Checkpointer:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_thread(self, thread_id):
+        self.deleted.append(thread_id)
+
+
+def test_failed_threads_are_capped_oldest_first(monkeypatch):
+    monkeypatch.setattr(checkpoints, "_failed_threads", type(checkpoints._failed_threads)())
+    monkeypatch.setattr(get_settings(), "checkpoint_max_failed_threads", 2)
+    checkpointer = _Checkpointer()
+
+    for thread_id in ("a", "b", "a", "c"):
+        retain_failed_thread(checkpointer, thread_id)
+
+    # "a" failed again after "b", so "b" is the oldest.
+    assert checkpointer.deleted == ["b"]
+    assert list(checkpoints._failed_threads) == ["a", "c"]
+
+    release_thread(checkpointer, "a")
+    assert checkpointer.deleted == ["b", "a"]
+    assert list(checkpoints._failed_threads) == ["c"]
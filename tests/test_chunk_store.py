@@ -0,0 +1,93 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.core.config import get_settings
+from app.core.retrieval.chunk_store import ChunkStore, get_chunk_store, slim_metadata
+from app.core.retrieval.vector_store import index_chunks, retrieve_with_scores
+
+METADATA = {
+    "chunk_id": "c1",
+    "source": "report.pdf",
+    "page": 2,
+    "section": "INCOME STATEMENT",
+    "token_count": 40,
+    "document_date": None,
+}
+
+
+def _chunk(chunk_id, text, **metadata):
+    return Document(page_content=text, metadata={"chunk_id": chunk_id, **metadata})
+
+
+def test_slim_metadata_keeps_only_vector_fields():
+    assert slim_metadata(METADATA) == {"chunk_id": "c1", "source": "report.pdf", "page": 2}
+
+
+def test_put_and_get_round_trip(tmp_path):
+    store = ChunkStore(tmp_path / "chunks.sqlite")
+    store.put_many([_chunk("c1", "Net income was 1,200.", page=2)])
+
+    assert store.get_many(["c1", "unknown", "c1"]) == {
+        "c1": ("Net income was 1,200.", {"chunk_id": "c1", "page": 2})
+    }
+    assert len(store) == 1
+    # Rows are on disk, not only in the hot cache.
+    assert ChunkStore(tmp_path / "chunks.sqlite").get_many(["c1"])["c1"][0] == (
+        "Net income was 1,200."
+    )
+
+
+def test_replacing_a_chunk_invalidates_the_cache(tmp_path):
+    store = ChunkStore(tmp_path / "chunks.sqlite", cache_size=1)
+    store.put_many([_chunk("c1", "old"), _chunk("c2", "two")])
+    store.get_many(["c1"])
+    store.get_many(["c2"])
+
+    store.put_many([_chunk("c1", "new")])
+
+    assert store.get_many(["c1"])["c1"][0] == "new"
+    assert list(store._cache) == ["c1"]
+
+
+def test_hydrate_fills_slim_documents(tmp_path):
+    store = ChunkStore(tmp_path / "chunks.sqlite")
+    store.put_many([_chunk("c1", "stored text", section="NOTES")])
+    docs = [
+        Document(page_content="", metadata={"chunk_id": "c1", "score": 0.9}),
+        Document(page_content="legacy vector text", metadata={"chunk_id": "old"}),
+        Document(page_content="", metadata={"chunk_id": "gone"}),
+    ]
+
+    hydrated = store.hydrate(docs)
+
+    assert [doc.page_content for doc in hydrated] == ["stored text", "legacy vector text"]
+    assert hydrated[0].metadata == {"chunk_id": "c1", "section": "NOTES", "score": 0.9}
+
+
+@pytest.fixture
+def chunk_store_enabled(local_index, tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "chunk_store_enabled", True)
+    monkeypatch.setattr(settings, "chunk_store_path", str(tmp_path / "chunks.sqlite"))
+    get_chunk_store.cache_clear()
+    yield local_index
+    get_chunk_store.cache_clear()
+
+
+def test_indexed_vectors_are_slim_and_retrieval_hydrates(chunk_store_enabled):
+    chunks = [
+        _chunk("c1", "Net income was 1,200.", source="report.pdf", page=0, section="A"),
+        _chunk("c2", "Revenue was 9,000.", source="report.pdf", page=1, section="B"),
+    ]
+    index_chunks(chunks, "acme")
+
+    stored = chunk_store_enabled.similarity_search_by_vector_with_score(
+        chunk_store_enabled.embeddings.embed_query("x"), k=5, namespace="acme"
+    )
+    assert {doc.page_content for doc, _ in stored} == {""}
+    assert all("section" not in doc.metadata for doc, _ in stored)
+
+    results = retrieve_with_scores("Net income was 1,200.", k=1, collection="acme")
+    assert results[0][0].page_content == "Net income was 1,200."
+    assert results[0][0].metadata["section"] == "A"
+    assert results[0][1] == pytest.approx(1.0)
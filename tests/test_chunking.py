@@ -0,0 +1,87 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.core.retrieval.chunking import StructuredTokenChunker, get_chunker
+
+PROSE = "\n".join(
+    f"Sentence number {i} talks about revenue growth in the quarter." for i in range(30)
+)
+TABLE = "BALANCE SHEET\n" + "\n".join(
+    f"Line item {i} 1{i},234 9{i},876" for i in range(20)
+)
+
+
+def _page(text, page=0, source="report.pdf"):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+def test_chunks_stay_within_the_token_budget():
+    chunks = StructuredTokenChunker(chunk_size=40, chunk_overlap=15).split_documents(
+        [_page(PROSE), _page(TABLE, page=1)]
+    )
+
+    assert len(chunks) > 2
+    assert all(chunk.metadata["token_count"] <= 40 for chunk in chunks)
+
+
+def test_prose_chunks_carry_overlap_from_the_previous_chunk():
+    chunks = StructuredTokenChunker(chunk_size=40, chunk_overlap=15).split_documents(
+        [_page(PROSE)]
+    )
+
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.page_content.splitlines()[0] == previous.page_content.splitlines()[-1]
+
+
+def test_no_overlap_when_disabled():
+    chunks = StructuredTokenChunker(chunk_size=40, chunk_overlap=0).split_documents(
+        [_page(PROSE)]
+    )
+
+    lines = [line for chunk in chunks for line in chunk.page_content.splitlines()]
+    assert lines == PROSE.splitlines()
+
+
+def test_table_rows_are_never_split_and_keep_their_section():
+    rows = set(TABLE.splitlines())
+    chunks = StructuredTokenChunker(chunk_size=40, chunk_overlap=15).split_documents(
+        [_page(TABLE)]
+    )
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert set(chunk.page_content.splitlines()) <= rows
+        assert chunk.metadata["section"] == "BALANCE SHEET"
+
+
+def test_chunks_do_not_cross_pages():
+    chunks = StructuredTokenChunker(chunk_size=200, chunk_overlap=0).split_documents(
+        [_page("First page line.", page=0), _page("Second page line.", page=1)]
+    )
+
+    assert [(c.page_content, c.metadata["page"]) for c in chunks] == [
+        ("First page line.", 0),
+        ("Second page line.", 1),
+    ]
+
+
+def test_chunk_ids_follow_the_text():
+    chunker = StructuredTokenChunker(chunk_size=40, chunk_overlap=0)
+    first = chunker.split_documents([_page(PROSE)])
+    again = chunker.split_documents([_page(PROSE)])
+    edited = chunker.split_documents([_page(PROSE.replace("number 0 ", "number zero "))])
+
+    assert [c.metadata["chunk_id"] for c in first] == [c.id for c in again]
+    assert edited[0].id != first[0].id
+    assert edited[-1].id == first[-1].id
+    assert [c.metadata["chunk_index"] for c in first] == list(range(len(first)))
+
+
+def test_overlap_must_be_smaller_than_the_chunk():
+    with pytest.raises(ValueError):
+        StructuredTokenChunker(chunk_size=32, chunk_overlap=32)
+
+
+def test_get_chunker_rejects_unknown_names():
+    with pytest.raises(ValueError, match="Unknown chunker"):
+        get_chunker("sentences")
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from langchain_core.documents import Document
+
+from app.core.agents.claims import (
+    CANNOT_ANSWER,
+    check_claims,
+    chunk_texts,
+    parse_grounded_answer,
+    render_answer,
+)
+from app.core.agents.graph import run_qa_flow
+from app.core.retrieval.vector_store import index_chunks
+
+CONTEXT = (
+    "[C1] Chunk from page 1 (INCOME STATEMENT):\n"
+    "Net income was $1,200 in 2023.\nIt was the “best” year.\n\n"
+    "[C2] Chunk from page 2:\nRevenue was 9,000."
+)
+
+
+def _claim(text, citations, quotes):
+    return {"text": text, "citations": citations, "quotes": quotes}
+
+
+def test_chunk_texts_are_normalized():
+    assert chunk_texts(CONTEXT) == {
+        "C1": 'net income was $1,200 in 2023. it was the "best" year.',
+        "C2": "revenue was 9,000.",
+    }
+    assert chunk_texts("") == {}
+
+
+def test_parse_grounded_answer():
+    content = json.dumps(
+        {
+            "answer": " Net income was $1,200. ",
+            "claims": [
+                {"text": "Net income was $1,200", "citations": ["[C1]"], "quotes": ["x"]},
+                "not a claim",
+            ],
+        }
+    )
+
+    answer, claims = parse_grounded_answer(content)
+
+    assert answer == "Net income was $1,200."
+    assert claims == [_claim("Net income was $1,200", ["C1"], ["x"])]
+    assert parse_grounded_answer("not json") == ("", [])
+    assert parse_grounded_answer("[1, 2]") == ("", [])
+
+
+def test_supported_claims_are_kept():
+    claims = [
+        _claim("Net income was $1,200", ["C1", "C1"], ["NET INCOME  was $1,200"]),
+        _claim("It was the best year", ["C2", "C1"], ['the "best" year']),
+    ]
+
+    kept, dropped = check_claims(claims, CONTEXT)
+
+    assert [claim["citations"] for claim in kept] == [["C1"], ["C2", "C1"]]
+    assert dropped == []
+
+
+@pytest.mark.parametrize(
+    "claim",
+    [
+        _claim("Net income was $1,500", ["C1"], ["Net income was $1,500"]),
+        _claim("Net income was $1,200", ["C2"], ["Net income was $1,200"]),
+        _claim("Net income was $1,200", ["C9"], ["Net income was $1,200"]),
+        _claim("Net income was $1,200", ["C1"], []),
+        _claim("Net income was $1,200", [], ["Net income was $1,200"]),
+        _claim("", ["C1"], ["Net income was $1,200"]),
+        _claim("Both", ["C1"], ["Net income was $1,200", "Revenue was 9,000"]),
+    ],
+)
+def test_unsupported_claims_are_dropped(claim):
+    kept, dropped = check_claims([claim], CONTEXT)
+
+    assert kept == []
+    assert dropped == [claim]
+
+
+def test_render_answer_rebuilds_from_kept_claims():
+    kept = [
+        _claim("Net income was $1,200", ["C1"], []),
+        _claim("Revenue was 9,000!", ["C2", "C1"], []),
+    ]
+
+    assert render_answer(kept) == "Net income was $1,200 [C1]. Revenue was 9,000 [C2][C1]!"
+    assert render_answer([]) == CANNOT_ANSWER
+
+
+def test_fused_graph_answers_from_checked_claims(local_index):
+    index_chunks(
+        [
+            Document(
+                page_content="Net income was 1,200.",
+                metadata={"chunk_id": "n", "source": "report.pdf", "page": 0},
+            )
+        ],
+        "fused",
+    )
+
+    result = run_qa_flow("Net income was 1,200.", collection="fused", mode="fused")
+
+    assert result["answer"] == "Net income was 1,200 [C1]."
+    assert result["verified"] is True
+    assert list(result["citations"]) == ["C1"]
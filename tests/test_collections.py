@@ -0,0 +1,103 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.core.retrieval.collections import (
+    build_metadata_filter,
+    chunk_namespace,
+    date_key,
+    derived_namespace,
+    is_chunk_namespace,
+    validate_collection,
+)
+from app.core.retrieval.local_store import LocalVectorStore
+
+
+@pytest.mark.parametrize("name", [None, "acme", "Acme_2024", "a-b", "9lives"])
+def test_valid_collections(name):
+    assert validate_collection(name) == name
+
+
+@pytest.mark.parametrize("name", ["", "-acme", "acme:summaries", "a b", "x" * 64, "summaries"])
+def test_invalid_collections(name):
+    with pytest.raises(ValueError):
+        validate_collection(name)
+
+
+def test_namespaces():
+    assert chunk_namespace(None) == ""
+    assert chunk_namespace("acme") == "acme"
+    assert derived_namespace("acme", "summaries") == "acme:summaries"
+    assert derived_namespace(None, "summaries") == "summaries"
+    assert is_chunk_namespace("acme")
+    assert is_chunk_namespace("")
+    assert not is_chunk_namespace("acme:summaries")
+    assert not is_chunk_namespace("precomputed-qa")
+
+
+@pytest.mark.parametrize(
+    "value, key",
+    [
+        (None, None),
+        (date(2024, 3, 9), 20240309),
+        (datetime(2023, 12, 31, 23, 59), 20231231),
+        ("D:20230115093000+00'00'", 20230115),
+        ("2022-06-30T10:00:00", 20220630),
+        ("not a date", None),
+        ("20231345", None),
+    ],
+)
+def test_date_key(value, key):
+    assert date_key(value) == key
+
+
+def test_no_filters_means_no_filter():
+    assert build_metadata_filter() is None
+    assert build_metadata_filter(sources=[]) is None
+
+
+def test_single_filter_is_not_wrapped():
+    assert build_metadata_filter(sources=["a.pdf"]) == {"source": {"$in": ["a.pdf"]}}
+
+
+def test_filters_are_combined_with_zero_based_pages():
+    assert build_metadata_filter(
+        sources=["a.pdf"],
+        page_from=2,
+        page_to=3,
+        date_from=date(2023, 1, 1),
+        date_to=date(2023, 12, 31),
+    ) == {
+        "$and": [
+            {"source": {"$in": ["a.pdf"]}},
+            {"page": {"$gte": 1, "$lte": 2}},
+            {"document_date": {"$gte": 20230101, "$lte": 20231231}},
+        ]
+    }
+
+
+def test_filter_is_pushed_into_the_vector_query():
+    store = LocalVectorStore(embedding=None)
+    rows = [
+        ("p1", "a.pdf", 0, 20220101),
+        ("p2", "a.pdf", 1, 20230601),
+        ("p3", "b.pdf", 1, 20230601),
+        ("p4", "a.pdf", 2, 20230601),
+    ]
+    store.add_vectors(
+        [vector_id for vector_id, *_ in rows],
+        np.ones((len(rows), 4), dtype=np.float32),
+        ["text"] * len(rows),
+        [{"source": s, "page": p, "document_date": d} for _, s, p, d in rows],
+        namespace="acme",
+    )
+    flt = build_metadata_filter(
+        sources=["a.pdf"], page_from=2, page_to=3, date_from=date(2023, 1, 1)
+    )
+
+    results = store.similarity_search_by_vector_with_score(
+        [1, 1, 1, 1], k=10, filter=flt, namespace="acme"
+    )
+
+    assert sorted(doc.id for doc, _ in results) == ["p2", "p4"]
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from app.core.concurrency import CancelToken, OperationCancelled, SingleFlight
+
+
+def _run_concurrently(flight, key, fn, callers):
+    """Start `callers` threads on one key while the leader is blocked."""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_for_waiters(flight, key, waiters):
+    deadline = time.monotonic() + 5
+    while flight._calls[key].waiters < waiters and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn(token):
+        calls.append(token)
+        started.set()
+        release.wait(5)
+        return {"answer": "42"}
+
+    threads, results, errors = _run_concurrently(flight, "q", fn, 1)
+    started.wait(5)
+    more, more_results, _ = _run_concurrently(flight, "q", fn, 3)
+    _wait_for_waiters(flight, "q", 3)
+    release.set()
+    for thread in threads + more:
+        thread.join(5)
+
+    results += more_results
+    assert len(calls) == 1
+    assert not errors
+    assert [result for result, _ in results] == [{"answer": "42"}] * 4
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    # Every caller owns its copy of a shared result.
+    assert len({id(result) for result, _ in results}) == 4
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fn(token):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    threads, _, errors = _run_concurrently(flight, "q", fn, 1)
+    started.wait(5)
+    more, _, more_errors = _run_concurrently(flight, "q", fn, 2)
+    _wait_for_waiters(flight, "q", 2)
+    release.set()
+    for thread in threads + more:
+        thread.join(5)
+
+    assert [str(exc) for exc in errors + more_errors] == ["upstream down"] * 3
+
+
+def test_results_are_not_cached_after_completion():
+    flight = SingleFlight()
+    counter = iter(range(10))
+
+    first, first_shared = flight.do("q", lambda token: next(counter))
+    second, second_shared = flight.do("q", lambda token: next(counter))
+
+    assert (first, second) == (0, 1)
+    assert not first_shared and not second_shared
+
+
+def test_waiter_stops_waiting_when_cancelled():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fn(token):
+        started.set()
+        release.wait(5)
+        return "done"
+
+    threads, results, _ = _run_concurrently(flight, "q", fn, 1)
+    started.wait(5)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(OperationCancelled):
+        flight.do("q", fn, cancel_event=cancel, poll_interval=0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [("done", False)]
+
+
+def test_cancel_token_needs_every_caller_to_cancel():
+    first, second = threading.Event(), threading.Event()
+    token = CancelToken(first)
+    token.link(second)
+
+    first.set()
+    assert not token.is_cancelled()
+    token.raise_if_cancelled()
+
+    second.set()
+    assert token.is_cancelled()
+    with pytest.raises(OperationCancelled):
+        token.raise_if_cancelled()
+
+
+def test_caller_without_event_never_cancels():
+    event = threading.Event()
+    token = CancelToken(event)
+    token.link(None)
+    event.set()
+
+    assert not token.is_cancelled()
@@ -0,0 +1,48 @@
+from langchain_core.documents import Document
+
+from app.core.retrieval.dynamic_k import select_dynamic_k
+
+
+def _scored(*scores):
+    return [(Document(page_content=f"chunk {i}"), score) for i, score in enumerate(scores)]
+
+
+def _scores(kept):
+    return [score for _, score in kept]
+
+
+def test_results_are_ranked_and_capped_at_max_k():
+    kept = select_dynamic_k(_scored(0.5, 0.9, 0.7, 0.8), min_k=1, max_k=3)
+
+    assert _scores(kept) == [0.9, 0.8, 0.7]
+
+
+def test_stops_below_the_score_threshold():
+    kept = select_dynamic_k(_scored(0.9, 0.8, 0.4, 0.3), 1, 4, score_threshold=0.5)
+
+    assert _scores(kept) == [0.9, 0.8]
+
+
+def test_stops_at_a_sharp_relative_drop():
+    kept = select_dynamic_k(_scored(0.9, 0.85, 0.5, 0.48), 1, 4, max_relative_drop=0.15)
+
+    assert _scores(kept) == [0.9, 0.85]
+
+
+def test_min_k_is_kept_regardless_of_score():
+    kept = select_dynamic_k(
+        _scored(0.9, 0.2, 0.1), 2, 3, score_threshold=0.5, max_relative_drop=0.1
+    )
+
+    assert _scores(kept) == [0.9, 0.2]
+
+
+def test_min_k_wins_over_a_smaller_max_k():
+    kept = select_dynamic_k(_scored(0.9, 0.8, 0.7), min_k=3, max_k=1)
+
+    assert len(kept) == 3
+
+
+def test_fewer_candidates_than_min_k():
+    assert _scores(select_dynamic_k(_scored(0.4), min_k=3, max_k=5)) == [0.4]
+    assert select_dynamic_k([], min_k=3, max_k=5) == []
@@ -0,0 +1,98 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.core.retrieval import hierarchy
+from app.core.retrieval.hierarchy import (
+    CHUNK,
+    DOCUMENT,
+    PAGE,
+    SECTION,
+    build_summary_index,
+    plan_summary_tree,
+    retrieve_summaries,
+    select_levels,
+)
+
+
+def _chunk(page, section, n, source="report.pdf"):
+    return Document(
+        page_content=f"page {page} chunk {n}",
+        metadata={"source": source, "page": page, "section": section, "chunk_id": f"{page}-{n}"},
+    )
+
+
+def _chunks():
+    # Pages 0-1 open with the income statement, page 2 with the balance sheet.
+    return [
+        _chunk(0, "INCOME STATEMENT", 0),
+        _chunk(0, "INCOME STATEMENT", 1),
+        _chunk(1, "INCOME STATEMENT", 0),
+        _chunk(2, "BALANCE SHEET", 0),
+    ]
+
+
+@pytest.mark.parametrize(
+    "question, levels",
+    [
+        ("What was net income in 2023?", [CHUNK]),
+        ("Summarize the report", [DOCUMENT, SECTION]),
+        ("Give me an overview", [DOCUMENT, SECTION]),
+        ("Summarize the balance sheet", [SECTION, PAGE]),
+        ("What are the key points on page 3?", [SECTION, PAGE]),
+    ],
+)
+def test_select_levels(question, levels):
+    assert select_levels(question) == levels
+
+
+def test_plan_builds_a_linked_tree_children_first():
+    chunks = _chunks()
+    nodes = plan_summary_tree(chunks)
+    by_id = {node.node_id: node for node in nodes}
+
+    assert [node.level for node in nodes] == [PAGE, PAGE, SECTION, PAGE, SECTION, DOCUMENT]
+    document = nodes[-1]
+    sections = [by_id[child] for child in document.child_ids]
+    assert [s.metadata["section"] for s in sections] == ["INCOME STATEMENT", "BALANCE SHEET"]
+    assert [len(s.child_ids) for s in sections] == [2, 1]
+    for position, node in enumerate(nodes):
+        for child in (by_id[c] for c in node.child_ids if c in by_id):
+            assert child.parent_id == node.node_id
+            assert nodes.index(child) < position
+    # Chunks point at their page.
+    first_page = by_id[chunks[0].metadata["parent_id"]]
+    assert first_page.child_ids == ["0-0", "0-1"]
+    assert chunks[2].metadata["parent_id"] != first_page.node_id
+
+
+def test_summaries_are_built_bottom_up_and_searchable_by_level(monkeypatch):
+    prompts = {}
+
+    def summarize(level, content, max_words):
+        prompts.setdefault(level, []).append(content)
+        return f"{level} summary of [{content}]"
+
+    monkeypatch.setattr(hierarchy, "_summarize", summarize)
+    chunks = _chunks()
+    nodes = plan_summary_tree(chunks)
+
+    assert build_summary_index(nodes, chunks, "hierarchy") == len(nodes)
+
+    assert prompts[PAGE][0] == "page 0 chunk 0\n\npage 0 chunk 1"
+    assert prompts[SECTION][0].startswith("page summary of [page 0 chunk 0")
+    assert prompts[DOCUMENT][0].startswith("section summary of [page summary")
+    found = retrieve_summaries("overview", [DOCUMENT], k=5, collection="hierarchy")
+    assert [doc.metadata["level"] for doc, _ in found] == [DOCUMENT]
+    assert found[0][0].metadata["child_ids"] == nodes[-1].child_ids
+
+
+def test_rebuilding_replaces_a_sources_summaries(monkeypatch):
+    monkeypatch.setattr(hierarchy, "_summarize", lambda level, content, words: content)
+    chunks = _chunks()
+    build_summary_index(plan_summary_tree(chunks), chunks, "rebuild")
+
+    shorter = chunks[:1]
+    build_summary_index(plan_summary_tree(shorter), shorter, "rebuild")
+
+    found = retrieve_summaries("x", [PAGE, SECTION, DOCUMENT], k=10, collection="rebuild")
+    assert sorted(doc.metadata["level"] for doc, _ in found) == [DOCUMENT, PAGE, SECTION]
@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+
+from app.core.retrieval import snapshot
+from app.core.retrieval.local_store import LocalVectorStore, matches_filter
+from app.core.retrieval.vector_store import _get_vector_store, flush_index
+
+
+class _NoEmbeddings:
+    """Vectors are always supplied directly in these tests."""
+
+
+def _store(path=None):
+    return LocalVectorStore(_NoEmbeddings(), path=path)
+
+
+def _add(store, ids, vectors, namespace="", **metadata):
+    store.add_vectors(
+        ids,
+        np.asarray(vectors, dtype=np.float32),
+        [f"text {vector_id}" for vector_id in ids],
+        [{"name": vector_id, **metadata} for vector_id in ids],
+        namespace,
+    )
+
+
+def _ids(results):
+    return [doc.id for doc, _ in results]
+
+
+@pytest.mark.parametrize(
+    "flt, matched",
+    [
+        (None, True),
+        ({"year": 2023}, True),
+        ({"year": {"$eq": 2024}}, False),
+        ({"year": {"$gte": 2020, "$lt": 2024}}, True),
+        ({"source": {"$in": ["a.pdf", "b.pdf"]}}, True),
+        ({"source": {"$nin": ["a.pdf"]}}, False),
+        ({"missing": {"$exists": False}}, True),
+        ({"missing": {"$gt": 1}}, False),
+        ({"$or": [{"year": 2020}, {"source": "a.pdf"}]}, True),
+        ({"$and": [{"year": 2023}, {"source": "b.pdf"}]}, False),
+        ({"source": {"$gt": 3}}, False),
+    ],
+)
+def test_matches_filter(flt, matched):
+    assert matches_filter({"year": 2023, "source": "a.pdf"}, flt) is matched
+
+
+def test_unsupported_operator_is_rejected():
+    with pytest.raises(ValueError, match=r"\$regex"):
+        matches_filter({"a": 1}, {"a": {"$regex": "x"}})
+
+
+def test_search_ranks_by_cosine_within_a_namespace():
+    store = _store()
+    _add(store, ["x", "y", "xy"], [[1, 0], [0, 3], [1, 1]], namespace="acme")
+    _add(store, ["other"], [[1, 0]], namespace="globex")
+
+    results = store.similarity_search_by_vector_with_score([2, 0], k=2, namespace="acme")
+
+    assert _ids(results) == ["x", "xy"]
+    assert [round(score, 4) for _, score in results] == [1.0, round(2 ** -0.5, 4)]
+    assert results[0][0].page_content == "text x"
+    assert store.namespaces() == {"acme": 3, "globex": 1}
+
+
+def test_filters_are_applied_before_scoring():
+    store = _store()
+    _add(store, ["a"], [[1, 0]], year=2022)
+    _add(store, ["b"], [[0, 1]], year=2023)
+
+    results = store.similarity_search_by_vector_with_score(
+        [1, 0], k=5, filter={"year": {"$gte": 2023}}
+    )
+
+    assert _ids(results) == ["b"]
+
+
+def test_upsert_overwrites_and_delete_removes():
+    store = _store()
+    _add(store, ["a", "b", "c"], [[1, 0], [0, 1], [1, 1]], source="old.pdf")
+    _add(store, ["a"], [[0, 1]], source="new.pdf")
+
+    assert len(store) == 3
+    assert _ids(store.similarity_search_by_vector_with_score([0, 1], k=2)) == ["a", "b"]
+
+    store.delete(["b"])
+    store.delete(filter={"source": "old.pdf"})
+
+    assert _ids(store.similarity_search_by_vector_with_score([1, 0], k=5)) == ["a"]
+
+
+def test_dimension_mismatch_is_rejected():
+    store = _store()
+    _add(store, ["a"], [[1, 0]])
+
+    with pytest.raises(ValueError, match="dimension"):
+        _add(store, ["b"], [[1, 0, 0]])
+
+
+def test_writes_reach_disk_on_flush(tmp_path):
+    writer = _store(tmp_path)
+    _add(writer, ["a"], [[1, 0]])
+
+    assert len(_store(tmp_path)) == 0
+    writer.flush()
+    reader = _store(tmp_path)
+    assert len(reader) == 1
+
+    _add(writer, ["b"], [[0, 1]])
+    writer.delete(["a"])
+    writer.flush()
+    # An existing reader picks up the rewritten files on its next query.
+    assert _ids(reader.similarity_search_by_vector_with_score([1, 1], k=5)) == ["b"]
+
+
+def test_unflushed_writes_survive_another_writer(tmp_path):
+    first, second = _store(tmp_path), _store(tmp_path)
+    _add(first, ["a"], [[1, 0]])
+    _add(second, ["b"], [[0, 1]])
+    second.flush()
+
+    assert _ids(first.similarity_search_by_vector_with_score([1, 0], k=5)) == ["a"]
+
+
+def test_many_appends_keep_every_row():
+    store = _store()
+    for i in range(600):
+        _add(store, [f"v{i}"], [[np.cos(i), np.sin(i)]])
+
+    assert len(store) == 600
+    assert _ids(store.similarity_search_by_vector_with_score([np.cos(7), np.sin(7)], k=1)) == [
+        "v7"
+    ]
+
+
+def test_int8_quantization_round_trip():
+    vectors = np.random.default_rng(0).normal(size=(5, 16)).astype(np.float32)
+    vectors[4] = 0
+
+    codes, scales = snapshot.quantize_int8(vectors)
+    restored = snapshot.dequantize_int8(codes, scales)
+
+    assert codes.dtype == np.int8
+    assert np.abs(restored - vectors).max() <= scales.max() / 2 + 1e-6
+    assert not restored[4].any()
+
+
+@pytest.mark.parametrize("quantize", [snapshot.FLOAT32, snapshot.INT8])
+def test_snapshot_round_trip(local_index, tmp_path, monkeypatch, quantize):
+    pytest.importorskip("pyarrow")
+    _add(local_index, ["a", "b"], [[1.0] + [0.0] * 31, [0.0, 1.0] + [0.0] * 30], "acme")
+    _add(local_index, ["c"], [[0.5] * 32], "globex")
+    flush_index()
+    path = tmp_path / "index.parquet"
+
+    exported = snapshot.export_snapshot(path, quantize=quantize)
+
+    assert (exported.rows, exported.namespaces) == (3, {"acme": 2, "globex": 1})
+    assert snapshot.read_snapshot_info(path)["dimension"] == 32
+
+    monkeypatch.setattr(snapshot.get_settings(), "local_store_dir", str(tmp_path / "restored"))
+    _get_vector_store.cache_clear()
+    imported = snapshot.import_snapshot(path)
+
+    assert imported.rows == 3
+    restored = _store(tmp_path / "restored")
+    results = restored.similarity_search_by_vector_with_score(
+        [1.0] + [0.0] * 31, k=1, namespace="acme"
+    )
+    assert _ids(results) == ["a"]
+    assert results[0][0].page_content == "text a"
+    assert results[0][1] == pytest.approx(1.0, abs=1e-3)
+
+
+def test_incompatible_snapshots_need_force(local_index, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    _add(local_index, ["a"], [[1.0] * 32])
+    path = tmp_path / "index.parquet"
+    snapshot.export_snapshot(path)
+
+    monkeypatch.setattr(snapshot.get_settings(), "embedding_dimension", 64)
+    with pytest.raises(ValueError, match="dimension 32 != embedding_dimension 64"):
+        snapshot.import_snapshot(path)
+    assert snapshot.import_snapshot(path, force=True).rows == 1
@@ -0,0 +1,100 @@
+import time
+from collections import Counter
+
+import pytest
+
+from app.core import profiling
+from app.core.config import get_settings
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profiling_interval_ms", 1.0)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path / "profiles"))
+    monkeypatch.setattr(profiling, "_armed", 0)
+    return settings
+
+
+def _busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def test_nothing_is_profiled_when_disabled(settings):
+    settings.profiling_enabled = False
+    profiling.arm(1)
+
+    assert profiling.should_profile(requested=True) is None
+
+
+def test_triggers(settings):
+    assert profiling.should_profile(requested=True) == "header"
+    assert profiling.should_profile(requested=False) is None
+
+    assert profiling.arm(2) == 2
+    assert [profiling.should_profile(False) for _ in range(3)] == ["armed", "armed", None]
+
+    settings.profiling_sample_rate = 1.0
+    assert profiling.should_profile(requested=False) == "sampled"
+
+
+def test_top_functions_count_self_and_total_samples():
+    stacks = Counter({"main;handle;query": 3, "main;handle": 1, "main;log": 2})
+
+    top = profiling._top_functions(stacks, top=2)
+
+    assert top == [
+        {"function": "main", "total_samples": 6, "self_samples": 0},
+        {"function": "handle", "total_samples": 4, "self_samples": 1},
+    ]
+
+
+def test_profile_is_stored_and_listed(settings):
+    result, profile_id = profiling.run_profiled(
+        lambda: _busy_loop(0.05), "header", describe=lambda total: {"iterations": total}
+    )
+
+    summary = profiling.load_profile(profile_id)
+    assert summary["iterations"] == result
+    assert summary["trigger"] == "header"
+    assert summary["error"] is None
+    assert summary["samples"] > 0
+    assert any("_busy_loop" in entry["function"] for entry in summary["top_functions"])
+    assert "_busy_loop" in profiling.load_collapsed(profile_id)
+    assert [entry["id"] for entry in profiling.list_profiles()] == [profile_id]
+
+
+def test_failed_requests_are_profiled_too(settings):
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        profiling.run_profiled(fail, "armed")
+
+    [entry] = profiling.list_profiles()
+    assert profiling.load_profile(entry["id"])["error"] == "RuntimeError"
+
+
+def test_old_profiles_are_pruned(settings):
+    settings.profiling_max_profiles = 2
+    ids = []
+    for _ in range(3):
+        ids.append(profiling.run_profiled(lambda: None, "sampled")[1])
+        # Distinct mtimes, so the age order is well defined.
+        time.sleep(0.01)
+
+    assert [entry["id"] for entry in profiling.list_profiles()] == ids[:0:-1]
+    assert profiling.load_profile(ids[0]) is None
+    assert profiling.load_collapsed(ids[0]) is None
+
+
+@pytest.mark.parametrize("profile_id", ["", "../secrets", "ABC", "0" * 32])
+def test_unknown_or_invalid_ids_are_not_found(settings, profile_id):
+    assert profiling.load_profile(profile_id) is None
+    assert profiling.load_collapsed(profile_id) is None
@@ -0,0 +1,131 @@
+import json
+import threading
+
+import httpx
+import openai
+import pytest
+
+from app.core.concurrency import CancelToken, OperationCancelled
+from app.core.config import get_settings
+from app.core.llm.providers import OpenAIChatProvider, StubChatProvider, get_chat_provider
+from app.core.metrics import metrics
+
+CONTEXT = "Context:\n[C1] Chunk from page 2:\nNet income was 1,200.\nMore text."
+
+
+@pytest.fixture
+def provider_settings():
+    """Settings to patch; the provider singleton is rebuilt around the test."""
+    get_chat_provider.cache_clear()
+    yield get_settings()
+    get_chat_provider.cache_clear()
+
+
+def _messages(content=CONTEXT):
+    return [{"role": "system", "content": "Answer."}, {"role": "user", "content": content}]
+
+
+def test_stub_answers_with_the_first_cited_line():
+    result = StubChatProvider().complete(_messages(), model="m")
+
+    assert result.content == "Net income was 1,200. [C1]"
+    assert result.prompt_tokens == len("Answer.\n".split() + CONTEXT.split())
+
+
+def test_stub_without_context_declines():
+    result = StubChatProvider().complete(_messages("no chunks here"), model="m")
+
+    assert result.content == "I cannot answer based on the available document."
+
+
+def test_stub_structured_outputs():
+    grounded = StubChatProvider().complete(
+        _messages(),
+        model="m",
+        response_format={"type": "json_schema", "json_schema": {"name": "grounded_answer"}},
+    )
+    other = StubChatProvider().complete(
+        _messages(), model="m", response_format={"type": "json_object"}
+    )
+
+    assert json.loads(grounded.content)["claims"] == [
+        {
+            "text": "Net income was 1,200.",
+            "citations": ["C1"],
+            "quotes": ["Net income was 1,200."],
+        }
+    ]
+    assert json.loads(other.content) == {"items": []}
+
+
+def test_stub_honours_cancellation():
+    cancelled = threading.Event()
+    cancelled.set()
+
+    with pytest.raises(OperationCancelled):
+        StubChatProvider().complete(_messages(), model="m", cancel_token=CancelToken(cancelled))
+
+
+def test_provider_is_selected_from_settings(provider_settings, monkeypatch):
+    monkeypatch.setattr(provider_settings, "llm_provider", "stub")
+    assert isinstance(get_chat_provider(), StubChatProvider)
+
+    get_chat_provider.cache_clear()
+    monkeypatch.setattr(provider_settings, "llm_provider", "openai_compatible")
+    monkeypatch.setattr(provider_settings, "llm_base_url", None)
+    with pytest.raises(ValueError, match="llm_base_url"):
+        get_chat_provider()
+
+    monkeypatch.setattr(provider_settings, "llm_base_url", "http://127.0.0.1:8080/v1")
+    provider = get_chat_provider()
+    assert isinstance(provider, OpenAIChatProvider)
+    assert str(provider._client.base_url) == "http://127.0.0.1:8080/v1/"
+
+    get_chat_provider.cache_clear()
+    monkeypatch.setattr(provider_settings, "llm_provider", "llamafile")
+    with pytest.raises(ValueError, match="Unknown llm_provider"):
+        get_chat_provider()
+
+
+def test_openai_compatible_server_round_trip():
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(
+            200,
+            json={
+                "id": "x",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "local",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "Local answer [C1]"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10},
+            },
+        )
+
+    provider = OpenAIChatProvider(api_key="not-needed", base_url="http://local/v1")
+    provider._client = openai.Client(
+        api_key="not-needed",
+        base_url="http://local/v1",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    before = metrics.snapshot()["counters"].get("llm_prompt_tokens_total{model=local}", 0)
+
+    result = provider.complete(_messages(), model="local", temperature=0.2)
+
+    assert (result.content, result.prompt_tokens, result.completion_tokens) == (
+        "Local answer [C1]",
+        7,
+        3,
+    )
+    assert requests[0]["model"] == "local"
+    assert requests[0]["temperature"] == 0.2
+    after = metrics.snapshot()["counters"]["llm_prompt_tokens_total{model=local}"]
+    assert after - before == 7
@@ -0,0 +1,86 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.core.retrieval import qa_index
+from app.core.retrieval.vector_store import flush_index
+
+NET_INCOME = "What was net income in 2023?"
+REVENUE = "What was total revenue?"
+
+
+def _chunks(source):
+    return [
+        Document(
+            page_content="Net income was 1,200.",
+            metadata={"source": source, "page": 0, "section": "INCOME STATEMENT"},
+        ),
+        Document(
+            page_content="Revenue was 9,000.",
+            metadata={"source": source, "page": 0, "section": "INCOME STATEMENT"},
+        ),
+    ]
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Stand-in for the LLM: the items each section will get."""
+    items = []
+    monkeypatch.setattr(qa_index, "_generate_items", lambda context, limit: list(items))
+    return items
+
+
+@pytest.fixture
+def collection(request):
+    return f"qa-{request.node.name}"
+
+
+def test_grounded_answers_are_stored_and_served(generated, collection):
+    generated += [
+        {"question": NET_INCOME, "answer": "Net income was 1,200 [C1]."},
+        {"question": "Ungrounded?", "answer": "No citation at all."},
+        {"question": "Wrong chunk?", "answer": "Cites a chunk it was not given [C9]."},
+        {"question": "", "answer": "Missing question [C1]."},
+    ]
+
+    assert qa_index.build_qa_index(_chunks("a.pdf"), collection) == 1
+    flush_index()
+
+    result = qa_index.lookup_precomputed_answer(NET_INCOME, collection)
+    assert result["answer"] == "Net income was 1,200 [C1]."
+    assert result["route"] == "precomputed"
+    assert list(result["citations"]) == ["C1"]
+    assert "Net income was 1,200." in result["context"]
+    assert "Revenue" not in result["context"]
+
+
+def test_unrelated_questions_fall_through(generated, collection):
+    generated.append({"question": NET_INCOME, "answer": "Net income was 1,200 [C1]."})
+    qa_index.build_qa_index(_chunks("a.pdf"), collection)
+
+    assert qa_index.lookup_precomputed_answer(REVENUE, collection) is None
+    assert qa_index.lookup_precomputed_answer(NET_INCOME, f"{collection}-other") is None
+
+
+def test_reindexing_a_source_drops_its_old_answers(generated, collection):
+    generated.append({"question": NET_INCOME, "answer": "Net income was 1,200 [C1]."})
+    qa_index.build_qa_index(_chunks("a.pdf"), collection)
+    qa_index.build_qa_index(_chunks("b.pdf"), collection)
+
+    generated[:] = [{"question": REVENUE, "answer": "Revenue was 9,000 [C2]."}]
+    qa_index.build_qa_index(_chunks("a.pdf"), collection)
+
+    assert qa_index.lookup_precomputed_answer(REVENUE, collection) is not None
+    # Only b.pdf's copy of the old question is left.
+    result = qa_index.lookup_precomputed_answer(NET_INCOME, collection)
+    assert result is not None
+    assert result["citations"]["C1"]["source"] == "b.pdf"
+
+
+def test_lookup_uses_a_supplied_query_vector(generated, collection):
+    generated.append({"question": NET_INCOME, "answer": "Net income was 1,200 [C1]."})
+    qa_index.build_qa_index(_chunks("a.pdf"), collection)
+    vector = qa_index._get_vector_store().embeddings.embed_query(NET_INCOME)
+
+    result = qa_index.lookup_precomputed_answer("reworded", collection, query_vector=vector)
+
+    assert result["precomputed_score"] == pytest.approx(1.0)
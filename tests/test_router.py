@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.agents.router import EASY, HARD, classify_question
+from app.core.config import Settings
+
+SETTINGS = Settings(
+    _env_file=None,
+    openai_model_name="strong",
+    openai_fast_model_name="fast",
+    router_max_easy_words=12,
+    router_max_easy_sources=1,
+    router_min_easy_score=0.5,
+    router_verify_easy=False,
+)
+ONE_SOURCE = {"C1": {"source": "a.pdf", "score": 0.8}, "C2": {"source": "a.pdf", "score": 0.6}}
+
+
+def test_short_single_source_lookup_is_easy():
+    decision = classify_question("What was net income in 2023?", ONE_SOURCE, SETTINGS)
+
+    assert (decision.route, decision.model, decision.verify, decision.reasons) == (
+        EASY,
+        "fast",
+        False,
+        [],
+    )
+
+
+def test_easy_requests_can_still_be_verified():
+    settings = SETTINGS.model_copy(update={"router_verify_easy": True})
+
+    assert classify_question("What was net income?", ONE_SOURCE, settings).verify
+
+
+@pytest.mark.parametrize(
+    "question, citations, reason",
+    [
+        ("What was net income?", {}, "no_context"),
+        (" ".join(["word"] * 13), ONE_SOURCE, "long_question"),
+        (
+            "What was net income?",
+            {"C1": {"source": "a.pdf", "score": 0.9}, "C2": {"source": "b.pdf", "score": 0.9}},
+            "multiple_sources",
+        ),
+        ("What was net income?", {"C1": {"source": "a.pdf", "score": 0.3}}, "low_similarity"),
+        ("Why did net income fall?", ONE_SOURCE, "complex_question"),
+        ("Compare revenue vs. costs", ONE_SOURCE, "complex_question"),
+    ],
+)
+def test_hard_signals_route_to_the_strong_model(question, citations, reason):
+    decision = classify_question(question, citations, SETTINGS)
+
+    assert (decision.route, decision.model, decision.verify) == (HARD, "strong", True)
+    assert reason in decision.reasons
+
+
+def test_missing_scores_do_not_count_as_low_similarity():
+    decision = classify_question("What was net income?", {"C1": {"source": "a.pdf"}}, SETTINGS)
+
+    assert decision.route == EASY
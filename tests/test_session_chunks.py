@@ -0,0 +1,105 @@
+from langchain_core.documents import Document
+
+from app.core.retrieval.session_chunks import (
+    decode_session_context,
+    encode_session_context,
+    mark_cited,
+    merge_session_chunks,
+    new_session_context,
+    record_turn,
+    reusable_chunks,
+    serialize_session_turn,
+)
+from app.services.session_store import SessionStore
+
+
+def _doc(name, page=1):
+    return Document(
+        page_content=f"text of {name}",
+        metadata={"chunk_id": name, "source": "report.pdf", "page": page},
+    )
+
+
+def _ids(context):
+    return [entry["id"] for entry in context["chunks"]]
+
+
+def test_merge_keeps_ids_stable_and_assigns_new_ones():
+    context = merge_session_chunks(new_session_context(), [_doc("a"), _doc("b")], 10)
+    context = merge_session_chunks(context, [_doc("c"), _doc("a")], 10)
+
+    by_key = {entry["key"]: entry["id"] for entry in context["chunks"]}
+    assert by_key == {"a": "C1", "b": "C2", "c": "C3"}
+    # Re-used chunks move to the most recently used end.
+    assert _ids(context) == ["C2", "C3", "C1"]
+
+
+def test_merge_evicts_least_recently_used_without_reusing_ids():
+    context = merge_session_chunks(new_session_context(), [_doc("a"), _doc("b")], 2)
+    context = merge_session_chunks(context, [_doc("c")], 2)
+    context = merge_session_chunks(context, [_doc("a")], 2)
+
+    assert [entry["key"] for entry in context["chunks"]] == ["c", "a"]
+    assert _ids(context) == ["C3", "C4"]
+
+
+def test_merge_does_not_mutate_its_input():
+    original = merge_session_chunks(new_session_context(), [_doc("a")], 10)
+    merge_session_chunks(original, [_doc("b")], 10)
+
+    assert _ids(original) == ["C1"]
+
+
+def test_follow_up_reuses_the_closest_turn():
+    docs = [_doc("a"), _doc("b")]
+    context = merge_session_chunks(new_session_context(), docs, 10)
+    context = record_turn(context, [1.0, 0.0], docs)
+
+    assert reusable_chunks(context, [0.99, 0.05], min_similarity=0.95) == docs
+    assert reusable_chunks(context, [0.0, 1.0], min_similarity=0.95) is None
+    assert reusable_chunks(new_session_context(), [1.0, 0.0], 0.5) is None
+
+
+def test_reuse_needs_the_turns_chunks_to_still_be_in_the_set():
+    context = merge_session_chunks(new_session_context(), [_doc("a")], 1)
+    context = record_turn(context, [1.0, 0.0], [_doc("a")])
+    context = merge_session_chunks(context, [_doc("b")], 1)
+
+    assert reusable_chunks(context, [1.0, 0.0], min_similarity=0.9) is None
+
+
+def test_turn_sends_current_text_and_lists_earlier_citations():
+    context = merge_session_chunks(new_session_context(), [_doc("a"), _doc("b", page=3)], 10)
+    context = mark_cited(context, "Revenue rose [C2].")
+    context = merge_session_chunks(context, [_doc("c")], 10)
+
+    text, citations = serialize_session_turn(context, [_doc("c")])
+
+    assert "[C3] Chunk from page 1:\ntext of c" in text
+    assert "- [C2] report.pdf, page 3" in text
+    assert "text of b" not in text
+    assert "[C1]" not in text
+    assert sorted(citations) == ["C2", "C3"]
+
+
+def test_encode_round_trips_documents():
+    context = merge_session_chunks(new_session_context(), [_doc("a")], 10)
+    context = record_turn(context, [0.5, 0.5], [_doc("a")])
+
+    decoded = decode_session_context(encode_session_context(context))
+
+    assert decoded == context
+    assert isinstance(decoded["chunks"][0]["doc"], Document)
+
+
+def test_session_store_keeps_chunk_sets_per_session():
+    store = SessionStore(ttl_seconds=60, max_sessions=2)
+    with store.turn("s1") as context:
+        store.save("s1", merge_session_chunks(context, [_doc("a")], 10))
+    store.save("s2", new_session_context())
+    store.save("s3", new_session_context())
+
+    assert len(store) == 2
+    with store.turn("s1") as context:
+        # s1 was the least recently used and has been evicted.
+        assert context == new_session_context()
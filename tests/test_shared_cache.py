@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from app.core import shared_cache as shared_cache_module
+from app.core.llm.embedding_cache import SharedCacheEmbeddings
+from app.core.retrieval.session_chunks import merge_session_chunks
+from app.core.shared_cache import SharedCache, cache_key
+from app.services.session_store import SessionStore
+
+
+def _cache(tmp_path, ttl_seconds=60.0, max_entries=100):
+    return SharedCache(tmp_path / "shared.sqlite", ttl_seconds, max_entries)
+
+
+def test_entries_are_shared_between_handles(tmp_path):
+    writer, reader = _cache(tmp_path), _cache(tmp_path)
+    writer.set("answer", cache_key("q", 1), b"42")
+
+    assert reader.get("answer", cache_key("q", 1)) == b"42"
+    assert reader.get("answer", cache_key("q", 2)) is None
+    assert reader.get("other", cache_key("q", 1)) is None
+
+
+def test_expired_entries_are_not_returned(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("answer", "k", b"old", ttl_seconds=-1)
+
+    assert cache.get("answer", "k") is None
+
+
+def test_sweep_trims_to_max_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache_module, "_SWEEP_EVERY", 1)
+    cache = _cache(tmp_path, max_entries=2)
+    for i in range(5):
+        cache.set("answer", str(i), b"x", ttl_seconds=60 + i)
+
+    assert [cache.get("answer", str(i)) for i in range(5)] == [None, None, None, b"x", b"x"]
+
+
+def test_counters_are_atomic_across_threads(tmp_path):
+    handles = [_cache(tmp_path) for _ in range(4)]
+
+    def bump(cache):
+        for _ in range(25):
+            cache.increment("index_version")
+
+    threads = [threading.Thread(target=bump, args=(cache,)) for cache in handles]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _cache(tmp_path).counter("index_version") == 100
+    assert _cache(tmp_path).counter("never") == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_cache_created_before_fork_works_in_the_child(tmp_path):
+    cache = _cache(tmp_path)
+    cache.increment("index_version")
+    child = multiprocessing.get_context("fork").Process(
+        target=cache.increment, args=("index_version",)
+    )
+    child.start()
+    child.join(10)
+
+    assert child.exitcode == 0
+    assert cache.counter("index_version") == 2
+
+
+class _CountingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [0.25, 0.5, float(len(text))]
+
+
+def test_query_embeddings_are_memoized(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "app.core.llm.embedding_cache.get_shared_cache", lambda: _cache(tmp_path)
+    )
+    inner = _CountingEmbeddings()
+    first = SharedCacheEmbeddings(inner, model="stub:m")
+    second = SharedCacheEmbeddings(inner, model="stub:m")
+
+    assert first.embed_query("net income") == [0.25, 0.5, 10.0]
+    assert second.embed_query("net income") == [0.25, 0.5, 10.0]
+    assert inner.calls == 1
+    SharedCacheEmbeddings(inner, model="stub:other").embed_query("net income")
+    assert inner.calls == 2
+
+
+def test_sessions_move_between_workers(tmp_path):
+    doc = Document(page_content="text", metadata={"chunk_id": "a", "page": 1})
+    first, second = SessionStore(60, 10, _cache(tmp_path)), SessionStore(60, 10, _cache(tmp_path))
+
+    with first.turn("s") as context:
+        first.save("s", merge_session_chunks(context, [doc], 10))
+    with second.turn("s") as context:
+        assert [entry["id"] for entry in context["chunks"]] == ["C1"]
+        assert context["chunks"][0]["doc"] == doc
@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import functools
+import json
+import re
+import time
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import replay_traffic
+from app.core.config import get_settings
+from app.core.traffic_capture import TrafficCaptureMiddleware, annotate, redact
+
+
+def test_named_fields_are_masked_consistently():
+    fields = frozenset({"session_id"})
+    value = {
+        "question": "What was net income?",
+        "session_id": "alice",
+        "turns": [{"session_id": "alice"}, {"session_id": "bob"}],
+    }
+
+    redacted = redact(value, fields, None)
+
+    assert redacted["question"] == "What was net income?"
+    assert redacted["session_id"].startswith("[REDACTED:")
+    assert redacted["turns"][0]["session_id"] == redacted["session_id"]
+    assert redacted["turns"][1]["session_id"] != redacted["session_id"]
+    assert "alice" not in json.dumps(redacted)
+
+
+def test_pattern_is_masked_inside_strings():
+    pattern = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+
+    redacted = redact({"question": "SSN 123-45-6789, year 2023", "k": 4}, frozenset(), pattern)
+
+    assert redacted["question"].startswith("SSN [REDACTED:")
+    assert redacted["question"].endswith(", year 2023")
+    assert "6789" not in redacted["question"]
+    assert redacted["k"] == 4
+
+
+@pytest.fixture
+def capture_dir(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "capture_dir", str(tmp_path / "capture"))
+    monkeypatch.setattr(settings, "capture_paths", ["/qa", "/index-pdf"])
+    monkeypatch.setattr(settings, "capture_redact_fields", ["session_id"])
+    monkeypatch.setattr(settings, "capture_store_uploads", True)
+    return tmp_path / "capture"
+
+
+async def _qa(request: Request):
+    annotate(route="easy")
+    payload = await request.json()
+    return JSONResponse({"answer": payload["question"]})
+
+
+async def _upload(request: Request):
+    await request.body()
+    return JSONResponse({"chunks_indexed": 1})
+
+
+def _client():
+    app = Starlette(
+        routes=[
+            Route("/qa", _qa, methods=["POST"]),
+            Route("/index-pdf", _upload, methods=["POST"]),
+            Route("/health", lambda request: JSONResponse({}), methods=["GET"]),
+        ]
+    )
+    app.add_middleware(TrafficCaptureMiddleware)
+    return TestClient(app)
+
+
+def _captured(directory, expected):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        files = sorted(directory.glob("capture-*.jsonl"))
+        lines = [line for f in files for line in f.read_text().splitlines()]
+        if len(lines) >= expected:
+            return [json.loads(line) for line in lines]
+        time.sleep(0.01)
+    raise AssertionError(f"expected {expected} captured records")
+
+
+def test_middleware_records_requests_on_captured_paths(capture_dir):
+    with _client() as client:
+        client.post("/qa", json={"question": "Net income?", "session_id": "alice"})
+        client.get("/health")
+        client.post("/index-pdf", content=b"%PDF-1.4", headers={"content-type": "application/pdf"})
+
+    qa, upload = _captured(capture_dir, 2)
+
+    assert (qa["method"], qa["path"], qa["status"], qa["route"]) == ("POST", "/qa", 200, "easy")
+    assert qa["body"]["question"] == "Net income?"
+    assert qa["body"]["session_id"].startswith("[REDACTED:")
+    assert qa["latency_seconds"] >= 0
+    assert upload["body_bytes"] == 8
+    assert (capture_dir / upload["body_blob"]).read_bytes() == b"%PDF-1.4"
+
+
+def test_replay_request_bodies(tmp_path):
+    (tmp_path / "blobs").mkdir()
+    (tmp_path / "blobs" / "abc").write_bytes(b"pdf")
+
+    assert replay_traffic._request_body({"body": {"q": 1}}, tmp_path) == b'{"q": 1}'
+    assert replay_traffic._request_body({"body_blob": "blobs/abc"}, tmp_path) == b"pdf"
+    assert replay_traffic._request_body({"body_blob": "blobs/gone"}, tmp_path) is None
+    assert replay_traffic._request_body({"body_truncated": True}, tmp_path) is None
+    assert replay_traffic._request_body({"body_bytes": 10}, tmp_path) is None
+    assert replay_traffic._request_body({}, tmp_path) == b""
+
+
+def test_replay_summary_separates_errors_from_shed_load():
+    summary = replay_traffic._summary([0.1, 0.2, 0.3, 0.4], [200, 429, 503, 500, None])
+
+    assert summary["requests"] == 5
+    assert summary["error_rate"] == pytest.approx(2 / 5)
+    assert summary["shed_rate"] == pytest.approx(2 / 5)
+    assert summary["p50_s"] == pytest.approx(0.25)
+    assert replay_traffic._summary([], [])["p99_s"] is None
+
+
+def test_replay_keeps_scaled_inter_arrival_times(tmp_path, monkeypatch):
+    sent = []
+
+    async def app(scope, receive, send):
+        sent.append(time.perf_counter())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    monkeypatch.setattr(
+        replay_traffic.httpx,
+        "AsyncClient",
+        functools.partial(httpx.AsyncClient, transport=httpx.ASGITransport(app=app)),
+    )
+    record = {"method": "POST", "path": "/qa", "query": "", "content_type": "application/json"}
+    records = [
+        {**record, "ts": 100.0, "body": {"question": "a"}},
+        {**record, "ts": 101.0, "body": {"question": "b"}},
+        {**record, "ts": 101.5, "body_truncated": True},
+    ]
+    args = argparse.Namespace(
+        target="http://replay", concurrency=4, max_speed=False, speed=5.0, timeout=5.0
+    )
+
+    results = asyncio.run(replay_traffic._replay(records, args, tmp_path))
+
+    assert sorted(r["index"] for r in results) == [0, 1, 2]
+    assert [r.get("status") for r in sorted(results, key=lambda r: r["index"])] == [
+        200,
+        200,
+        None,
+    ]
+    assert sent[1] - sent[0] == pytest.approx(0.2, abs=0.1)